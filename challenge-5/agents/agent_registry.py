@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from .tracing import set_span_attributes, traced
+
+
+def _as_plain(value):
+    """Turn SDK model objects (tool definitions, tool resources) into JSON-serializable data."""
+    if hasattr(value, "as_dict"):
+        return value.as_dict()
+    if isinstance(value, dict):
+        return {k: _as_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_as_plain(v) for v in value]
+    return value
+
+
+def definition_hash(model: str, instructions: str, tools=None, tool_resources=None, description: str = None) -> str:
+    """Stable hash of everything that shapes an agent's behaviour."""
+    definition = {
+        "model": model,
+        "instructions": instructions,
+        "description": description,
+        "tools": _as_plain(tools or []),
+        "tool_resources": _as_plain(tool_resources),
+    }
+    return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class AgentRegistry:
+    """
+    Local record of agents created in Azure AI Foundry, keyed by project endpoint and
+    agent name. An agent is reused while its definition hash (model, instructions,
+    tools) is unchanged, and recreated only when the definition changes, so repeated
+    runs stop creating a fresh agent per call.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get("AGENT_REGISTRY_PATH", os.path.join(".cache", "agent_registry.json"))
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._stats = {"reused": 0, "created": 0, "recreated": 0}
+        # How many of the project's most recent agents to search by name and definition hash
+        # when this registry has no entry (0 disables the lookup)
+        self.remote_scan = int(os.environ.get("AGENT_REGISTRY_REMOTE_SCAN", "100"))
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _save(self):
+        """Write the registry atomically so concurrent processes never read a torn file."""
+        with self._lock:
+            entries = json.loads(json.dumps(self._entries))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, scope: str, name: str, digest: str):
+        """Return the registered agent ID when the stored definition hash matches, else None."""
+        with self._lock:
+            entry = self._entries.get(scope, {}).get(name)
+        if entry and entry.get("hash") == digest:
+            return entry["agent_id"]
+        return None
+
+    def previous(self, scope: str, name: str):
+        """Return the registered agent ID for a name regardless of its hash."""
+        with self._lock:
+            entry = self._entries.get(scope, {}).get(name)
+        return entry["agent_id"] if entry else None
+
+    def register(self, scope: str, name: str, digest: str, agent_id: str, model: str = None):
+        with self._lock:
+            self._entries.setdefault(scope, {})[name] = {
+                "agent_id": agent_id,
+                "hash": digest,
+                "model": model,
+                "updated_at": time.time(),
+            }
+        self._save()
+
+    def forget(self, scope: str, name: str):
+        with self._lock:
+            self._entries.get(scope, {}).pop(name, None)
+        self._save()
+
+    def _create_kwargs(self, digest: str, name: str, model: str, instructions: str, tools, tool_resources, description: str, kwargs: dict) -> dict:
+        create_kwargs = {"model": model, "name": name, "instructions": instructions, **kwargs}
+        # Stored on the agent itself, so another machine without this registry file can reuse it
+        create_kwargs["metadata"] = {**(kwargs.get("metadata") or {}), "definition_hash": digest}
+        if description is not None:
+            create_kwargs["description"] = description
+        if tools is not None:
+            create_kwargs["tools"] = tools
+        if tool_resources is not None:
+            create_kwargs["tool_resources"] = tool_resources
+        return create_kwargs
+
+    def _remote_match(self, agent, name: str, digest: str) -> bool:
+        return agent.name == name and (agent.metadata or {}).get("definition_hash") == digest
+
+    def _span(self, name: str, model: str):
+        return traced("agent_registry.get_or_create", {"agent.name": name, "gen_ai.request.model": model, "agent.registry.outcome": "failed"})
+
+    def _plan(self, scope: str, name: str, model: str, instructions: str, tools, tool_resources, description: str) -> tuple:
+        """The definition hash and the agent registered for it (None when unknown or changed)."""
+        digest = definition_hash(model, instructions, tools, tool_resources, description)
+        return digest, self.lookup(scope, name, digest)
+
+    def _outcome(self, span, outcome: str, definition):
+        set_span_attributes(span, {"agent.registry.outcome": outcome, "agent.id": definition.id})
+        return definition
+
+    def _reused(self, span, name: str, definition):
+        self._stats["reused"] += 1
+        print(f"♻️ Reusing agent {name} ({definition.id})")
+        return self._outcome(span, "reused", definition)
+
+    def _adopted(self, span, scope: str, name: str, digest: str, definition, model: str):
+        self.register(scope, name, digest, definition.id, model)
+        self._stats["reused"] += 1
+        print(f"♻️ Reusing agent {name} ({definition.id}) found in the project")
+        return self._outcome(span, "adopted", definition)
+
+    def _created(self, span, scope: str, name: str, digest: str, definition, model: str, stale_id: str):
+        self.register(scope, name, digest, definition.id, model)
+        if stale_id:
+            self._stats["recreated"] += 1
+            print(f"🔁 Agent {name} definition changed; replaced {stale_id} with {definition.id}")
+            return self._outcome(span, "recreated", definition)
+        self._stats["created"] += 1
+        return self._outcome(span, "created", definition)
+
+    async def get_or_create(self, client, scope: str, name: str, model: str, instructions: str, tools=None, tool_resources=None, description: str = None, **kwargs):
+        """
+        Return an agent definition for name, reusing the registered agent when its
+        definition is unchanged. Extra kwargs (e.g. headers) go to create_agent.
+        """
+        from azure.core.exceptions import ResourceNotFoundError
+
+        with self._span(name, model) as span:
+            digest, agent_id = self._plan(scope, name, model, instructions, tools, tool_resources, description)
+            if agent_id:
+                try:
+                    return self._reused(span, name, await client.agents.get_agent(agent_id))
+                except ResourceNotFoundError:
+                    # Deleted in the portal or by another process: fall through and recreate
+                    self.forget(scope, name)
+
+            stale_id = self.previous(scope, name)
+            if not stale_id and self.remote_scan:
+                # Unknown locally: the agent may have been created from another machine
+                scanned = 0
+                async for agent in client.agents.list_agents(limit=min(self.remote_scan, 100)):
+                    if self._remote_match(agent, name, digest):
+                        return self._adopted(span, scope, name, digest, agent, model)
+                    scanned += 1
+                    if scanned >= self.remote_scan:
+                        break
+
+            definition = await client.agents.create_agent(
+                **self._create_kwargs(digest, name, model, instructions, tools, tool_resources, description, kwargs)
+            )
+            self._created(span, scope, name, digest, definition, model, stale_id)
+            if stale_id:
+                try:
+                    await client.agents.delete_agent(stale_id)
+                except Exception as e:
+                    print(f"⚠️ Could not delete outdated agent {stale_id}: {str(e)}")
+            return definition
+
+    def get_or_create_sync(self, client, scope: str, name: str, model: str, instructions: str, tools=None, tool_resources=None, description: str = None, **kwargs):
+        """get_or_create() for the synchronous AIProjectClient."""
+        from azure.core.exceptions import ResourceNotFoundError
+
+        with self._span(name, model) as span:
+            digest, agent_id = self._plan(scope, name, model, instructions, tools, tool_resources, description)
+            if agent_id:
+                try:
+                    return self._reused(span, name, client.agents.get_agent(agent_id))
+                except ResourceNotFoundError:
+                    self.forget(scope, name)
+
+            stale_id = self.previous(scope, name)
+            if not stale_id and self.remote_scan:
+                for scanned, agent in enumerate(client.agents.list_agents(limit=min(self.remote_scan, 100)), start=1):
+                    if self._remote_match(agent, name, digest):
+                        return self._adopted(span, scope, name, digest, agent, model)
+                    if scanned >= self.remote_scan:
+                        break
+
+            definition = client.agents.create_agent(
+                **self._create_kwargs(digest, name, model, instructions, tools, tool_resources, description, kwargs)
+            )
+            self._created(span, scope, name, digest, definition, model, stale_id)
+            if stale_id:
+                try:
+                    client.agents.delete_agent(stale_id)
+                except Exception as e:
+                    print(f"⚠️ Could not delete outdated agent {stale_id}: {str(e)}")
+            return definition
+
+    def stats(self) -> dict:
+        with self._lock:
+            registered = sum(len(agents) for agents in self._entries.values())
+        return {**self._stats, "registered": registered}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_agent_registry() -> AgentRegistry:
+    """Return the process-wide agent registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = AgentRegistry()
+        return _registry
@@ -0,0 +1,356 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.ai.agents.models import TruncationObject
+
+
+class PooledThread:
+    """An Agent Service thread owned by a pool, with its usage bookkeeping."""
+
+    def __init__(self, thread_id: str, creation_ms: float):
+        self.id = thread_id
+        self.creation_ms = creation_ms
+        self.uses = 0
+        self.last_used = time.monotonic()
+        self.conversation_id = None
+
+
+class ThreadBook:
+    """
+    I/O-free bookkeeping shared by the sync and async pools: idle threads for independent
+    queries, threads pinned to a conversation, expiry, and counters. Thread-safe. Threads
+    for independent queries are cleared (their messages deleted) before they go idle again.
+    """
+
+    def __init__(self, max_idle: int = None, idle_seconds: float = None, conversation_seconds: float = None, max_uses: int = None):
+        self.max_idle = max_idle or int(os.environ.get("POLICY_THREAD_POOL_MAX_IDLE", "16"))
+        self.idle_seconds = idle_seconds if idle_seconds is not None else float(os.environ.get("POLICY_THREAD_IDLE_SECONDS", "300"))
+        self.conversation_seconds = conversation_seconds if conversation_seconds is not None else float(os.environ.get("POLICY_CONVERSATION_IDLE_SECONDS", "1800"))
+        # Cleared threads still accumulate runs server-side; retire one after this many queries
+        self.max_uses = max_uses or int(os.environ.get("POLICY_THREAD_MAX_USES", "50"))
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._pinned = {}
+        self._in_use = 0
+        self._stats = {"created": 0, "reused": 0, "deleted": 0, "delete_failures": 0, "gc_runs": 0, "cleared": 0, "clear_failures": 0, "creation_ms_total": 0.0, "creation_ms_max": 0.0}
+
+    def take_idle(self):
+        """Most recently used idle thread (its server-side state is warmest), or None."""
+        with self._lock:
+            thread = self._idle.pop() if self._idle else None
+            if thread is not None:
+                self._stats["reused"] += 1
+                self._in_use += 1
+            return thread
+
+    def pinned(self, conversation_id: str):
+        with self._lock:
+            thread = self._pinned.get(conversation_id)
+            if thread is not None:
+                self._stats["reused"] += 1
+                self._in_use += 1
+            return thread
+
+    def created(self, thread: PooledThread, conversation_id: str = None):
+        with self._lock:
+            self._stats["created"] += 1
+            self._stats["creation_ms_total"] += thread.creation_ms
+            self._stats["creation_ms_max"] = max(self._stats["creation_ms_max"], thread.creation_ms)
+            self._in_use += 1
+            if conversation_id is not None:
+                thread.conversation_id = conversation_id
+                self._pinned[conversation_id] = thread
+
+    def needs_clearing(self, thread: PooledThread) -> bool:
+        """Whether a thread coming back from a healthy run would be reused for another query."""
+        return thread.conversation_id is None and thread.uses + 1 < self.max_uses
+
+    def returned(self, thread: PooledThread) -> list:
+        """Mark a thread free again; returns threads that should be deleted now."""
+        thread.uses += 1
+        thread.last_used = time.monotonic()
+        with self._lock:
+            self._in_use -= 1
+            if thread.conversation_id is not None:
+                return []
+            if thread.uses >= self.max_uses:
+                return [thread]
+            self._idle.append(thread)
+            overflow = []
+            while len(self._idle) > self.max_idle:
+                overflow.append(self._idle.popleft())
+            return overflow
+
+    def discarded(self, thread: PooledThread) -> list:
+        """A thread left in an unknown state (e.g. a run that timed out) is deleted, not reused."""
+        with self._lock:
+            self._in_use -= 1
+            if thread.conversation_id is not None:
+                self._pinned.pop(thread.conversation_id, None)
+        return [thread]
+
+    def unpin(self, conversation_id: str):
+        with self._lock:
+            return self._pinned.pop(conversation_id, None)
+
+    def expired(self) -> list:
+        """Remove and return idle threads and conversations that outlived their idle time."""
+        now = time.monotonic()
+        with self._lock:
+            self._stats["gc_runs"] += 1
+            stale = [t for t in self._idle if now - t.last_used >= self.idle_seconds]
+            self._idle = deque(t for t in self._idle if now - t.last_used < self.idle_seconds)
+            for conversation_id, thread in list(self._pinned.items()):
+                if now - thread.last_used >= self.conversation_seconds:
+                    stale.append(self._pinned.pop(conversation_id))
+            return stale
+
+    def drain(self) -> list:
+        with self._lock:
+            threads = list(self._idle) + list(self._pinned.values())
+            self._idle.clear()
+            self._pinned.clear()
+            return threads
+
+    def deleted(self, ok: bool):
+        with self._lock:
+            self._stats["deleted" if ok else "delete_failures"] += 1
+
+    def cleared(self, ok: bool):
+        with self._lock:
+            self._stats["cleared" if ok else "clear_failures"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            created = self._stats["created"]
+            acquired = created + self._stats["reused"]
+            return {
+                **{k: v for k, v in self._stats.items() if k != "creation_ms_total"},
+                "idle": len(self._idle),
+                "pinned": len(self._pinned),
+                "in_use": self._in_use,
+                "reuse_rate": round(self._stats["reused"] / acquired, 3) if acquired else 0.0,
+                "creation_ms_avg": round(self._stats["creation_ms_total"] / created, 1) if created else 0.0,
+                "creation_ms_max": round(self._stats["creation_ms_max"], 1),
+            }
+
+
+def run_options(thread: PooledThread) -> dict:
+    """
+    Extra runs.create arguments for a pooled thread. Independent queries run on cleared
+    threads; limiting them to the latest message also keeps the model from seeing an
+    earlier question should one be left behind. Conversation threads keep their history.
+    """
+    if thread.conversation_id is not None:
+        return {}
+    return {"truncation_strategy": TruncationObject(type="last_messages", last_messages=1)}
+
+
+class AgentThreadPool:
+    """
+    Agent Service thread pool for the synchronous agents client. Independent queries reuse
+    idle threads, cleared in the background after each query, conversations stay pinned to
+    their thread, and a daemon thread deletes threads idle for longer than
+    POLICY_THREAD_IDLE_SECONDS / POLICY_CONVERSATION_IDLE_SECONDS.
+    """
+
+    def __init__(self, agents_client, gc_interval: float = None, **limits):
+        self.agents_client = agents_client
+        self.book = ThreadBook(**limits)
+        self.gc_interval = gc_interval or float(os.environ.get("POLICY_THREAD_GC_SECONDS", "60"))
+        self._conversation_locks = {}
+        self._locks_guard = threading.Lock()
+        self._stop = threading.Event()
+        self._gc_thread = None
+        self._clearer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="agent-thread-clear")
+
+    def _create(self, conversation_id: str = None) -> PooledThread:
+        from .tracing import set_span_attributes, traced
+
+        with traced("agent_thread.create", {"thread.conversation_id": conversation_id}) as span:
+            start = time.perf_counter()
+            created = self.agents_client.threads.create()
+            thread = PooledThread(created.id, (time.perf_counter() - start) * 1000)
+            set_span_attributes(span, {"thread.id": created.id})
+        self.book.created(thread, conversation_id)
+        return thread
+
+    def _delete(self, threads: list):
+        for thread in threads:
+            try:
+                self.agents_client.threads.delete(thread.id)
+                self.book.deleted(True)
+            except Exception as e:
+                self.book.deleted(False)
+                print(f"⚠️ Could not delete agent thread {thread.id}: {str(e)}")
+
+    def acquire(self, conversation_id: str = None) -> PooledThread:
+        """A thread for one query; for a conversation, the caller must hold conversation(id)."""
+        self._ensure_gc()
+        if conversation_id is not None:
+            return self.book.pinned(conversation_id) or self._create(conversation_id)
+        return self.book.take_idle() or self._create()
+
+    def _recycle(self, thread: PooledThread):
+        """Delete a finished query's messages so the thread goes back idle without them."""
+        try:
+            message_ids = [message.id for message in self.agents_client.messages.list(thread_id=thread.id)]
+            for message_id in message_ids:
+                self.agents_client.messages.delete(thread_id=thread.id, message_id=message_id)
+        except Exception as e:
+            self.book.cleared(False)
+            print(f"⚠️ Could not clear agent thread {thread.id}: {str(e)}")
+            self._delete(self.book.discarded(thread))
+            return
+        self.book.cleared(True)
+        self._delete(self.book.returned(thread))
+
+    def release(self, thread: PooledThread, healthy: bool = True):
+        """Return a thread after its run; pass healthy=False when the run did not finish cleanly."""
+        if not healthy:
+            self._delete(self.book.discarded(thread))
+        elif self.book.needs_clearing(thread):
+            # The answer has been read: clear the thread off the caller's path
+            self._clearer.submit(self._recycle, thread)
+        else:
+            self._delete(self.book.returned(thread))
+
+    def conversation(self, conversation_id: str) -> threading.Lock:
+        """Lock serializing runs on a conversation's thread (one active run per thread)."""
+        with self._locks_guard:
+            return self._conversation_locks.setdefault(conversation_id, threading.Lock())
+
+    def end_conversation(self, conversation_id: str):
+        thread = self.book.unpin(conversation_id)
+        if thread is not None:
+            self._delete([thread])
+        with self._locks_guard:
+            self._conversation_locks.pop(conversation_id, None)
+
+    def collect_idle(self):
+        expired = self.book.expired()
+        with self._locks_guard:
+            for thread in expired:
+                self._conversation_locks.pop(thread.conversation_id, None)
+        self._delete(expired)
+
+    def _ensure_gc(self):
+        if self._gc_thread is None:
+            self._gc_thread = threading.Thread(target=self._gc_loop, name="agent-thread-gc", daemon=True)
+            self._gc_thread.start()
+
+    def _gc_loop(self):
+        while not self._stop.wait(self.gc_interval):
+            self.collect_idle()
+
+    def close(self):
+        self._stop.set()
+        self._clearer.shutdown(wait=True)
+        self._delete(self.book.drain())
+
+    def metrics(self) -> dict:
+        return self.book.metrics()
+
+
+class AsyncAgentThreadPool:
+    """AgentThreadPool for the aio agents client; clearing and garbage collection run as asyncio tasks."""
+
+    def __init__(self, agents_client, gc_interval: float = None, **limits):
+        self.agents_client = agents_client
+        self.book = ThreadBook(**limits)
+        self.gc_interval = gc_interval or float(os.environ.get("POLICY_THREAD_GC_SECONDS", "60"))
+        self._conversation_locks = {}
+        self._gc_task = None
+        self._recycling = set()
+
+    async def _create(self, conversation_id: str = None) -> PooledThread:
+        from .tracing import set_span_attributes, traced
+
+        with traced("agent_thread.create", {"thread.conversation_id": conversation_id}) as span:
+            start = time.perf_counter()
+            created = await self.agents_client.threads.create()
+            thread = PooledThread(created.id, (time.perf_counter() - start) * 1000)
+            set_span_attributes(span, {"thread.id": created.id})
+        self.book.created(thread, conversation_id)
+        return thread
+
+    async def _delete(self, threads: list):
+        async def delete(thread):
+            try:
+                await self.agents_client.threads.delete(thread.id)
+                self.book.deleted(True)
+            except Exception as e:
+                self.book.deleted(False)
+                print(f"⚠️ Could not delete agent thread {thread.id}: {str(e)}")
+        await asyncio.gather(*(delete(thread) for thread in threads))
+
+    async def acquire(self, conversation_id: str = None) -> PooledThread:
+        """A thread for one query; for a conversation, the caller must hold conversation(id)."""
+        self._ensure_gc()
+        if conversation_id is not None:
+            return self.book.pinned(conversation_id) or await self._create(conversation_id)
+        return self.book.take_idle() or await self._create()
+
+    async def _recycle(self, thread: PooledThread):
+        """Delete a finished query's messages so the thread goes back idle without them."""
+        try:
+            message_ids = [message.id async for message in self.agents_client.messages.list(thread_id=thread.id)]
+            await asyncio.gather(*(self.agents_client.messages.delete(thread_id=thread.id, message_id=message_id) for message_id in message_ids))
+        except Exception as e:
+            self.book.cleared(False)
+            print(f"⚠️ Could not clear agent thread {thread.id}: {str(e)}")
+            await self._delete(self.book.discarded(thread))
+            return
+        self.book.cleared(True)
+        await self._delete(self.book.returned(thread))
+
+    async def release(self, thread: PooledThread, healthy: bool = True):
+        """Return a thread after its run; pass healthy=False when the run did not finish cleanly."""
+        if not healthy:
+            await self._delete(self.book.discarded(thread))
+        elif self.book.needs_clearing(thread):
+            # The answer has been read: clear the thread off the caller's path
+            task = asyncio.create_task(self._recycle(thread))
+            self._recycling.add(task)
+            task.add_done_callback(self._recycling.discard)
+        else:
+            await self._delete(self.book.returned(thread))
+
+    def conversation(self, conversation_id: str) -> asyncio.Lock:
+        """Lock serializing runs on a conversation's thread (one active run per thread)."""
+        return self._conversation_locks.setdefault(conversation_id, asyncio.Lock())
+
+    async def end_conversation(self, conversation_id: str):
+        thread = self.book.unpin(conversation_id)
+        if thread is not None:
+            await self._delete([thread])
+        self._conversation_locks.pop(conversation_id, None)
+
+    async def collect_idle(self):
+        expired = self.book.expired()
+        for thread in expired:
+            self._conversation_locks.pop(thread.conversation_id, None)
+        await self._delete(expired)
+
+    def _ensure_gc(self):
+        if self._gc_task is None or self._gc_task.done():
+            self._gc_task = asyncio.create_task(self._gc_loop())
+
+    async def _gc_loop(self):
+        while True:
+            await asyncio.sleep(self.gc_interval)
+            await self.collect_idle()
+
+    async def close(self):
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            await asyncio.gather(self._gc_task, return_exceptions=True)
+        await asyncio.gather(*self._recycling, return_exceptions=True)
+        await self._delete(self.book.drain())
+
+    def metrics(self) -> dict:
+        return self.book.metrics()
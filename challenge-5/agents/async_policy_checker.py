@@ -0,0 +1,199 @@
+import os
+import time
+import asyncio
+from typing import Annotated
+
+from azure.identity.aio import DefaultAzureCredential
+from azure.ai.projects.aio import AIProjectClient
+from azure.ai.agents.models import ListSortOrder, MessageRole
+from semantic_kernel.functions import kernel_function
+from dotenv import load_dotenv
+
+from .agent_registry import get_agent_registry
+from .agent_threads import AsyncAgentThreadPool, run_options
+from .policy_definition import (
+    PENDING_RUN_STATES,
+    POLICY_CHECKER_INSTRUCTIONS,
+    POLICY_CHECKER_MODEL,
+    POLICY_CHECKER_NAME,
+    agent_reply,
+    policy_checker_name,
+    policy_search_mode,
+    policy_search_tool,
+    tool_outputs,
+)
+from .run_polling import run_polling_options
+from .tracing import run_usage_attributes, set_span_attributes, traced
+
+load_dotenv()
+
+
+class AsyncPolicyCheckerWrapper:
+    """
+    Asyncio variant of PolicyCheckerWrapper on azure.ai.projects.aio: every Agent Service
+    call is awaited, so a coverage check never blocks the event loop and many checks can
+    run at once over one client. The agent is created on first use (or by setup_agent()),
+    and at most POLICY_CHECK_CONCURRENCY runs are in flight at a time. Independent questions
+    are answered from the semantic answer cache when a close enough one was seen before.
+    """
+
+    def __init__(self, credential=None, concurrency: int = None, polling_options=None, use_cache: bool = None, answer_cache=None, search_mode: str = None):
+        self.project_client = None
+        self.agent = None
+        self.threads = None
+        self.startup_s = None
+        self._credential = credential
+        self._owns_credential = credential is None
+        self._setup_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(concurrency or int(os.environ.get("POLICY_CHECK_CONCURRENCY", "8")))
+        self.polling_options = polling_options or run_polling_options(POLICY_CHECKER_NAME)
+        # The semantic answer cache (numpy) is resolved on the first independent question
+        self.answers = answer_cache
+        self._use_cache = True if answer_cache is not None else use_cache
+        self.search_mode = policy_search_mode(search_mode)
+        self.search_tool = None
+        self.stats = {"checks": 0, "cache_hits": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0, "total_latency_s": 0.0}
+
+    async def setup_agent(self):
+        """Create the client and find or create the policy checker agent once; safe to call concurrently."""
+        if self.agent is not None:
+            return
+        async with self._setup_lock:
+            if self.agent is not None:
+                return
+            start = time.perf_counter()
+            if self._credential is None:
+                self._credential = DefaultAzureCredential(exclude_interactive_browser_credential=False)
+            endpoint = os.environ.get("AI_FOUNDRY_PROJECT_ENDPOINT")
+            self.project_client = AIProjectClient(endpoint=endpoint, credential=self._credential)
+            self.threads = AsyncAgentThreadPool(self.project_client.agents)
+            self.search_tool = policy_search_tool(self.search_mode)
+            # Same name and definition as the sync wrapper, so both share one registered agent
+            self.agent = await get_agent_registry().get_or_create(
+                self.project_client,
+                endpoint,
+                model=POLICY_CHECKER_MODEL,
+                name=policy_checker_name(self.search_mode),
+                instructions=POLICY_CHECKER_INSTRUCTIONS,
+                tools=self.search_tool.definitions,
+                tool_resources=self.search_tool.resources,
+            )
+            self.startup_s = time.perf_counter() - start
+
+    @kernel_function(description="Check insurance policy coverage and validate claims")
+    async def check_policy_coverage(
+        self,
+        query: Annotated[str, "Query about policy coverage or claim validation"],
+        conversation_id: Annotated[str, "Optional id tying follow-up questions to an earlier one"] = None,
+    ) -> Annotated[str, "Policy coverage analysis result"]:
+        """Check policy coverage using the Azure AI Agent Service agent"""
+        from .semantic_cache import cacheable_answer
+
+        with traced("policy_checker.check_policy_coverage", {"gen_ai.agent.name": POLICY_CHECKER_NAME, "policy.conversation_id": conversation_id}) as span:
+            # Follow-ups depend on the conversation so far and are never answered from cache
+            probe = None
+            answers = None if conversation_id else self._answer_cache()
+            if answers is not None:
+                probe = await answers.lookup_async(query)
+                if probe.answer is not None:
+                    self.stats["cache_hits"] += 1
+                    set_span_attributes(span, {"policy.cache_hit": True})
+                    return probe.answer
+
+            await self.setup_agent()
+            async with self._slots:
+                self.stats["in_flight"] += 1
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+                start = time.perf_counter()
+                try:
+                    if conversation_id:
+                        async with self.threads.conversation(conversation_id):
+                            result = await self._check(query, conversation_id)
+                    else:
+                        result = await self._check(query)
+                except Exception as e:
+                    result = f"Policy check failed: {str(e)}"
+                finally:
+                    self.stats["in_flight"] -= 1
+                    self.stats["total_latency_s"] += time.perf_counter() - start
+                self.stats["checks"] += 1
+                if result.startswith("Policy check failed"):
+                    self.stats["failures"] += 1
+                elif probe is not None and cacheable_answer(result):
+                    answers.store(probe, result)
+                return result
+
+    def _answer_cache(self):
+        """The semantic answer cache, or None when it is disabled."""
+        if self.answers is None and self._use_cache is not False:
+            from .semantic_cache import get_semantic_cache, semantic_cache_enabled
+            if semantic_cache_enabled(self._use_cache):
+                self.answers = get_semantic_cache()
+            else:
+                self._use_cache = False
+        return self.answers
+
+    async def _check(self, query: str, conversation_id: str = None) -> str:
+        agents = self.project_client.agents
+        # Pooled thread: reused across independent queries, pinned for a conversation
+        thread = await self.threads.acquire(conversation_id)
+        healthy = False
+        try:
+            await agents.messages.create(thread_id=thread.id, role=MessageRole.USER, content=query)
+
+            with traced("agent_run", {"gen_ai.agent.name": POLICY_CHECKER_NAME, "thread.id": thread.id}) as span:
+                run = await agents.runs.create(thread_id=thread.id, agent_id=self.agent.id, **run_options(thread))
+                set_span_attributes(span, {"run.id": run.id})
+                try:
+                    run = await self.polling_options.wait_until_done_async(
+                        lambda: agents.runs.get(thread_id=thread.id, run_id=run.id),
+                        lambda current: current.status in PENDING_RUN_STATES,
+                    )
+                    # Local search mode: tool calls are answered in-process (sub-millisecond, so inline)
+                    while run.status == "requires_action":
+                        await agents.runs.submit_tool_outputs(thread_id=thread.id, run_id=run.id, tool_outputs=tool_outputs(run, self.search_tool))
+                        run = await self.polling_options.wait_until_done_async(
+                            lambda: agents.runs.get(thread_id=thread.id, run_id=run.id),
+                            lambda current: current.status in PENDING_RUN_STATES,
+                        )
+                    set_span_attributes(span, {"run.status": run.status, **run_usage_attributes(run)})
+                except TimeoutError as e:
+                    await agents.runs.cancel(thread_id=thread.id, run_id=run.id)
+                    set_span_attributes(span, {"run.status": "timed_out"})
+                    return f"Policy check failed: {str(e)}"
+            healthy = True
+
+            if run.status == "failed":
+                return f"Policy check failed: {run.last_error}"
+
+            # Only this run's messages: a reused thread also holds earlier answers
+            async for message in agents.messages.list(thread_id=thread.id, run_id=run.id, order=ListSortOrder.ASCENDING):
+                reply = agent_reply(message)
+                if reply:
+                    return reply
+
+            return "No response received from policy checker"
+        finally:
+            await self.threads.release(thread, healthy)
+
+    async def end_conversation(self, conversation_id: str):
+        """Delete the thread pinned to a finished conversation."""
+        if self.threads is not None:
+            await self.threads.end_conversation(conversation_id)
+
+    def metrics(self) -> dict:
+        """Check counters plus thread pool (counts, reuse, creation latency) and answer cache metrics."""
+        return {
+            **self.stats,
+            "startup_s": self.startup_s,
+            "threads": self.threads.metrics() if self.threads else None,
+            "answers": self.answers.metrics() if self.answers is not None else None,
+        }
+
+    async def close(self):
+        if self.threads is not None:
+            await self.threads.close()
+        if self.project_client is not None:
+            await self.project_client.close()
+        if self._owns_credential and self._credential is not None:
+            await self._credential.close()
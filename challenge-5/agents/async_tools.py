@@ -0,0 +1,351 @@
+import time
+import asyncio
+from typing import Annotated
+from semantic_kernel.functions import kernel_function
+
+from .claim_cache import ClaimDocumentCache
+from .container_stats import ContainerStatistics
+from .cosmos_metrics import CosmosMetrics, instrumented, measure_requests
+from .cosmos_pool import AsyncCosmosClientPool, get_async_cosmos_pool
+from .output_profile import OutputProfile
+from .paging import DEFAULT_PAGE_SIZE, QueryCursorStore, clamp_page_size
+from .tools import (
+    MAX_CONCURRENT_READS,
+    CosmosPluginBase,
+    bulk_claims_result,
+    claim_not_found_message,
+    claim_lookup_mode,
+    normalize_claim_ids,
+    query_span,
+)
+from .tracing import set_span_attributes
+
+class AsyncCosmosDBPlugin(CosmosPluginBase):
+    """
+    asyncio variant of CosmosDBPlugin built on azure.cosmos.aio.
+    Exposes the same kernel functions as coroutines so concurrent agents in a
+    Semantic Kernel orchestration don't block the event loop on Cosmos DB I/O.
+    """
+
+    # azure.cosmos.aio queries span partitions unless given a partition key
+    CROSS_PARTITION = {}
+    DEPENDENCIES = "azure-cosmos aiohttp"
+
+    def __init__(self, endpoint: str = None, key: str = None, database_name: str = "MyDatabase", container_name: str = "MyContainer", pool: AsyncCosmosClientPool = None, cache: ClaimDocumentCache = None, cursors: QueryCursorStore = None, output_profile: OutputProfile = None, container_stats: ContainerStatistics = None, agent_name: str = None, metrics: CosmosMetrics = None):
+        # All plugin instances share one aio client and container proxy per account
+        super().__init__(endpoint, key, database_name, container_name, pool or get_async_cosmos_pool(), cache, cursors, output_profile, container_stats, agent_name, metrics)
+
+    async def _get_container(self):
+        """Return the shared aio container proxy from the process-wide pool."""
+        return await self.pool.get_container(self.endpoint, self.key, self.database_name, self.container_name)
+
+    async def _get_container_properties(self, container) -> dict:
+        """Read the container's properties (partition key, indexing policy) once and remember them."""
+        if self._container_properties is None:
+            self._remember_properties(await container.read())
+        return self._container_properties
+
+    async def _get_partition_key_paths(self, container) -> list:
+        """Read the container's partition key paths once and remember them."""
+        await self._get_container_properties(container)
+        return self._partition_key_paths
+
+    async def _get_container_stats(self, container) -> ContainerStatistics:
+        """Start tailing the change feed on first use and return the in-memory statistics."""
+        await self.container_stats.start_async(container, await self._get_partition_key_paths(container))
+        return self.container_stats
+
+    async def _suggest_claim_ids(self, container, claim_id: str, limit: int = 5) -> list:
+        """
+        Closest existing claim IDs for a claim whose read found nothing, from the change-feed
+        claim directory. The directory is only started on the first such miss.
+        """
+        try:
+            return (await self._get_container_stats(container)).suggest_claim_ids(claim_id, limit=limit)
+        except Exception as e:
+            print(f"⚠️ Claim directory unavailable: {str(e)}")
+            return []
+
+    async def _get_cached_claim(self, container, claim_id: str, revalidate: bool = False):
+        """Serve a claim from the cache, revalidating stale entries with a conditional read on _etag."""
+        document, entry = self._cached_entry(claim_id, revalidate)
+        if entry is None:
+            return document
+
+        from azure.cosmos.exceptions import CosmosHttpResponseError
+
+        start = time.perf_counter()
+        with measure_requests() as meter:
+            try:
+                item = await container.read_item(**self._conditional_read(entry))
+            except CosmosHttpResponseError as e:
+                if not self._not_modified(claim_id, e):
+                    return None
+                item = None
+        return self._revalidated(claim_id, entry, item, meter.request_charge, start)
+
+    async def _fetch_claim(self, container, claim_id: str, revalidate: bool = False):
+        """A claim from the cache, else from Cosmos DB (and then cached); None if there is none."""
+        # Repeated lookups of the same claim (every agent fetches it) are served from the cache
+        cached = await self._get_cached_claim(container, claim_id, revalidate)
+        if cached is not None:
+            self._record_lookup("cache")
+            return cached
+
+        # The partition key layout is detected once, on the first lookup
+        await self._get_partition_key_paths(container)
+        start = time.perf_counter()
+        with measure_requests() as meter:
+            document, lookup_path = await self._read_claim(container, claim_id)
+        self._record_lookup(lookup_path)
+        if document is not None:
+            self._store_claim(claim_id, document, meter.request_charge, start)
+        return document
+
+    async def current_claim(self, claim_id: str):
+        """
+        The claim document as stored in Cosmos DB right now, or None if there is none: a
+        cached copy is revalidated on its _etag even within the cache TTL (a 304 costs ~1 RU).
+        """
+        return await self._fetch_claim(await self._get_container(), claim_id, revalidate=True)
+
+    async def _query_items(self, container, query: str, **kwargs) -> list:
+        """Run a query to completion, traced."""
+        with query_span(self.database_name, self.container_name, query, **kwargs) as span, measure_requests() as meter:
+            items = [item async for item in container.query_items(query=query, **kwargs)]
+            set_span_attributes(span, {"db.cosmosdb.item_count": len(items), "db.cosmosdb.request_charge": meter.request_charge})
+            return items
+
+    async def _read_claim(self, container, claim_id: str):
+        """Fetch a claim document using the cheapest path the partition key layout allows."""
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+
+        if claim_lookup_mode(await self._get_partition_key_paths(container)) == "point_read":
+            try:
+                return await container.read_item(item=claim_id, partition_key=claim_id), "point_read"
+            except CosmosResourceNotFoundError:
+                # The claim's partition may hold a document with a different id:
+                # a single-partition query still avoids the fan-out
+                items = await self._query_items(container, **self._claim_query(claim_id, partition_key=claim_id))
+                return (items[0] if items else None), "partition_query"
+
+        # Use SQL query to find document by claim_id across all partitions
+        items = await self._query_items(container, **self._claim_query(claim_id))
+        return (items[0] if items else None), "cross_partition_query"
+
+    async def _read_claims(self, container, claim_ids: list) -> dict:
+        """Fetch several claims at once: concurrent point reads, or batched IN queries for other layouts."""
+        if claim_lookup_mode(await self._get_partition_key_paths(container)) == "point_read":
+            # Each claim is its own partition, so fan out point reads on the shared client
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_READS)
+
+            async def read(claim_id):
+                async with semaphore:
+                    return await self._read_claim(container, claim_id)
+
+            return self._found_claims(claim_ids, await asyncio.gather(*(read(claim_id) for claim_id in claim_ids)))
+
+        documents = {}
+        for query in self._claim_batch_queries(claim_ids):
+            self._batch_claims(documents, await self._query_items(container, **query))
+        return documents
+
+    async def _query_page(self, container, query: str, parameters: list, page_size: int, continuation: str, context: dict, items_key: str, skip: int = 0):
+        """Run one page of a query and return (items, next_page_token), cut to the output budget."""
+        with query_span(self.database_name, self.container_name, query, max_item_count=page_size) as span, measure_requests() as meter:
+            pager = container.query_items(**self._page_query(query, parameters, page_size)).by_page(continuation)
+
+            items = []
+            page_start = continuation
+            async for page in pager:
+                items.extend([item async for item in page])
+                # Cross-partition queries can return empty pages; keep going until something arrives
+                if items:
+                    break
+                page_start = pager.continuation_token
+            set_span_attributes(span, {"db.cosmosdb.item_count": len(items), "db.cosmosdb.request_charge": meter.request_charge})
+
+        return self._cut_page(items, skip, page_start, pager.continuation_token, query, parameters, page_size, context, items_key)
+
+    @kernel_function(description="Test Cosmos DB connection and list available claims")
+    @instrumented
+    async def test_connection(self) -> Annotated[str, "Connection test result and available claims"]:
+        """Test the Cosmos DB connection and show what claims are available."""
+        try:
+            container = await self._get_container()
+
+            # A container metadata read proves connectivity without scanning documents
+            await container.read()
+
+            return self._connection_result(await self._get_container_stats(container))
+
+        except Exception as e:
+            return f"❌ Connection test failed: {str(e)}"
+
+    @kernel_function(description="Retrieve a document by claim_id from Cosmos DB")
+    @instrumented
+    async def get_document_by_claim_id(
+        self,
+        claim_id: Annotated[str, "The claim_id to retrieve"]
+    ) -> Annotated[str, "JSON document from Cosmos DB"]:
+        """Retrieve a document by its claim_id, with a point read when claim_id is the partition key."""
+        try:
+            container = await self._get_container()
+            document = await self._fetch_claim(container, claim_id)
+
+            if document is None:
+                # Only a miss consults the claim-ID directory, for the closest existing IDs
+                return claim_not_found_message(claim_id, self.container_name, await self._suggest_claim_ids(container, claim_id))
+
+            return self._render_document(document)
+
+        except Exception as e:
+            return self._claim_error(claim_id, e)
+
+    @kernel_function(description="Retrieve several documents by claim_id in one call, e.g. to compare related or recent claims")
+    @instrumented
+    async def get_documents_by_claim_ids(
+        self,
+        claim_ids: Annotated[list[str], "The claim_ids to retrieve (up to 50)"]
+    ) -> Annotated[str, "JSON with the documents found and the claim_ids that are missing"]:
+        """Retrieve several claim documents in one tool call instead of one call per claim."""
+        try:
+            claim_ids = normalize_claim_ids(claim_ids)
+            if not claim_ids:
+                return "❌ No claim IDs provided. Please pass one or more claim IDs."
+
+            container = await self._get_container()
+
+            documents = self._fresh_claims(claim_ids)
+            missing = [claim_id for claim_id in claim_ids if claim_id not in documents]
+            if missing:
+                documents.update(self._store_claims(await self._read_claims(container, missing)))
+
+            suggestions = {claim_id: await self._suggest_claim_ids(container, claim_id, limit=3) for claim_id in claim_ids if claim_id not in documents}
+            return self.output.render(bulk_claims_result(claim_ids, documents, self.output, suggestions), "documents")
+
+        except Exception as e:
+            return f"❌ Error retrieving documents for claim_ids {claim_ids}: {str(e)}"
+
+    @kernel_function(description="Retrieve a JSON document by partition key and document ID from Cosmos DB")
+    @instrumented
+    async def get_document_by_id(
+        self,
+        document_id: Annotated[str, "The document ID to retrieve"],
+        partition_key: Annotated[str, "The partition key value (optional, will use cross-partition query if not provided)"] = None
+    ) -> Annotated[str, "JSON document from Cosmos DB"]:
+        """Retrieve a specific document by its ID and optionally partition key from Cosmos DB."""
+        try:
+            container = await self._get_container()
+
+            if partition_key:
+                # Direct read using partition key - most efficient
+                return self._render_document(await container.read_item(item=document_id, partition_key=partition_key))
+
+            # Cross-partition query when partition key is unknown
+            items = await self._query_items(container, **self._document_query(document_id))
+            if not items:
+                return self._document_not_found(document_id)
+            return self._render_document(items[0])
+
+        except Exception as e:
+            return self._document_error(document_id, e)
+
+    @kernel_function(description="Query documents with a custom SQL query in Cosmos DB. Results are paginated; pass next_page_token to next_page for more.")
+    @instrumented
+    async def query_documents(
+        self,
+        sql_query: Annotated[str, "SQL query to execute (e.g., 'SELECT * FROM c WHERE c.category = \"electronics\"')"],
+        page_size: Annotated[int, "Maximum number of documents per page (default: 20, max: 100)"] = DEFAULT_PAGE_SIZE
+    ) -> Annotated[str, "One page of query results as JSON, with next_page_token if more results exist"]:
+        """Execute a custom SQL query against the Cosmos DB container, one page at a time."""
+        try:
+            container = await self._get_container()
+            page_size = clamp_page_size(page_size)
+            context = {"query": sql_query}
+
+            items, next_page_token = await self._query_page(container, sql_query, None, page_size, None, context, "results")
+            return self._render_page(context, "results", items, page_size, next_page_token, f"🔍 No documents found matching query: {sql_query}")
+
+        except Exception as e:
+            return self._query_error(sql_query, e)
+
+    @kernel_function(description="Fetch the next page of results using a next_page_token returned by query_documents or search_by_field")
+    @instrumented
+    async def next_page(
+        self,
+        page_token: Annotated[str, "The next_page_token from a previous paginated result"]
+    ) -> Annotated[str, "The next page of results as JSON"]:
+        """Continue a paginated query from its stored Cosmos DB continuation token."""
+        cursor = self.cursors.get(page_token)
+        if cursor is None:
+            return self._page_token_expired(page_token)
+
+        try:
+            container = await self._get_container()
+
+            items, next_page_token = await self._query_page(
+                container,
+                cursor["query"],
+                cursor["parameters"],
+                cursor["page_size"],
+                cursor["continuation"],
+                cursor["context"],
+                cursor["items_key"],
+                cursor["skip"]
+            )
+            return self._render_page(cursor["context"], cursor["items_key"], items, cursor["page_size"], next_page_token)
+
+        except Exception as e:
+            return f"❌ Error fetching next page: {str(e)}"
+
+    @kernel_function(description="Get container information and statistics")
+    @instrumented
+    async def get_container_info(self) -> Annotated[str, "Container information and statistics"]:
+        """Get information about the Cosmos DB container."""
+        try:
+            container = await self._get_container()
+
+            # Get container properties (read once per plugin)
+            container_props = await self._get_container_properties(container)
+
+            # Counts and sizes are served from memory, kept current by tailing the change feed,
+            # instead of a cross-partition COUNT(1) scan on every call
+            return self._container_info(container_props, (await self._get_container_stats(container)).snapshot())
+
+        except Exception as e:
+            return f"❌ Error getting container info: {str(e)}"
+
+    @kernel_function(description="List recent documents (up to 100) from Cosmos DB")
+    @instrumented
+    async def list_recent_documents(
+        self,
+        limit: Annotated[int, "Maximum number of documents to return (default: 10, max: 100)"] = 10
+    ) -> Annotated[str, "List of recent documents"]:
+        """List recent documents from the container."""
+        try:
+            container = await self._get_container()
+            return self._recent_documents(await self._query_items(container, **self._recent_query(limit)))
+
+        except Exception as e:
+            return f"❌ Error listing documents: {str(e)}"
+
+    @kernel_function(description="Search documents by field value. Results are paginated; pass next_page_token to next_page for more.")
+    @instrumented
+    async def search_by_field(
+        self,
+        field_name: Annotated[str, "The field name to search in (e.g., 'name', 'category', 'status')"],
+        field_value: Annotated[str, "The value to search for"],
+        page_size: Annotated[int, "Maximum number of documents per page (default: 20, max: 100)"] = DEFAULT_PAGE_SIZE
+    ) -> Annotated[str, "One page of documents matching the search criteria, with next_page_token if more exist"]:
+        """Search for documents where a specific field matches a value, one page at a time."""
+        try:
+            container = await self._get_container()
+            page_size = clamp_page_size(page_size)
+            query, parameters, context = self._search_query(field_name, field_value)
+
+            items, next_page_token = await self._query_page(container, query, parameters, page_size, None, context, "documents")
+            return self._render_page(context, "documents", items, page_size, next_page_token, f"🔍 No documents found where {field_name} = '{field_value}'")
+
+        except Exception as e:
+            return f"❌ Error searching documents: {str(e)}"
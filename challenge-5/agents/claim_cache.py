@@ -0,0 +1,119 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+class ClaimDocumentCache:
+    """
+    Bounded LRU/TTL read-through cache for crash report documents, keyed by claim_id.
+    Entries younger than the TTL are served directly; older entries are kept so the
+    plugin can revalidate them with a conditional read on the document _etag instead
+    of fetching the whole document again.
+    """
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None):
+        self.max_entries = max_entries or int(os.environ.get("CLAIM_CACHE_MAX_ENTRIES", "256"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("CLAIM_CACHE_TTL_SECONDS", "60"))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._per_claim = {}
+        self._stats = {
+            "hits": 0,
+            "revalidated_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "request_charge_saved": 0.0,
+            "latency_saved_ms": 0.0,
+        }
+
+    def _claim_stats(self, claim_id: str) -> dict:
+        return self._per_claim.setdefault(claim_id, {"hits": 0, "revalidated_hits": 0, "misses": 0})
+
+    def lookup(self, claim_id: str):
+        """
+        Return (entry, is_fresh) for a claim, or (None, False) when nothing is cached.
+        A fresh entry counts as a hit; a stale one must be revalidated by the caller.
+        """
+        with self._lock:
+            entry = self._entries.get(claim_id)
+            if entry is None:
+                return None, False
+            self._entries.move_to_end(claim_id)
+            if time.monotonic() - entry["validated_at"] < self.ttl_seconds:
+                self._stats["hits"] += 1
+                self._stats["request_charge_saved"] += entry["request_charge"]
+                self._stats["latency_saved_ms"] += entry["latency_ms"]
+                self._claim_stats(claim_id)["hits"] += 1
+                return entry, True
+            return entry, False
+
+    def store(self, claim_id: str, document: dict, request_charge: float = 0.0, latency_ms: float = 0.0, partition_key=None):
+        """Cache a freshly fetched document and record the miss that produced it."""
+        with self._lock:
+            self._entries[claim_id] = {
+                "document": document,
+                "etag": document.get("_etag"),
+                "partition_key": partition_key,
+                "request_charge": request_charge,
+                "latency_ms": latency_ms,
+                "validated_at": time.monotonic(),
+            }
+            self._entries.move_to_end(claim_id)
+            self._stats["misses"] += 1
+            self._claim_stats(claim_id)["misses"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def mark_revalidated(self, claim_id: str, revalidation_charge: float = 0.0):
+        """Record that a stale entry's _etag still matches and restart its TTL."""
+        with self._lock:
+            entry = self._entries.get(claim_id)
+            if entry is None:
+                return
+            entry["validated_at"] = time.monotonic()
+            self._stats["revalidated_hits"] += 1
+            self._stats["request_charge_saved"] += max(entry["request_charge"] - revalidation_charge, 0.0)
+            self._claim_stats(claim_id)["revalidated_hits"] += 1
+
+    def etag(self, claim_id: str):
+        """Return the cached document's _etag without counting a lookup, or None."""
+        with self._lock:
+            entry = self._entries.get(claim_id)
+            return entry["etag"] if entry else None
+
+    def invalidate(self, claim_id: str):
+        """Drop a cached claim, e.g. after it was deleted or rewritten."""
+        with self._lock:
+            self._entries.pop(claim_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters, estimated RU/latency savings and per-claim breakdown."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["revalidated_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round((self._stats["hits"] + self._stats["revalidated_hits"]) / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "per_claim": {claim_id: dict(counts) for claim_id, counts in self._per_claim.items()},
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_claim_cache() -> ClaimDocumentCache:
+    """Return the process-wide claim document cache shared by all plugin instances."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ClaimDocumentCache()
+        return _cache
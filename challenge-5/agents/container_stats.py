@@ -0,0 +1,317 @@
+import os
+import json
+import time
+import heapq
+import asyncio
+import hashlib
+import threading
+
+
+def edit_distance(a: str, b: str, max_distance: int = None) -> int:
+    """Levenshtein distance; gives up early (returning max_distance + 1) once it is exceeded."""
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def container_scope(endpoint: str, database_name: str, container_name: str) -> str:
+    """Identity of one container, so its statistics and checkpoint are never shared with another."""
+    return f"{(endpoint or '').rstrip('/')}/dbs/{database_name}/colls/{container_name}"
+
+
+def default_checkpoint_path(scope: str = None) -> str:
+    if not scope:
+        return os.path.join(".cache", "container_stats.json")
+    return os.path.join(".cache", f"container_stats-{hashlib.sha256(scope.encode('utf-8')).hexdigest()[:16]}.json")
+
+
+class ContainerStatistics:
+    """
+    Container statistics maintained incrementally from the Cosmos DB change feed.
+    Keeps the document count, per-partition document counts/sizes and the claim-ID
+    directory in memory, so get_container_info, test_connection and unknown-claim
+    lookups no longer scan the container. State and the change feed continuation are checkpointed to disk
+    after the first catch-up, then at most every checkpoint_seconds and on stop(), so a restart only
+    reads changes made since the last checkpoint (re-reading a change is harmless).
+
+    The checkpoint records the container's scope (account endpoint, database, container)
+    and is ignored when loaded for a different one.
+
+    The change feed (latest version mode) does not surface deletes; call rebuild()
+    after bulk deletions to recount from the beginning of the feed.
+    """
+
+    def __init__(self, scope: str = None, checkpoint_path: str = None, refresh_seconds: float = None, checkpoint_seconds: float = None):
+        self.scope = scope
+        self.checkpoint_path = checkpoint_path or os.environ.get("CONTAINER_STATS_CHECKPOINT") or default_checkpoint_path(scope)
+        self.refresh_seconds = refresh_seconds or float(os.environ.get("CONTAINER_STATS_REFRESH_SECONDS", "30"))
+        self.checkpoint_seconds = checkpoint_seconds if checkpoint_seconds is not None else float(os.environ.get("CONTAINER_STATS_CHECKPOINT_SECONDS", "300"))
+        self._lock = threading.Lock()
+        self._documents = {}
+        self._partitions = {}
+        self._claims = {}
+        self._total_bytes = 0
+        self._continuation = None
+        self._updated_at = None
+        # Largest partitions as last reported by snapshot(); dropped whenever a partition changes
+        self._largest = None
+        self._dirty = False
+        self._saved_at = None
+        self._started = False
+        # Held for the whole first catch-up, so concurrent cold callers wait for one drain
+        # of the feed instead of each reading it from the beginning
+        self._start_lock = threading.Lock()
+        self._start_lock_async = None
+        self._stop = threading.Event()
+        self._task = None
+        self._load()
+
+    def _load(self):
+        """Restore state and the change feed continuation from the checkpoint file."""
+        if not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return
+        if checkpoint.get("scope") != self.scope:
+            print(f"⚠️ Ignoring container statistics checkpoint {self.checkpoint_path}: it belongs to {checkpoint.get('scope')}")
+            return
+        self._continuation = checkpoint.get("continuation")
+        self._updated_at = checkpoint.get("updated_at")
+        for key, (claim_id, partition, size) in checkpoint.get("documents", {}).items():
+            self._add(key, claim_id, partition, size)
+
+    def _save(self):
+        """Write state and continuation atomically so a crash never leaves a torn checkpoint."""
+        with self._lock:
+            self._dirty = False
+            self._saved_at = time.monotonic()
+            checkpoint = {
+                "scope": self.scope,
+                "continuation": self._continuation,
+                "updated_at": self._updated_at,
+                "documents": {key: list(entry) for key, entry in self._documents.items()},
+            }
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _add(self, key: str, claim_id, partition: str, size: int):
+        self._largest = None
+        self._documents[key] = (claim_id, partition, size)
+        part = self._partitions.setdefault(partition, {"documents": 0, "bytes": 0})
+        part["documents"] += 1
+        part["bytes"] += size
+        self._total_bytes += size
+        if claim_id is not None:
+            self._claims[claim_id] = self._claims.get(claim_id, 0) + 1
+
+    def _remove(self, key: str):
+        claim_id, partition, size = self._documents.pop(key)
+        self._largest = None
+        part = self._partitions[partition]
+        part["documents"] -= 1
+        part["bytes"] -= size
+        if part["documents"] == 0:
+            del self._partitions[partition]
+        self._total_bytes -= size
+        if claim_id is not None:
+            self._claims[claim_id] -= 1
+            if self._claims[claim_id] == 0:
+                del self._claims[claim_id]
+
+    def apply_changes(self, items: list, partition_key_paths: list):
+        """Fold a batch of change feed items (creates and updates) into the statistics."""
+        # Imported here: tools imports this module
+        from .tools import partition_key_value
+
+        with self._lock:
+            for item in items:
+                partition = json.dumps(partition_key_value(item, partition_key_paths))
+                key = json.dumps([partition, item.get("id")])
+                if key in self._documents:
+                    self._remove(key)
+                self._add(key, item.get("claim_id"), partition, len(json.dumps(item, ensure_ascii=False).encode("utf-8")))
+            self._updated_at = time.time()
+
+    def _feed_kwargs(self) -> dict:
+        if self._continuation:
+            return {"continuation": self._continuation}
+        return {"start_time": "Beginning"}
+
+    def catch_up(self, container, partition_key_paths: list) -> int:
+        """Read the change feed from the checkpoint until drained; return the number of changes applied."""
+        # The continuation comes from this feed's own pager, not the client's last response
+        # headers, which other requests on the shared client overwrite concurrently
+        pages = container.query_items_change_feed(**self._feed_kwargs()).by_page()
+        items = [item for page in pages for item in page]
+        return self._commit(pages.continuation_token, items, partition_key_paths)
+
+    async def catch_up_async(self, container, partition_key_paths: list) -> int:
+        """aio variant of catch_up."""
+        pages = container.query_items_change_feed(**self._feed_kwargs()).by_page()
+        items = [item async for page in pages async for item in page]
+        return self._commit(pages.continuation_token, items, partition_key_paths)
+
+    def _commit(self, continuation: str, items: list, partition_key_paths: list) -> int:
+        self.apply_changes(items, partition_key_paths)
+        with self._lock:
+            self._dirty = self._dirty or continuation != self._continuation or bool(items)
+            self._continuation = continuation or self._continuation
+            due = self._dirty and (self._saved_at is None or time.monotonic() - self._saved_at >= self.checkpoint_seconds)
+        if due:
+            self._save()
+        return len(items)
+
+    def flush(self):
+        """Write the checkpoint now if anything changed since the last one."""
+        if self._dirty:
+            self._save()
+
+    def start(self, container, partition_key_paths: list):
+        """Catch up once, then keep tailing the change feed on a daemon thread."""
+        with self._start_lock:
+            if self._started:
+                return
+            self.catch_up(container, partition_key_paths)
+            self._stop = threading.Event()
+            self._started = True
+
+        stop = self._stop
+
+        def tail():
+            while not stop.wait(self.refresh_seconds):
+                try:
+                    self.catch_up(container, partition_key_paths)
+                except Exception as e:
+                    print(f"⚠️ Container statistics refresh failed: {str(e)}")
+
+        threading.Thread(target=tail, name="cosmos-container-stats", daemon=True).start()
+
+    async def start_async(self, container, partition_key_paths: list):
+        """Catch up once, then keep tailing the change feed on an asyncio task."""
+        if self._started:
+            return
+        if self._start_lock_async is None:
+            self._start_lock_async = asyncio.Lock()
+        async with self._start_lock_async:
+            if self._started:
+                return
+            await self.catch_up_async(container, partition_key_paths)
+            self._stop = threading.Event()
+            self._started = True
+
+        async def tail():
+            while not self._stop.is_set():
+                await asyncio.sleep(self.refresh_seconds)
+                try:
+                    await self.catch_up_async(container, partition_key_paths)
+                except Exception as e:
+                    print(f"⚠️ Container statistics refresh failed: {str(e)}")
+
+        self._task = asyncio.create_task(tail())
+
+    def stop(self):
+        """Stop background tailing (thread or task) and write any pending checkpoint."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._started = False
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"⚠️ Could not write container statistics checkpoint: {str(e)}")
+
+    def rebuild(self):
+        """Forget all state so the next catch-up recounts from the beginning of the change feed."""
+        with self._lock:
+            self._documents.clear()
+            self._partitions.clear()
+            self._claims.clear()
+            self._total_bytes = 0
+            self._continuation = None
+            self._largest = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._continuation is not None
+
+    def has_claim(self, claim_id: str) -> bool:
+        with self._lock:
+            return claim_id in self._claims
+
+    def claim_ids(self, limit: int = None) -> list:
+        with self._lock:
+            ids = list(self._claims)
+        return ids[:limit] if limit else ids
+
+    def suggest_claim_ids(self, claim_id: str, limit: int = 5) -> list:
+        """
+        Return the existing claim IDs closest to claim_id: case-insensitive prefix
+        matches first, then the smallest edit distance. Answered from memory.
+        """
+        target = str(claim_id).strip().upper()
+        max_distance = max(2, len(target) // 3)
+        ranked = []
+        for candidate in self.claim_ids():
+            normalized = str(candidate).upper()
+            if target and (normalized.startswith(target) or target.startswith(normalized)):
+                ranked.append((0, abs(len(normalized) - len(target)), candidate))
+                continue
+            distance = edit_distance(target, normalized, max_distance)
+            if distance <= max_distance:
+                ranked.append((1, distance, candidate))
+        ranked.sort(key=lambda r: (r[0], r[1], str(r[2])))
+        return [candidate for _, _, candidate in ranked[:limit]]
+
+    def snapshot(self, max_partitions: int = 20) -> dict:
+        """Return the current statistics from memory, without touching Cosmos DB."""
+        with self._lock:
+            # Ranked once per change rather than on every call
+            if self._largest is None or self._largest[0] != max_partitions:
+                largest = heapq.nlargest(max_partitions, self._partitions.items(), key=lambda p: p[1]["bytes"])
+                self._largest = (max_partitions, {str(json.loads(partition)): dict(sizes) for partition, sizes in largest})
+            return {
+                "document_count": len(self._documents),
+                "total_bytes": self._total_bytes,
+                "partition_count": len(self._partitions),
+                "claim_count": len(self._claims),
+                "largest_partitions": dict(self._largest[1]),
+                "as_of": self._updated_at,
+            }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_container_stats(endpoint: str = None, database_name: str = None, container_name: str = None) -> ContainerStatistics:
+    """Return the process-wide statistics for one container, shared by all plugin instances."""
+    scope = container_scope(endpoint, database_name, container_name) if container_name else None
+    with _stats_lock:
+        if scope not in _stats:
+            _stats[scope] = ContainerStatistics(scope)
+        return _stats[scope]
+
+
+def stop_container_stats():
+    """Stop background tailing for every container."""
+    with _stats_lock:
+        stats = list(_stats.values())
+    for container_stats in stats:
+        container_stats.stop()
@@ -0,0 +1,284 @@
+import os
+import time
+import inspect
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .tracing import activate, deactivate, end_span, start_span
+
+# The plugin call (and orchestration run) that Cosmos DB responses are attributed to
+_current_call = ContextVar("cosmos_current_call", default=None)
+_current_run = ContextVar("cosmos_current_run", default=None)
+# Open measure_requests() blocks, innermost last; each one sees every response issued inside it
+_current_meters = ContextVar("cosmos_request_meters", default=())
+
+
+class CallRecord:
+    """Request charge, latency, retries and item counts for one plugin call."""
+
+    def __init__(self, run_id: str, agent: str, function: str):
+        self.run_id = run_id
+        self.agent = agent
+        self.function = function
+        self.requests = 0
+        self.request_charge = 0.0
+        self.server_duration_ms = 0.0
+        self.retries = 0
+        self.item_count = 0
+        self.latency_ms = 0.0
+        self.error = False
+        self._lock = threading.Lock()
+
+    def add_response(self, status_code: int, headers):
+        with self._lock:
+            self.requests += 1
+            self.request_charge += float(headers.get("x-ms-request-charge", 0) or 0)
+            self.server_duration_ms += float(headers.get("x-ms-request-duration-ms", 0) or 0)
+            self.item_count += int(headers.get("x-ms-item-count", 0) or 0)
+            # Throttled (429) and retry-with (449) responses are retried by the SDK
+            if status_code in (429, 449):
+                self.retries += 1
+
+
+class RequestMeter:
+    """RU charge of the Cosmos DB responses received inside one measure_requests() block."""
+
+    def __init__(self):
+        self.requests = 0
+        self.request_charge = 0.0
+        self._lock = threading.Lock()
+
+    def add_response(self, headers):
+        with self._lock:
+            self.requests += 1
+            self.request_charge += float(headers.get("x-ms-request-charge", 0) or 0)
+
+
+@contextmanager
+def measure_requests():
+    """
+    Meter the Cosmos DB requests issued in this context (and tasks or threads started from
+    it with a copy of it) while the block runs. Unlike the client's last_response_headers,
+    concurrent reads on the shared client never see each other's charge.
+    """
+    meter = RequestMeter()
+    token = _current_meters.set(_current_meters.get() + (meter,))
+    try:
+        yield meter
+    finally:
+        _current_meters.reset(token)
+
+
+def record_response(pipeline_response):
+    """
+    raw_response_hook installed on the pooled Cosmos clients: attributes every HTTP
+    response, including retried attempts, to the plugin call and the request meters
+    active in this context.
+    """
+    response = pipeline_response.http_response
+    for meter in _current_meters.get():
+        meter.add_response(response.headers)
+    record = _current_call.get()
+    if record is None:
+        return
+    record.add_response(response.status_code, response.headers)
+
+
+class CosmosMetrics:
+    """
+    Rolls plugin call records up per orchestration run, agent and function, and
+    exports them as OpenTelemetry metrics (no-op unless a MeterProvider is configured).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rollups = {}
+        self._instruments = None
+
+    def _get_instruments(self):
+        if self._instruments is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError:
+                self._instruments = {}
+                return self._instruments
+            meter = metrics.get_meter("insurance.cosmos_plugin")
+            self._instruments = {
+                "calls": meter.create_counter("cosmos.plugin.calls", unit="{call}", description="Cosmos DB plugin calls"),
+                "request_charge": meter.create_histogram("cosmos.plugin.request_charge", unit="RU", description="Request units consumed per plugin call"),
+                "latency": meter.create_histogram("cosmos.plugin.latency", unit="ms", description="Client-observed latency per plugin call"),
+                "server_duration": meter.create_histogram("cosmos.plugin.server_duration", unit="ms", description="Server-side request duration per plugin call"),
+                "retries": meter.create_counter("cosmos.plugin.retries", unit="{retry}", description="Throttling retries"),
+                "items": meter.create_histogram("cosmos.plugin.items", unit="{item}", description="Items returned per plugin call"),
+            }
+        return self._instruments
+
+    def begin_run(self, run_id: str):
+        """
+        Attribute every plugin call made in this context, and in tasks started from it, to run_id.
+        Call before starting the agent runtime so its worker tasks inherit the run. Returns a token for end_run().
+        """
+        return _current_run.set(run_id)
+
+    def end_run(self, token):
+        _current_run.reset(token)
+
+    @contextmanager
+    def run_scope(self, run_id: str):
+        """Context-manager form of begin_run/end_run."""
+        token = self.begin_run(run_id)
+        try:
+            yield run_id
+        finally:
+            self.end_run(token)
+
+    @contextmanager
+    def track(self, agent: str, function: str):
+        """Capture all Cosmos DB responses issued while a plugin call runs, as a metric record and a span."""
+        record = CallRecord(_current_run.get(), agent or "unassigned", function)
+        span = start_span(f"plugin.{function}", {"agent.name": record.agent, "plugin.function": function, "run.id": record.run_id})
+        span_token = activate(span)
+        token = _current_call.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.latency_ms = (time.perf_counter() - start) * 1000
+            _current_call.reset(token)
+            deactivate(span_token)
+            end_span(span, {
+                "db.system": "cosmosdb",
+                "db.cosmosdb.request_charge": record.request_charge,
+                "db.cosmosdb.requests": record.requests,
+                "db.cosmosdb.server_duration_ms": record.server_duration_ms,
+                "db.cosmosdb.retries": record.retries,
+                "db.cosmosdb.item_count": record.item_count,
+            }, error="plugin returned an error" if record.error else None)
+            self._add(record)
+
+    def _add(self, record: CallRecord):
+        with self._lock:
+            rollup = self._rollups.setdefault((record.run_id, record.agent, record.function), {
+                "calls": 0, "errors": 0, "requests": 0, "request_charge": 0.0,
+                "latency_ms": 0.0, "max_latency_ms": 0.0, "server_duration_ms": 0.0,
+                "retries": 0, "items": 0,
+            })
+            rollup["calls"] += 1
+            rollup["errors"] += int(record.error)
+            rollup["requests"] += record.requests
+            rollup["request_charge"] += record.request_charge
+            rollup["latency_ms"] += record.latency_ms
+            rollup["max_latency_ms"] = max(rollup["max_latency_ms"], record.latency_ms)
+            rollup["server_duration_ms"] += record.server_duration_ms
+            rollup["retries"] += record.retries
+            rollup["items"] += record.item_count
+
+        instruments = self._get_instruments()
+        if instruments:
+            attributes = {"agent": record.agent, "function": record.function, "error": record.error}
+            instruments["calls"].add(1, attributes)
+            instruments["request_charge"].record(record.request_charge, attributes)
+            instruments["latency"].record(record.latency_ms, attributes)
+            instruments["server_duration"].record(record.server_duration_ms, attributes)
+            instruments["retries"].add(record.retries, attributes)
+            instruments["items"].record(record.item_count, attributes)
+
+    def summary(self, run_id: str = None) -> dict:
+        """Return {agent: {function: rollup}} for one run (or calls made outside any run)."""
+        result = {}
+        with self._lock:
+            for (rollup_run, agent, function), rollup in self._rollups.items():
+                if rollup_run != run_id:
+                    continue
+                entry = dict(rollup)
+                entry["avg_latency_ms"] = round(entry["latency_ms"] / entry["calls"], 1)
+                entry["request_charge"] = round(entry["request_charge"], 2)
+                result.setdefault(agent, {})[function] = entry
+        return result
+
+    def pop_run(self, run_id: str) -> dict:
+        """Return a run's summary and forget it, so long-running processes stay bounded."""
+        summary = self.summary(run_id)
+        with self._lock:
+            for key in [key for key in self._rollups if key[0] == run_id]:
+                del self._rollups[key]
+        return summary
+
+    @staticmethod
+    def format_summary(summary: dict) -> str:
+        """Render a run summary as a cost/latency table."""
+        lines = [f"{'agent':<16} {'function':<28} {'calls':>5} {'errors':>6} {'RU':>8} {'avg ms':>8} {'max ms':>8} {'server ms':>9} {'retries':>7} {'items':>6}"]
+        total_ru = 0.0
+        total_calls = 0
+        for agent, functions in sorted(summary.items()):
+            for function, s in sorted(functions.items()):
+                lines.append(
+                    f"{agent:<16} {function:<28} {s['calls']:>5} {s['errors']:>6} {s['request_charge']:>8.2f} {s['avg_latency_ms']:>8.1f} "
+                    f"{s['max_latency_ms']:>8.1f} {s['server_duration_ms']:>9.1f} {s['retries']:>7} {s['items']:>6}"
+                )
+                total_ru += s["request_charge"]
+                total_calls += s["calls"]
+        lines.append(f"{'total':<16} {'':<28} {total_calls:>5} {'':>6} {total_ru:>8.2f}")
+        return "\n".join(lines)
+
+
+def instrumented(function):
+    """
+    Wrap a plugin kernel function so each call is tracked under the plugin's agent_name.
+    Place it below @kernel_function; functools.wraps keeps the signature Semantic Kernel reads.
+    """
+    name = function.__name__
+
+    def failed(result) -> bool:
+        # Plugin functions report failures as "❌ ..." strings rather than raising
+        return isinstance(result, str) and result.startswith("❌")
+
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_wrapper(self, *args, **kwargs):
+            with self.metrics.track(self.agent_name, name) as record:
+                result = await function(self, *args, **kwargs)
+                record.error = failed(result)
+                return result
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        with self.metrics.track(self.agent_name, name) as record:
+            result = function(self, *args, **kwargs)
+            record.error = failed(result)
+            return result
+    return wrapper
+
+
+def configure_metrics_export():
+    """
+    Install an OpenTelemetry MeterProvider when COSMOS_METRICS_EXPORT=console is set.
+    Processes that already configure OpenTelemetry keep their own provider.
+    """
+    if os.environ.get("COSMOS_METRICS_EXPORT", "").lower() != "console":
+        return
+    try:
+        from opentelemetry import metrics
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import ConsoleMetricExporter, PeriodicExportingMetricReader
+    except ImportError:
+        print("⚠️ opentelemetry-sdk not installed; Cosmos DB metrics export disabled")
+        return
+    reader = PeriodicExportingMetricReader(ConsoleMetricExporter(), export_interval_millis=60000)
+    metrics.set_meter_provider(MeterProvider(metric_readers=[reader]))
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_cosmos_metrics() -> CosmosMetrics:
+    """Return the process-wide Cosmos DB plugin metrics collector."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = CosmosMetrics()
+        return _metrics
@@ -0,0 +1,272 @@
+import os
+import atexit
+import asyncio
+import threading
+
+from .cosmos_metrics import record_response
+
+
+class CosmosClientPool:
+    """
+    Process-wide cache of Cosmos DB clients and container proxies.
+    Every CosmosDBPlugin instance shares the same pool, so TLS sessions, account
+    metadata and partition-key-range maps are fetched once per process instead of once per tool call.
+    """
+
+    def __init__(self, pool_maxsize: int = None):
+        self.pool_maxsize = pool_maxsize or int(os.environ.get("COSMOS_POOL_MAXSIZE", "20"))
+        self._lock = threading.Lock()
+        # Responses are counted from the clients' hook, which can fire while _lock is held
+        self._counts_lock = threading.Lock()
+        self._clients = {}
+        self._sessions = {}
+        self._containers = {}
+        self._stats = {
+            "clients_created": 0,
+            "client_reuses": 0,
+            "containers_created": 0,
+            "container_reuses": 0,
+            "responses": 0,
+            "throttled_responses": 0,
+        }
+
+    def _create_client(self, endpoint: str, key: str):
+        """Create a Cosmos DB client backed by a pooled HTTP session."""
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from azure.core.pipeline.transport import RequestsTransport
+            from azure.cosmos import CosmosClient
+        except ImportError:
+            raise ImportError("azure-cosmos package not installed. Run: pip install azure-cosmos")
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_maxsize, pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        transport = RequestsTransport(session=session, session_owner=False)
+        return CosmosClient(endpoint, key, transport=transport, raw_response_hook=self._record_response), session
+
+    def _record_response(self, pipeline_response):
+        """raw_response_hook: count the response for the pool, then attribute it to the active plugin call."""
+        with self._counts_lock:
+            self._stats["responses"] += 1
+            if pipeline_response.http_response.status_code == 429:
+                self._stats["throttled_responses"] += 1
+        record_response(pipeline_response)
+
+    def get_client(self, endpoint: str, key: str):
+        """Return the shared client for this account, creating it on first use."""
+        if not endpoint or not key:
+            raise Exception("Cosmos DB endpoint and key must be configured. Please set COSMOS_ENDPOINT and COSMOS_KEY environment variables.")
+
+        with self._lock:
+            client = self._clients.get((endpoint, key))
+            if client is not None:
+                self._stats["client_reuses"] += 1
+                return client
+
+            try:
+                client, session = self._create_client(endpoint, key)
+            except ImportError:
+                raise
+            except Exception as e:
+                raise Exception(f"Failed to create Cosmos DB client: {str(e)}")
+
+            self._clients[(endpoint, key)] = client
+            self._sessions[(endpoint, key)] = session
+            self._stats["clients_created"] += 1
+            return client
+
+    def get_container(self, endpoint: str, key: str, database_name: str, container_name: str):
+        """Return the shared container proxy, resolving database and container only once."""
+        cache_key = (endpoint, key, database_name, container_name)
+        with self._lock:
+            container = self._containers.get(cache_key)
+            if container is not None:
+                self._stats["container_reuses"] += 1
+                return container
+
+        client = self.get_client(endpoint, key)
+        container = client.get_database_client(database_name).get_container_client(container_name)
+
+        with self._lock:
+            # Another thread may have resolved the same proxy meanwhile; keep the first one
+            if cache_key in self._containers:
+                self._stats["container_reuses"] += 1
+                return self._containers[cache_key]
+            self._containers[cache_key] = container
+            self._stats["containers_created"] += 1
+            return container
+
+    def stats(self) -> dict:
+        """Return pool statistics so callers can confirm clients are being reused."""
+        with self._lock, self._counts_lock:
+            return {
+                **self._stats,
+                "active_clients": len(self._clients),
+                "cached_containers": len(self._containers),
+                "http_pool_maxsize": self.pool_maxsize,
+            }
+
+    def close(self):
+        """Close every pooled client and HTTP session."""
+        with self._lock:
+            for client in self._clients.values():
+                try:
+                    client.close()
+                except Exception:
+                    pass
+            for session in self._sessions.values():
+                session.close()
+            self._clients.clear()
+            self._sessions.clear()
+            self._containers.clear()
+
+
+class AsyncCosmosClientPool:
+    """
+    asyncio counterpart of CosmosClientPool built on azure.cosmos.aio.
+    aio clients are bound to the event loop that created them, so the pool must be
+    used and closed from a single loop (the orchestration's loop).
+    """
+
+    def __init__(self, pool_maxsize: int = None):
+        self.pool_maxsize = pool_maxsize or int(os.environ.get("COSMOS_POOL_MAXSIZE", "20"))
+        self._lock = asyncio.Lock()
+        self._clients = {}
+        self._sessions = {}
+        self._containers = {}
+        self._stats = {
+            "clients_created": 0,
+            "client_reuses": 0,
+            "containers_created": 0,
+            "container_reuses": 0,
+            "responses": 0,
+            "throttled_responses": 0,
+        }
+
+    def _create_client(self, endpoint: str, key: str):
+        """Create an aio Cosmos DB client backed by a pooled aiohttp session."""
+        try:
+            import aiohttp
+            from azure.core.pipeline.transport import AioHttpTransport
+            from azure.cosmos.aio import CosmosClient
+        except ImportError:
+            raise ImportError("azure-cosmos package not installed. Run: pip install azure-cosmos aiohttp")
+
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_maxsize))
+        transport = AioHttpTransport(session=session, session_owner=False)
+        return CosmosClient(endpoint, key, transport=transport, raw_response_hook=self._record_response), session
+
+    def _record_response(self, pipeline_response):
+        """raw_response_hook: count the response for the pool, then attribute it to the active plugin call."""
+        self._stats["responses"] += 1
+        if pipeline_response.http_response.status_code == 429:
+            self._stats["throttled_responses"] += 1
+        record_response(pipeline_response)
+
+    async def get_client(self, endpoint: str, key: str):
+        """Return the shared aio client for this account, creating it on first use."""
+        if not endpoint or not key:
+            raise Exception("Cosmos DB endpoint and key must be configured. Please set COSMOS_ENDPOINT and COSMOS_KEY environment variables.")
+
+        async with self._lock:
+            client = self._clients.get((endpoint, key))
+            if client is not None:
+                self._stats["client_reuses"] += 1
+                return client
+
+            try:
+                client, session = self._create_client(endpoint, key)
+            except ImportError:
+                raise
+            except Exception as e:
+                raise Exception(f"Failed to create Cosmos DB client: {str(e)}")
+
+            self._clients[(endpoint, key)] = client
+            self._sessions[(endpoint, key)] = session
+            self._stats["clients_created"] += 1
+            return client
+
+    async def get_container(self, endpoint: str, key: str, database_name: str, container_name: str):
+        """Return the shared aio container proxy, resolving database and container only once."""
+        cache_key = (endpoint, key, database_name, container_name)
+        container = self._containers.get(cache_key)
+        if container is not None:
+            self._stats["container_reuses"] += 1
+            return container
+
+        client = await self.get_client(endpoint, key)
+        # Another task may have resolved the same proxy while we awaited the client
+        if cache_key in self._containers:
+            self._stats["container_reuses"] += 1
+            return self._containers[cache_key]
+        container = client.get_database_client(database_name).get_container_client(container_name)
+        self._containers[cache_key] = container
+        self._stats["containers_created"] += 1
+        return container
+
+    def stats(self) -> dict:
+        """Return pool statistics so callers can confirm clients are being reused."""
+        return {
+            **self._stats,
+            "active_clients": len(self._clients),
+            "cached_containers": len(self._containers),
+            "http_pool_maxsize": self.pool_maxsize,
+        }
+
+    async def close(self):
+        """Close every pooled aio client and HTTP session."""
+        for client in self._clients.values():
+            try:
+                await client.close()
+            except Exception:
+                pass
+        for session in self._sessions.values():
+            await session.close()
+        self._clients.clear()
+        self._sessions.clear()
+        self._containers.clear()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_async_pool = None
+
+
+def get_cosmos_pool() -> CosmosClientPool:
+    """Return the process-wide Cosmos DB client pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CosmosClientPool()
+        return _pool
+
+
+def close_cosmos_pool():
+    """Close the process-wide pool; a later get_cosmos_pool() call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_async_cosmos_pool() -> AsyncCosmosClientPool:
+    """Return the process-wide aio Cosmos DB client pool."""
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncCosmosClientPool()
+    return _async_pool
+
+
+async def close_async_cosmos_pool():
+    """Close the process-wide aio pool; must run on the loop that used it."""
+    global _async_pool
+    if _async_pool is not None:
+        pool, _async_pool = _async_pool, None
+        await pool.close()
+
+
+atexit.register(close_cosmos_pool)
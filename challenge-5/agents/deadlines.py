@@ -0,0 +1,228 @@
+import os
+import time
+import asyncio
+
+from .tracing import ClientOverlay
+
+DEFAULT_AGENT_DEADLINE = float(os.environ.get("AGENT_DEADLINE_SECONDS", "300"))
+
+
+def agent_deadlines(names: list, overrides: dict = None) -> dict:
+    """
+    Per-agent deadlines in seconds: AGENT_DEADLINE_SECONDS for everyone, refined by
+    AGENT_DEADLINES ("PolicyChecker=120,RiskAnalyzer=90") and then by overrides.
+    """
+    deadlines = {name: DEFAULT_AGENT_DEADLINE for name in names}
+    for item in os.environ.get("AGENT_DEADLINES", "").split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() in deadlines and seconds.strip():
+            deadlines[name.strip()] = float(seconds)
+    deadlines.update({name: float(seconds) for name, seconds in (overrides or {}).items() if name in deadlines})
+    return deadlines
+
+
+def token_usage(message) -> dict:
+    """Token usage reported on an agent's response message (run-level usage for Azure AI agents), if any."""
+    usage = (getattr(message, "metadata", None) or {}).get("usage")
+    if usage is None:
+        return None
+    if not isinstance(usage, dict):
+        usage = {key: getattr(usage, key, None) for key in ("prompt_tokens", "completion_tokens", "total_tokens")}
+    return {key: usage.get(key) for key in ("prompt_tokens", "completion_tokens", "total_tokens") if usage.get(key) is not None}
+
+
+def is_final_answer(message) -> bool:
+    """
+    agent_response_callback also receives intermediate tool-call and tool-result messages
+    (including server-side Azure AI Search calls); only a plain assistant answer is final.
+    """
+    if getattr(message, "role", None) == "tool":
+        return False
+    return not any(type(item).__name__ in ("FunctionCallContent", "FunctionResultContent") for item in getattr(message, "items", None) or [])
+
+
+class MemberRuns:
+    """
+    The Azure agent run and runtime task of each orchestration member, so a member that is
+    given up on is actually stopped: its run is cancelled server-side (Semantic Kernel's poll
+    loop then ends on the cancelled status) and its message handler task is cancelled,
+    instead of both running on in the background. track() returns a copy of the member that
+    records the task invoking it and, for agents with a client, every run it creates.
+    """
+
+    def __init__(self):
+        self._runs = {}
+        self._tasks = {}
+        self._cancelled = set()
+
+    def track(self, agent):
+        client = getattr(agent, "client", None)
+        tracked = agent
+        if client is not None:
+            runs = client.agents.runs
+
+            async def create(*args, **kwargs):
+                run = await runs.create(*args, **kwargs)
+                self._runs[agent.name] = (client, kwargs.get("thread_id") or run.thread_id, run.id)
+                return run
+
+            tracked = agent.model_copy(update={"client": ClientOverlay(client, agents=ClientOverlay(client.agents, runs=ClientOverlay(runs, create=create)))})
+        else:
+            tracked = agent.model_copy()
+        invoke_stream = tracked.invoke_stream
+
+        async def tracked_invoke_stream(*args, **kwargs):
+            # The orchestration's actor streams every member from that member's handler task
+            self._tasks[agent.name] = asyncio.current_task()
+            async for item in invoke_stream(*args, **kwargs):
+                yield item
+
+        # Not a model field: set on the instance so the copy, and only the copy, is wrapped
+        object.__setattr__(tracked, "invoke_stream", tracked_invoke_stream)
+        return tracked
+
+    async def cancel(self, name: str):
+        """Cancel the member's handler task and current run, if it has started them."""
+        task = self._tasks.pop(name, None)
+        if task is not None and task is not asyncio.current_task() and not task.done():
+            task.cancel()
+            self._cancelled.add(task)
+        client, thread_id, run_id = self._runs.pop(name, (None, None, None))
+        if run_id is None:
+            return
+        try:
+            await client.agents.runs.cancel(thread_id=thread_id, run_id=run_id)
+            print(f"🛑 Cancelled run {run_id} of {name}")
+        except Exception as e:
+            # Typically the run reached a terminal state in the meantime
+            print(f"⚠️ Could not cancel run {run_id} of {name}: {str(e)}")
+
+    async def settle(self, timeout: float = 1):
+        """Wait (bounded) for cancelled handler tasks to unwind."""
+        tasks = [task for task in self._cancelled if not task.done()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+        self._cancelled.clear()
+
+
+class MemberResultCollector:
+    """
+    Collects each orchestration member's answer as it arrives (via the orchestration's
+    agent_response_callback) and enforces a deadline per member. Members that miss their
+    deadline are marked timed_out, members still running when the orchestration fails are
+    marked failed, and the orchestration is cancelled once nothing is left worth waiting for,
+    so the answers that did arrive are returned as a partial result. With runs (MemberRuns),
+    a member's run and task are cancelled as soon as it is given up on. Deadlines count from start(),
+    which the caller invokes right before orchestration.invoke.
+    """
+
+    def __init__(self, names: list, deadlines: dict, runs: MemberRuns = None):
+        self.names = list(names)
+        self.deadlines = deadlines
+        self.runs = runs
+        self.results = {
+            name: {"name": name, "status": "pending", "content": None, "latency_s": None, "deadline_s": deadlines[name], "usage": None, "error": None}
+            for name in self.names
+        }
+        self._arrived = asyncio.Event()
+        self._started = None
+        self.gave_up = False
+
+    def start(self):
+        """Start every member's deadline clock."""
+        self._started = time.perf_counter()
+
+    def on_response(self, message):
+        """agent_response_callback for ConcurrentOrchestration."""
+        for item in message if isinstance(message, list) else [message]:
+            result = self.results.get(getattr(item, "name", None))
+            # Answers arriving after the member was given up on are ignored
+            if result is None or result["status"] != "pending" or not is_final_answer(item):
+                continue
+            result.update(
+                status="completed",
+                content=str(item.content),
+                latency_s=round(time.perf_counter() - self._started, 2),
+                usage=token_usage(item),
+            )
+        self._arrived.set()
+
+    def _pending(self) -> list:
+        return [name for name in self.names if self.results[name]["status"] == "pending"]
+
+    async def stream(self, orchestration_result):
+        """
+        Yield each member's result as soon as it is final (completed, timed_out or failed).
+        Closing the generator early (aclose()) cancels the orchestration and marks the
+        members still running as cancelled.
+        """
+        if self._started is None:
+            self.start()
+        waiter = asyncio.ensure_future(orchestration_result.get())
+        emitted = set()
+        try:
+            while True:
+                elapsed = time.perf_counter() - self._started
+                for name in self._pending():
+                    if elapsed >= self.deadlines[name]:
+                        self.results[name].update(status="timed_out", error=f"No answer within {self.deadlines[name]:g}s")
+                        # Stop the member now, not when the slowest member is done
+                        await self._stop_member(name)
+                for name in self.names:
+                    if self.results[name]["status"] != "pending" and name not in emitted:
+                        emitted.add(name)
+                        yield self.results[name]
+                pending = self._pending()
+                if not pending or waiter.done():
+                    break
+
+                self._arrived.clear()
+                arrived = asyncio.ensure_future(self._arrived.wait())
+                next_deadline = min(self.deadlines[name] for name in pending) - elapsed
+                await asyncio.wait({waiter, arrived}, timeout=max(next_deadline, 0), return_when=asyncio.FIRST_COMPLETED)
+                arrived.cancel()
+
+            if waiter.done() and not waiter.cancelled():
+                if waiter.exception() is not None:
+                    for name in self._pending():
+                        self.results[name].update(status="failed", error=str(waiter.exception()))
+                        await self._stop_member(name)
+                else:
+                    # Normally every answer came through the callback already; this fills any gap
+                    self.on_response(waiter.result())
+            # The orchestration finished without a callback for some member
+            for name in self._pending():
+                self.results[name].update(status="failed", error="Finished without an answer")
+                await self._stop_member(name)
+            for name in self.names:
+                if name not in emitted:
+                    emitted.add(name)
+                    yield self.results[name]
+        finally:
+            # Members still pending here were abandoned by a caller that closed the stream
+            for name in self._pending():
+                self.results[name].update(status="cancelled", error="Stream closed before an answer")
+            if not waiter.done() and not any(r["status"] in ("timed_out", "cancelled") for r in self.results.values()):
+                # Every member answered; the orchestration result follows right behind
+                await asyncio.wait({waiter}, timeout=1)
+            if not waiter.done():
+                # Stragglers past their deadline or abandoned: stop the orchestration instead of waiting them out
+                self.gave_up = True
+                try:
+                    orchestration_result.cancel()
+                except RuntimeError:
+                    pass
+                waiter.cancel()
+            for name in self.names:
+                if self.results[name]["status"] == "cancelled":
+                    await self._stop_member(name)
+
+    async def _stop_member(self, name: str):
+        if self.runs is not None:
+            await self.runs.cancel(name)
+
+    async def wait(self, orchestration_result) -> list:
+        """Wait until every member answered, missed its deadline or failed; return results in member order."""
+        async for _ in self.stream(orchestration_result):
+            pass
+        return [self.results[name] for name in self.names]
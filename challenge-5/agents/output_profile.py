@@ -0,0 +1,136 @@
+import os
+import json
+
+# Cosmos DB system properties that carry no meaning for the agents
+SYSTEM_PROPERTIES = ("_rid", "_self", "_etag", "_attachments", "_ts")
+
+# Rough prompt-token estimate for JSON text; good enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+class OutputProfile:
+    """
+    Controls how plugin results are serialized for the model.
+    The verbose profile keeps the original pretty-printed output; the compact profile
+    strips system properties, minifies JSON and truncates to a per-call token budget.
+    An optional field list is pushed down to Cosmos DB as a SELECT projection.
+    """
+
+    def __init__(self, fields: list = None, strip_system_properties: bool = True, minify: bool = True, max_tokens: int = None):
+        self.fields = list(fields) if fields else None
+        self.strip_system_properties = strip_system_properties
+        self.minify = minify
+        self.max_tokens = max_tokens
+
+    @classmethod
+    def verbose(cls):
+        """Original output: every property, pretty-printed, no budget."""
+        return cls(strip_system_properties=False, minify=False)
+
+    @classmethod
+    def compact(cls, fields: list = None, max_tokens: int = None):
+        """Token-lean output for agent tool calls."""
+        return cls(fields=fields, max_tokens=max_tokens or int(os.environ.get("COSMOS_OUTPUT_MAX_TOKENS", "4000")))
+
+    @classmethod
+    def from_env(cls):
+        """Build a profile from COSMOS_OUTPUT_PROFILE (verbose|compact) and COSMOS_OUTPUT_FIELDS."""
+        fields = [f.strip() for f in os.environ.get("COSMOS_OUTPUT_FIELDS", "").split(",") if f.strip()]
+        if os.environ.get("COSMOS_OUTPUT_PROFILE", "verbose").lower() == "compact":
+            return cls.compact(fields=fields)
+        return cls(fields=fields, strip_system_properties=False, minify=False) if fields else cls.verbose()
+
+    def select_clause(self, alias: str = "c", top: int = None) -> str:
+        """SELECT list to push the field projection down to Cosmos DB."""
+        select = f"SELECT TOP {top}" if top else "SELECT"
+        if not self.fields:
+            return f"{select} *"
+        return f"{select} " + ", ".join(f"{alias}.{field}" for field in self.fields)
+
+    def project(self, document: dict) -> dict:
+        """Apply the field projection client-side, for point reads and cached documents."""
+        if not self.fields or not isinstance(document, dict):
+            return document
+        projected = {}
+        for field in self.fields:
+            value = document
+            for part in field.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            if value is not None:
+                # Same naming Cosmos DB uses for projected nested paths
+                projected[field.split(".")[-1]] = value
+        return projected
+
+    def _strip(self, value):
+        if isinstance(value, dict):
+            return {k: self._strip(v) for k, v in value.items() if k not in SYSTEM_PROPERTIES}
+        if isinstance(value, list):
+            return [self._strip(v) for v in value]
+        return value
+
+    def _dumps(self, payload) -> str:
+        if self.minify:
+            return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+        return json.dumps(payload, indent=2, ensure_ascii=False)
+
+    def _shorten_strings(self, value, max_chars: int):
+        if isinstance(value, dict):
+            return {k: self._shorten_strings(v, max_chars) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._shorten_strings(v, max_chars) for v in value]
+        if isinstance(value, str) and len(value) > max_chars:
+            return value[:max_chars] + "…"
+        return value
+
+    def render(self, payload, items_key: str = None) -> str:
+        """
+        Serialize a result for the model. When over the token budget, long strings are
+        shortened first, then trailing items of payload[items_key] are dropped (never the
+        first: its strings are shortened further instead), and the result is marked with
+        "truncated": true.
+        """
+        return self._fit(payload, items_key)[0]
+
+    def fitting_items(self, payload: dict, items_key: str) -> int:
+        """How many of payload[items_key] render() keeps within the token budget."""
+        return len(payload[items_key]) - self._fit(payload, items_key)[1]
+
+    def _fit(self, payload, items_key: str = None) -> tuple:
+        """render() as (text, number of trailing items dropped)."""
+        if self.strip_system_properties:
+            payload = self._strip(payload)
+
+        text = self._dumps(payload)
+        if not self.max_tokens:
+            return text, 0
+        budget = self.max_tokens * CHARS_PER_TOKEN
+        if len(text) <= budget:
+            return text, 0
+
+        if not isinstance(payload, dict):
+            payload, items_key = {"results": payload}, "results"
+
+        truncated = payload
+        max_chars = 2000
+        while len(text) > budget and max_chars >= 100:
+            truncated = {**self._shorten_strings(payload, max_chars), "truncated": True}
+            text = self._dumps(truncated)
+            max_chars //= 2
+
+        omitted = 0
+        if len(text) > budget and items_key and isinstance(truncated.get(items_key), list):
+            items = truncated[items_key]
+            while len(text) > budget and len(items) > 1:
+                items = items[:-1]
+                omitted += 1
+                truncated = {**truncated, items_key: items, "omitted_items": omitted}
+                if "count" in truncated:
+                    truncated["count"] = len(items)
+                text = self._dumps(truncated)
+            # One item over budget on its own: shorten its strings further rather than drop it
+            max_chars = 50
+            while len(text) > budget and items and max_chars >= 10:
+                truncated = {**truncated, items_key: self._shorten_strings(items, max_chars)}
+                text = self._dumps(truncated)
+                max_chars //= 2
+        return text, omitted
@@ -0,0 +1,94 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("COSMOS_QUERY_PAGE_SIZE", "20"))
+MAX_PAGE_SIZE = 100
+# Same length as the page tokens QueryCursorStore hands out, for sizing a page before its cursor exists
+PAGE_TOKEN_PLACEHOLDER = "page-" + "0" * 12
+
+
+def clamp_page_size(page_size: int = None) -> int:
+    """Keep agent-requested page sizes within bounds."""
+    return max(1, min(page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+class QueryCursorStore:
+    """
+    Server-side store for Cosmos DB continuation tokens.
+    Raw continuation tokens can be kilobytes of JSON, so agents get a short opaque
+    page token instead and hand it back to next_page() to continue the same query.
+    """
+
+    def __init__(self, max_cursors: int = 256, ttl_seconds: float = 900):
+        self.max_cursors = max_cursors
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._cursors = OrderedDict()
+
+    def save(self, continuation: str, query: str, parameters: list, page_size: int, context: dict, items_key: str, skip: int = 0) -> str:
+        """
+        Remember where a query stopped and return the page token for its next page. skip
+        counts the items of the page at continuation that were already returned.
+        """
+        token = f"page-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._cursors[token] = {
+                "continuation": continuation,
+                "query": query,
+                "parameters": parameters,
+                "page_size": page_size,
+                "context": context,
+                "items_key": items_key,
+                "skip": skip,
+                "created_at": time.monotonic(),
+            }
+            while len(self._cursors) > self.max_cursors:
+                self._cursors.popitem(last=False)
+        return token
+
+    def get(self, token: str):
+        """Return the cursor for a page token, or None if it is unknown or expired."""
+        with self._lock:
+            cursor = self._cursors.get(token)
+            if cursor is None:
+                return None
+            if time.monotonic() - cursor["created_at"] > self.ttl_seconds:
+                del self._cursors[token]
+                return None
+            return cursor
+
+
+def page_result(context: dict, items_key: str, items: list, page_size: int, next_page_token: str = None) -> dict:
+    """Build the JSON payload returned to the agent for one page of results."""
+    return {
+        **context,
+        "count": len(items),
+        "page_size": page_size,
+        items_key: items,
+        "has_more": next_page_token is not None,
+        "next_page_token": next_page_token,
+    }
+
+
+def fitting_items(output, context: dict, items_key: str, items: list, page_size: int) -> int:
+    """
+    How many items one page can return within the output profile's token budget; render()
+    never drops the first item, so this is at least one for a non-empty page. Pages are cut
+    before their cursor is saved, so the next page starts at the first item left out
+    rather than past it.
+    """
+    return output.fitting_items(page_result(context, items_key, items, page_size, PAGE_TOKEN_PLACEHOLDER), items_key)
+
+
+_cursors = None
+
+
+def get_cursor_store() -> QueryCursorStore:
+    """Return the process-wide cursor store shared by all plugin instances."""
+    global _cursors
+    if _cursors is None:
+        _cursors = QueryCursorStore()
+    return _cursors
@@ -1,115 +1,204 @@
 import os
+import time
+import threading
 from typing import Annotated
-from azure.identity import DefaultAzureCredential
-from azure.ai.projects import AIProjectClient
-from azure.ai.agents.models import AzureAISearchQueryType, AzureAISearchTool, ListSortOrder, MessageRole
+from azure.ai.agents.models import ListSortOrder, MessageRole
 from semantic_kernel.functions import kernel_function
-from semantic_kernel.agents import AzureAIAgent
 from dotenv import load_dotenv
 
+from .agent_threads import AgentThreadPool, run_options
+from .policy_definition import (
+    PENDING_RUN_STATES,
+    POLICY_CHECKER_INSTRUCTIONS,
+    POLICY_CHECKER_MODEL,
+    POLICY_CHECKER_NAME,
+    agent_reply,
+    policy_checker_name,
+    policy_search_mode,
+    policy_search_tool,
+    tool_outputs,
+)
+from .run_polling import run_polling_options
+
 load_dotenv()
 
 class PolicyCheckerWrapper:
-    """Wrapper to make Azure AI Agent Service agent work with Semantic Kernel orchestration"""
+    """
+    Wrapper to make Azure AI Agent Service agent work with Semantic Kernel orchestration.
+    Construction is free: the credential, client and agent are set up on first use (or by
+    setup_agent()), and an unchanged agent is reused rather than created again.
+    Independent questions go through the semantic answer cache first (see semantic_cache.py).
+    """
     
-    def __init__(self):
+    def __init__(self, polling_options=None, use_cache: bool = None, answer_cache=None, search_mode: str = None):
         self.project_client = None
         self.agent = None
-        self.setup_agent()
+        self.threads = None
+        self.startup_s = None
+        self._setup_lock = threading.Lock()
+        # Adaptive run polling (see run_polling.py) instead of create_and_process's fixed one-second interval
+        self.polling_options = polling_options or run_polling_options(POLICY_CHECKER_NAME)
+        # The semantic answer cache (numpy) is resolved on the first independent question
+        self.answers = answer_cache
+        self._use_cache = True if answer_cache is not None else use_cache
+        # "remote": Azure AI Search tool run by the service; "local": in-process index (policy_search.py)
+        self.search_mode = policy_search_mode(search_mode)
+        self.search_tool = None
     
     def setup_agent(self):
-        """Initialize the Azure AI Agent Service policy checker"""
-        # Load environment variables
-        project_endpoint = os.environ.get("AI_FOUNDRY_PROJECT_ENDPOINT")
-        model_deployment_name = "gpt-4.1-mini"
-        sc_connection_id = os.environ.get("AZURE_AI_CONNECTION_ID")
-        
-        self.project_client = AIProjectClient(
-            endpoint=project_endpoint,
-            credential=DefaultAzureCredential(exclude_interactive_browser_credential=False),
-        )
-        
-        # Initialize the Azure AI Search tool
-        ai_search = AzureAISearchTool(
-            index_connection_id=sc_connection_id,
-            index_name="insurance-documents-index",
-            query_type=AzureAISearchQueryType.SIMPLE,
-            top_k=3,
-            filter="",
-        )
-        
-        # Create the agent
-        self.agent = self.project_client.agents.create_agent(
-            model=model_deployment_name,
-            name="policy-checker-wrapper",
-            instructions="""
-            You are an expert Insurance Policy Checker Agent specialized in analyzing auto insurance policies and validating claim coverage. Your primary responsibilities include:
-
-            **Core Functions:**
-            - Analyze insurance policy documents to determine coverage details
-            - Validate if specific claims are covered under policy terms
-            - Explain policy limits, deductibles, and exclusions
-            - Identify coverage gaps or restrictions
-            - Provide clear explanations of policy benefits
-
-            **Policy Types You Handle:**
-            - Commercial Auto Policies
-            - Comprehensive Auto Policies  
-            - High Value Vehicle Policies
-            - Liability Only Policies
-            - Motorcycle Policies
-
-            **Response Format:**
-            - Start with a clear coverage determination (COVERED/NOT COVERED/PARTIAL COVERAGE)
-            - Provide the specific policy section reference
-            - Explain coverage limits and deductibles
-            - List any relevant exclusions or conditions
-            - Suggest next steps if coverage issues exist
-            - Everything in a clear, concise manner in one paragraph.
-
-            **Tone:** Professional, accurate, and helpful. Always be thorough in your analysis while remaining clear and concise.
-            """,
-            tools=ai_search.definitions,
-            tool_resources=ai_search.resources,
-        )
+        """Initialize the Azure AI Agent Service policy checker once; safe to call from several threads"""
+        if self.agent is not None:
+            return
+        with self._setup_lock:
+            if self.agent is not None:
+                return
+            start = time.perf_counter()
+            # Imported here so importing this module stays cheap
+            from azure.identity import DefaultAzureCredential
+            from azure.ai.projects import AIProjectClient
+            from .agent_registry import get_agent_registry
+            
+            # Load environment variables
+            project_endpoint = os.environ.get("AI_FOUNDRY_PROJECT_ENDPOINT")
+            
+            self.project_client = AIProjectClient(
+                endpoint=project_endpoint,
+                credential=DefaultAzureCredential(exclude_interactive_browser_credential=False),
+            )
+            
+            # Threads are pooled: reused across independent queries, pinned for conversations
+            self.threads = AgentThreadPool(self.project_client.agents)
+            
+            # Initialize the Azure AI Search tool
+            self.search_tool = policy_search_tool(self.search_mode)
+            
+            # Reuse the registered (or same-named, same-definition) agent; create it only if none exists
+            self.agent = get_agent_registry().get_or_create_sync(
+                self.project_client,
+                project_endpoint,
+                model=POLICY_CHECKER_MODEL,
+                name=policy_checker_name(self.search_mode),
+                instructions=POLICY_CHECKER_INSTRUCTIONS,
+                tools=self.search_tool.definitions,
+                tool_resources=self.search_tool.resources,
+            )
+            self.startup_s = time.perf_counter() - start
+            print(f"✅ Policy checker ready in {self.startup_s:.2f}s")
     
     @kernel_function(description="Check insurance policy coverage and validate claims")
-    def check_policy_coverage(self, query: Annotated[str, "Query about policy coverage or claim validation"]) -> Annotated[str, "Policy coverage analysis result"]:
+    def check_policy_coverage(
+        self,
+        query: Annotated[str, "Query about policy coverage or claim validation"],
+        conversation_id: Annotated[str, "Optional id tying follow-up questions to an earlier one"] = None,
+    ) -> Annotated[str, "Policy coverage analysis result"]:
         """Check policy coverage using the Azure AI Agent Service agent"""
-        
-        # Create a thread for communication with the agent
-        thread = self.project_client.agents.threads.create()
-        
-        # Send a message to the thread
-        message = self.project_client.agents.messages.create(
-            thread_id=thread.id,
-            role=MessageRole.USER,
-            content=query,
-        )
-        
-        # Create and process an agent run
-        run = self.project_client.agents.runs.create_and_process(
-            thread_id=thread.id, 
-            agent_id=self.agent.id
-        )
-        
-        if run.status == "failed":
-            return f"Policy check failed: {run.last_error}"
-        
-        # Get the agent's response
-        messages = self.project_client.agents.messages.list(
-            thread_id=thread.id, 
-            order=ListSortOrder.ASCENDING
-        )
-        
-        for message in messages:
-            if message.role == MessageRole.AGENT:
-                if message.content and len(message.content) > 0:
-                    content_item = message.content[0]
-                    if content_item.get('type') == 'text' and 'text' in content_item:
-                        return content_item['text']['value']
-        
-        return "No response received from policy checker"
+        from .semantic_cache import cacheable_answer
+        from .tracing import set_span_attributes, traced
+
+        with traced("policy_checker.check_policy_coverage", {"gen_ai.agent.name": POLICY_CHECKER_NAME, "policy.conversation_id": conversation_id}) as span:
+            if conversation_id:
+                # Follow-ups depend on the conversation so far and are never answered from cache
+                self.setup_agent()
+                # One active run per thread: follow-ups in a conversation take turns
+                with self.threads.conversation(conversation_id):
+                    return self._check(query, conversation_id)
+            
+            answers = self._answer_cache()
+            probe = answers.lookup(query) if answers is not None else None
+            if probe is not None and probe.answer is not None:
+                set_span_attributes(span, {"policy.cache_hit": True})
+                return probe.answer
+            
+            self.setup_agent()
+            result = self._check(query)
+            if probe is not None and cacheable_answer(result):
+                answers.store(probe, result)
+            return result
+    
+    def _answer_cache(self):
+        """The semantic answer cache, or None when it is disabled."""
+        if self.answers is None and self._use_cache is not False:
+            from .semantic_cache import get_semantic_cache, semantic_cache_enabled
+            if semantic_cache_enabled(self._use_cache):
+                self.answers = get_semantic_cache()
+            else:
+                self._use_cache = False
+        return self.answers
+    
+    def _check(self, query: str, conversation_id: str = None) -> str:
+        from .tracing import run_usage_attributes, set_span_attributes, traced
+
+        # Take a thread from the pool instead of creating one per query
+        thread = self.threads.acquire(conversation_id)
+        healthy = False
+        try:
+            # Send a message to the thread
+            self.project_client.agents.messages.create(
+                thread_id=thread.id,
+                role=MessageRole.USER,
+                content=query,
+            )
+            
+            with traced("agent_run", {"gen_ai.agent.name": POLICY_CHECKER_NAME, "thread.id": thread.id}) as span:
+                # Create an agent run and poll it until it is no longer queued or in progress
+                run = self.project_client.agents.runs.create(
+                    thread_id=thread.id, 
+                    agent_id=self.agent.id,
+                    **run_options(thread),
+                )
+                set_span_attributes(span, {"run.id": run.id})
+                try:
+                    run = self.polling_options.wait_until_done(
+                        lambda: self.project_client.agents.runs.get(thread_id=thread.id, run_id=run.id),
+                        lambda current: current.status in PENDING_RUN_STATES,
+                    )
+                    # Local search mode: the agent calls search_policy_documents, answered in-process
+                    while run.status == "requires_action":
+                        self.project_client.agents.runs.submit_tool_outputs(
+                            thread_id=thread.id, run_id=run.id, tool_outputs=tool_outputs(run, self.search_tool)
+                        )
+                        run = self.polling_options.wait_until_done(
+                            lambda: self.project_client.agents.runs.get(thread_id=thread.id, run_id=run.id),
+                            lambda current: current.status in PENDING_RUN_STATES,
+                        )
+                    set_span_attributes(span, {"run.status": run.status, **run_usage_attributes(run)})
+                except TimeoutError as e:
+                    self.project_client.agents.runs.cancel(thread_id=thread.id, run_id=run.id)
+                    set_span_attributes(span, {"run.status": "timed_out"})
+                    return f"Policy check failed: {str(e)}"
+            healthy = True
+            
+            if run.status == "failed":
+                return f"Policy check failed: {run.last_error}"
+            
+            # Get the agent's response; only this run's messages, a reused thread holds earlier ones
+            messages = self.project_client.agents.messages.list(
+                thread_id=thread.id, 
+                run_id=run.id,
+                order=ListSortOrder.ASCENDING
+            )
+            
+            for message in messages:
+                reply = agent_reply(message)
+                if reply:
+                    return reply
+            
+            return "No response received from policy checker"
+        finally:
+            self.threads.release(thread, healthy)
+    
+    def end_conversation(self, conversation_id: str):
+        """Delete the thread pinned to a finished conversation."""
+        if self.threads is not None:
+            self.threads.end_conversation(conversation_id)
+    
+    def metrics(self) -> dict:
+        """Startup time, thread pool metrics (counts, reuse, creation latency) and answer cache metrics."""
+        return {
+            "startup_s": self.startup_s,
+            "threads": self.threads.metrics() if self.threads else None,
+            "answers": self.answers.metrics() if self.answers is not None else None,
+        }
 
-# Create an instance of the wrapper
+# Create an instance of the wrapper; it connects to Azure on its first check
 policy_checker_plugin = PolicyCheckerWrapper()
\ No newline at end of file
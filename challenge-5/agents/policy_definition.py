@@ -0,0 +1,89 @@
+import os
+
+from azure.ai.agents.models import AzureAISearchQueryType, AzureAISearchTool, MessageRole, ToolOutput
+
+# Shared by the sync and async policy checker wrappers, so both talk to an identical agent
+POLICY_CHECKER_NAME = "policy-checker-wrapper"
+POLICY_CHECKER_MODEL = "gpt-4.1-mini"
+POLICY_INDEX_NAME = "insurance-documents-index"
+
+POLICY_CHECKER_INSTRUCTIONS = """
+            You are an expert Insurance Policy Checker Agent specialized in analyzing auto insurance policies and validating claim coverage. Your primary responsibilities include:
+
+            **Core Functions:**
+            - Analyze insurance policy documents to determine coverage details
+            - Validate if specific claims are covered under policy terms
+            - Explain policy limits, deductibles, and exclusions
+            - Identify coverage gaps or restrictions
+            - Provide clear explanations of policy benefits
+
+            **Policy Types You Handle:**
+            - Commercial Auto Policies
+            - Comprehensive Auto Policies  
+            - High Value Vehicle Policies
+            - Liability Only Policies
+            - Motorcycle Policies
+
+            **Response Format:**
+            - Start with a clear coverage determination (COVERED/NOT COVERED/PARTIAL COVERAGE)
+            - Provide the specific policy section reference
+            - Explain coverage limits and deductibles
+            - List any relevant exclusions or conditions
+            - Suggest next steps if coverage issues exist
+            - Everything in a clear, concise manner in one paragraph.
+
+            **Tone:** Professional, accurate, and helpful. Always be thorough in your analysis while remaining clear and concise.
+            """
+
+# Run states that mean the policy checker is still working on an answer
+PENDING_RUN_STATES = ("queued", "in_progress", "cancelling")
+
+
+def policy_search_mode(mode: str = None) -> str:
+    """Explicit argument first, then POLICY_SEARCH_MODE: "remote" (Azure AI Search, default) or "local"."""
+    mode = (mode or os.environ.get("POLICY_SEARCH_MODE", "remote")).lower()
+    if mode not in ("remote", "local"):
+        raise ValueError(f"Unknown policy search mode: {mode}")
+    return mode
+
+
+def policy_checker_name(mode: str = None) -> str:
+    """Agent name per search mode; the tool is part of the definition, so each mode has its own agent."""
+    return POLICY_CHECKER_NAME if policy_search_mode(mode) == "remote" else f"{POLICY_CHECKER_NAME}-local"
+
+
+def policy_search_tool(mode: str = None):
+    """
+    The Azure AI Search tool over the policy documents index, or in local mode a function
+    tool served in-process by the hybrid index in policy_search.py (no Azure AI Search).
+    """
+    if policy_search_mode(mode) == "local":
+        from azure.ai.agents.models import FunctionTool
+        from .policy_search import require_policy_index, search_policy_documents
+        # Fail at setup rather than on the agent's first tool call
+        require_policy_index()
+        return FunctionTool({search_policy_documents})
+    return AzureAISearchTool(
+        index_connection_id=os.environ.get("AZURE_AI_CONNECTION_ID"),
+        index_name=POLICY_INDEX_NAME,
+        query_type=AzureAISearchQueryType.SIMPLE,
+        top_k=3,
+        filter="",
+    )
+
+
+def tool_outputs(run, tool) -> list:
+    """Results for a run in requires_action, i.e. waiting on local function tool calls."""
+    return [
+        ToolOutput(tool_call_id=call.id, output=str(tool.execute(call)))
+        for call in run.required_action.submit_tool_outputs.tool_calls
+    ]
+
+
+def agent_reply(message) -> str:
+    """Text of an agent message, or None for user messages and non-text content."""
+    if message.role == MessageRole.AGENT and message.content:
+        content_item = message.content[0]
+        if content_item.get('type') == 'text' and 'text' in content_item:
+            return content_item['text']['value']
+    return None
@@ -0,0 +1,360 @@
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# Same corpus and chunking as the insurance-documents-index built in challenge-1. The corpus
+# lives outside challenge-5/ and so is not in the service image: there, local search needs
+# POLICY_CORPUS_DIR (e.g. a mounted copy of the policies) or a prebuilt POLICY_SEARCH_INDEX_PATH
+DEFAULT_CORPUS_DIR = Path(__file__).resolve().parents[2] / "challenge-1" / "data" / "policies"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+INDEX_MAGIC = b"POLIDX01"
+INDEX_ALIGNMENT = 64
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i if in is it its my of on or our "
+    "the their this to under what when which will with you your".split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens without stopwords, with plurals folded ("policies" -> "policy")."""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def chunk_markdown(path: Path) -> list:
+    """
+    Split a policy into chunks along its headings; long sections become overlapping
+    CHUNK_SIZE windows. Each chunk keeps its heading path as title.
+    """
+    chunks, headings, body = [], [], []
+
+    def flush():
+        text = "\n".join(line for line in body if line.strip()).strip()
+        body.clear()
+        if not text:
+            return
+        start = 0
+        while start < len(text):
+            end = min(start + CHUNK_SIZE, len(text))
+            if end < len(text):
+                # Prefer to break at a line end
+                newline = text.rfind("\n", start + CHUNK_OVERLAP, end)
+                end = newline if newline > start else end
+            chunks.append({"file_name": path.name, "title": " > ".join(headings), "content": text[start:end].strip()})
+            if end >= len(text):
+                break
+            start = max(end - CHUNK_OVERLAP, start + 1)
+
+    for line in path.read_text(encoding="utf-8").splitlines():
+        heading = re.match(r"^(#{1,6})\s+(.*)", line)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            del headings[level - 1:]
+            headings.append(heading.group(2).strip())
+        else:
+            body.append(line)
+    flush()
+    return chunks
+
+
+def corpus_hash(corpus_dir: Path) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(Path(corpus_dir).glob("*.md")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class HashingEmbedder:
+    """
+    Offline vectors: signed feature hashing of words, word bigrams and character
+    trigrams, weighted by per-bucket IDF and L2-normalized. This is lexical matching, not
+    a semantic embedding: synonyms and paraphrases that share no words or trigrams do not
+    match. It catches partial words and phrasing that exact BM25 terms miss; build the
+    index with an AzureOpenAIEmbedder for semantic vectors.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 512, idf: np.ndarray = None):
+        self.dim = dim
+        self.idf = idf
+
+    def features(self, text: str) -> np.ndarray:
+        tokens = tokenize(text)
+        grams = tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+        grams += [f"#{token[i:i + 3]}" for token in tokens for i in range(max(1, len(token) - 2))]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for gram in grams:
+            h = zlib.crc32(gram.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return np.sign(vector) * np.log1p(np.abs(vector))
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = self.features(text)
+        if self.idf is not None:
+            vector = vector * self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class PolicySearchIndex:
+    """
+    In-process hybrid retrieval over the policy markdown files: a BM25 inverted index and
+    a vector index over the same chunks, fused with reciprocal rank fusion. The vectors are
+    hashed lexical features (HashingEmbedder) unless the index was built with an Azure
+    OpenAI embedder. Arrays are memory-mapped from a single prebuilt index file (see build()).
+    """
+
+    def __init__(self, path: str, header: dict, arrays: dict):
+        self.path = path
+        self.header = header
+        self.chunks = header["chunks"]
+        self.version = header["corpus_hash"]
+        self.vocab = {term: i for i, term in enumerate(header["vocab"])}
+        self.offsets = arrays["postings_offsets"]
+        self.postings = arrays["postings_chunks"]
+        self.weights = arrays["postings_weights"]
+        self.vectors = arrays["vectors"]
+        if header["embedder"] == HashingEmbedder.name:
+            self.embedder = HashingEmbedder(header["dim"], np.asarray(arrays["bucket_idf"]))
+        else:
+            from .semantic_cache import AzureOpenAIEmbedder
+            self.embedder = AzureOpenAIEmbedder(header["embedder"].partition(":")[2])
+
+    @classmethod
+    def build(cls, path: str, corpus_dir: Path = DEFAULT_CORPUS_DIR, embedder=None, dim: int = 512) -> "PolicySearchIndex":
+        """Chunk the corpus, compute BM25 postings and chunk vectors, and write the index file."""
+        files = sorted(Path(corpus_dir).glob("*.md"))
+        if not files:
+            raise FileNotFoundError(f"No policy markdown files in {corpus_dir}")
+        chunks = [chunk for path_ in files for chunk in chunk_markdown(path_)]
+        for i, chunk in enumerate(chunks):
+            chunk["id"] = i
+        documents = [tokenize(f"{chunk['title']} {chunk['content']}") for chunk in chunks]
+
+        # BM25: term weight per (term, chunk) is precomputed, so a query is a sum of postings
+        lengths = np.array([len(tokens) for tokens in documents], dtype=np.float32)
+        avgdl = float(lengths.mean())
+        postings = {}
+        for chunk_id, tokens in enumerate(documents):
+            for term in set(tokens):
+                postings.setdefault(term, []).append((chunk_id, tokens.count(term)))
+        vocab = sorted(postings)
+        offsets, postings_chunks, postings_weights = [0], [], []
+        for term in vocab:
+            entries = postings[term]
+            idf = np.log(1 + (len(chunks) - len(entries) + 0.5) / (len(entries) + 0.5))
+            for chunk_id, tf in entries:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[chunk_id] / avgdl)
+                postings_chunks.append(chunk_id)
+                postings_weights.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+            offsets.append(len(postings_chunks))
+
+        texts = [f"{chunk['title']}\n{chunk['content']}" for chunk in chunks]
+        arrays = {
+            "postings_offsets": np.asarray(offsets, dtype=np.int64),
+            "postings_chunks": np.asarray(postings_chunks, dtype=np.int32),
+            "postings_weights": np.asarray(postings_weights, dtype=np.float32),
+        }
+        if embedder is None or isinstance(embedder, HashingEmbedder):
+            hashing = embedder or HashingEmbedder(dim)
+            features = np.stack([hashing.features(text) for text in texts])
+            document_frequency = (features != 0).sum(axis=0)
+            hashing.idf = np.log((1 + len(chunks)) / (1 + document_frequency)).astype(np.float32) + 1
+            arrays["bucket_idf"] = hashing.idf
+            arrays["vectors"] = np.stack([hashing.embed(text) for text in texts]).astype(np.float32)
+            embedder_name, dim = HashingEmbedder.name, hashing.dim
+        else:
+            vectors = np.stack([embedder.embed(text) for text in texts]).astype(np.float32)
+            arrays["vectors"] = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            embedder_name, dim = f"azure:{embedder.deployment}", vectors.shape[1]
+
+        header = {
+            "corpus_hash": corpus_hash(corpus_dir),
+            "built_at": time.time(),
+            "embedder": embedder_name,
+            "dim": dim,
+            "avgdl": avgdl,
+            "chunks": chunks,
+            "vocab": vocab,
+        }
+        write_index(path, header, arrays)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str) -> "PolicySearchIndex":
+        header, arrays = read_index(path)
+        return cls(path, header, arrays)
+
+    def bm25(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for term in set(tokenize(query)):
+            i = self.vocab.get(term)
+            if i is not None:
+                start, end = self.offsets[i], self.offsets[i + 1]
+                # Chunk ids are unique within a posting list, so fancy-index += is safe
+                scores[self.postings[start:end]] += self.weights[start:end]
+        return scores
+
+    def similarities(self, query: str) -> np.ndarray:
+        return self.vectors @ self.embedder.embed(query).astype(np.float32)
+
+    @staticmethod
+    def _ranked(scores: np.ndarray, depth: int, positive_only: bool = False) -> np.ndarray:
+        depth = min(depth, len(scores))
+        top = np.argpartition(-scores, depth - 1)[:depth]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top[scores[top] > 0] if positive_only else top
+
+    def search(self, query: str, top_k: int = 3, mode: str = "hybrid", depth: int = 20) -> list:
+        """
+        Top chunks for a query. mode is "bm25", "vector" or "hybrid" (both lists fused by
+        reciprocal rank: score = sum of 1 / (RRF_K + rank) over the lists a chunk is in).
+        """
+        if mode == "bm25":
+            scores = self.bm25(query)
+            ranked = self._ranked(scores, top_k, positive_only=True)
+            return [self._hit(i, float(scores[i])) for i in ranked]
+        if mode == "vector":
+            scores = self.similarities(query)
+            return [self._hit(i, float(scores[i])) for i in self._ranked(scores, top_k)]
+
+        fused = {}
+        for ranked in (self._ranked(self.bm25(query), depth, positive_only=True), self._ranked(self.similarities(query), depth)):
+            for rank, i in enumerate(ranked):
+                fused[int(i)] = fused.get(int(i), 0.0) + 1.0 / (RRF_K + rank + 1)
+        best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [self._hit(i, score) for i, score in best]
+
+    def _hit(self, i: int, score: float) -> dict:
+        chunk = self.chunks[int(i)]
+        return {**chunk, "score": round(score, 4)}
+
+
+def write_index(path: str, header: dict, arrays: dict):
+    """
+    Layout: magic, header length (uint64 LE), JSON header (chunks, vocabulary and the
+    dtype/shape/offset of every array), then the arrays, each aligned to 64 bytes.
+    """
+    table, offset = {}, 0
+    for name, array in arrays.items():
+        table[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // INDEX_ALIGNMENT) * INDEX_ALIGNMENT
+    header = {**header, "arrays": table}
+    encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = -(-(len(INDEX_MAGIC) + 8 + len(encoded)) // INDEX_ALIGNMENT) * INDEX_ALIGNMENT
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(INDEX_MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(data_start + table[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_index(path: str) -> tuple:
+    """Parse the header and memory-map every array read-only; nothing is copied into memory."""
+    with open(path, "rb") as f:
+        if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a policy search index")
+        length = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(length).decode("utf-8"))
+    data_start = -(-(len(INDEX_MAGIC) + 8 + length) // INDEX_ALIGNMENT) * INDEX_ALIGNMENT
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        shape = tuple(spec["shape"])
+        if not np.prod(shape):
+            arrays[name] = np.zeros(shape, dtype=spec["dtype"])
+            continue
+        arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="r", offset=data_start + spec["offset"], shape=shape)
+    return header, arrays
+
+
+def policy_search_index_path() -> str:
+    return os.environ.get("POLICY_SEARCH_INDEX_PATH", os.path.join(".cache", "policy_search.idx"))
+
+
+def policy_corpus_dir() -> Path:
+    return Path(os.environ.get("POLICY_CORPUS_DIR", DEFAULT_CORPUS_DIR))
+
+
+def require_policy_index():
+    """Fail fast when there is neither an index file nor policy markdown to build one from."""
+    path, corpus_dir = policy_search_index_path(), policy_corpus_dir()
+    if not os.path.exists(path) and not any(corpus_dir.glob("*.md")):
+        raise FileNotFoundError(
+            f"Local policy search needs the policy markdown files (POLICY_CORPUS_DIR, now {corpus_dir}) "
+            f"or a prebuilt index (POLICY_SEARCH_INDEX_PATH, now {path})"
+        )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_policy_search_index() -> PolicySearchIndex:
+    """
+    Return the process-wide local policy index, loaded from POLICY_SEARCH_INDEX_PATH. It is
+    (re)built from POLICY_CORPUS_DIR when the file is missing or the policies changed.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            path, corpus_dir = policy_search_index_path(), policy_corpus_dir()
+            index = None
+            if os.path.exists(path):
+                index = PolicySearchIndex.load(path)
+                if corpus_dir.is_dir() and index.version != corpus_hash(corpus_dir):
+                    print(f"🔁 Policy documents changed; rebuilding {path}")
+                    index = None
+            if index is None:
+                start = time.perf_counter()
+                index = PolicySearchIndex.build(path, corpus_dir)
+                print(f"📚 Built local policy index: {len(index.chunks)} chunks in {time.perf_counter() - start:.2f}s")
+            _index = index
+        return _index
+
+
+def search_policy_documents(query: str, top_k: int = 3) -> str:
+    """
+    Search the auto insurance policy documents and return the most relevant passages.
+
+    :param query: What to look up, e.g. "theft coverage comprehensive policy deductible".
+    :param top_k: Number of passages to return.
+    :return: JSON list of passages with their policy file, section title and content.
+    """
+    hits = get_policy_search_index().search(query, top_k=top_k)
+    return json.dumps(
+        [{"file_name": hit["file_name"], "title": hit["title"], "content": hit["content"]} for hit in hits],
+        ensure_ascii=False,
+    )
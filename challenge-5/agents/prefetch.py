@@ -0,0 +1,41 @@
+import os
+import json
+import time
+
+from .async_tools import AsyncCosmosDBPlugin
+from .output_profile import OutputProfile
+
+
+def prefetch_enabled(prefetch: bool = None) -> bool:
+    """Explicit argument first, then ORCHESTRATION_PREFETCH_CLAIM (off by default)."""
+    if prefetch is not None:
+        return prefetch
+    return os.environ.get("ORCHESTRATION_PREFETCH_CLAIM", "false").lower() in ("1", "true", "yes")
+
+
+async def prefetch_claim(claim_id: str, plugin: AsyncCosmosDBPlugin = None) -> dict:
+    """
+    Fetch the claim once on the orchestrator side, rendered exactly as the
+    get_document_by_claim_id tool would return it, so it can be injected into every
+    agent's task instead of each agent spending a tool-call round trip on it.
+    Returns None when the claim cannot be fetched; agents then use their tools as usual.
+    """
+    plugin = plugin or AsyncCosmosDBPlugin(output_profile=OutputProfile.compact(), agent_name="Orchestrator")
+    start = time.perf_counter()
+    claim_json = await plugin.get_document_by_claim_id(claim_id)
+    latency_ms = (time.perf_counter() - start) * 1000
+    if claim_json.startswith("❌"):
+        print(f"⚠️ Claim prefetch failed, agents will fetch it themselves: {claim_json}")
+        return None
+
+    try:
+        document = json.loads(claim_json)
+    except ValueError:
+        document = {}
+    structured = document.get("structured_claim_info") if isinstance(document, dict) else None
+    policy_number = structured.get("policy_number") if isinstance(structured, dict) else None
+    if policy_number in ("", "N/A"):
+        policy_number = None
+
+    print(f"📥 Prefetched claim {claim_id} in {latency_ms:.0f} ms (policy number: {policy_number or 'not in claim'})")
+    return {"claim_id": claim_id, "claim_json": claim_json, "policy_number": policy_number, "latency_ms": latency_ms}
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import asyncio
+from datetime import datetime, timezone
+
+from semantic_kernel.agents import Agent, AgentResponseItem
+from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatHistoryAgentThread
+from semantic_kernel.contents import (
+    ChatMessageContent,
+    FunctionCallContent,
+    FunctionResultContent,
+    StreamingChatMessageContent,
+)
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from .deadlines import is_final_answer, token_usage
+
+FIXTURE_VERSION = 1
+
+# Orchestration member name -> key in the agents dict create_specialized_agents returns
+MEMBER_KEYS = {"ClaimReviewer": "claim_reviewer", "RiskAnalyzer": "risk_analyzer", "PolicyChecker": "policy_checker"}
+
+
+def fixture_dir() -> str:
+    return os.environ.get("REPLAY_FIXTURE_DIR", os.path.join("fixtures", "replay"))
+
+
+def _item_record(item) -> dict:
+    if isinstance(item, FunctionCallContent):
+        return {"type": "function_call", "id": item.id, "plugin": item.plugin_name, "function": item.function_name, "arguments": item.arguments}
+    if isinstance(item, FunctionResultContent):
+        return {"type": "function_result", "id": item.id, "plugin": item.plugin_name, "function": item.function_name, "result": str(item.result)}
+    return {"type": "text", "text": str(getattr(item, "text", None) or item)}
+
+
+def _event_kind(message) -> str:
+    if is_final_answer(message):
+        return "answer"
+    if any(isinstance(item, FunctionCallContent) for item in message.items):
+        # Server-side tools (Azure AI Search) report the call and its result in one message
+        return "function_call"
+    return "function_result"
+
+
+class OrchestrationRecorder:
+    """
+    Records every message the orchestration members produce - model answers, tool calls
+    and the tool (Cosmos DB) results they got back - with its time since invoke, so the
+    run can later be replayed offline by ReplayAgent. Chain it in front of the
+    agent_response_callback with wrap().
+    """
+
+    def __init__(self, claim_id: str, policy_number: str):
+        self.claim_id = claim_id
+        self.policy_number = policy_number
+        self.task = None
+        self.members = {}
+        self._started = None
+
+    def start(self, task: str):
+        """Call right before orchestration.invoke(); event times are relative to it."""
+        self.task = task
+        self._started = time.perf_counter()
+
+    def record(self, message):
+        at_s = time.perf_counter() - (self._started or time.perf_counter())
+        for item in message if isinstance(message, list) else [message]:
+            self.members.setdefault(item.name, []).append({
+                "at_s": round(at_s, 4),
+                "kind": _event_kind(item),
+                "role": getattr(item.role, "value", str(item.role)),
+                "items": [_item_record(i) for i in item.items],
+                "content": str(item.content or ""),
+                "usage": token_usage(item),
+            })
+
+    def wrap(self, callback):
+        def recording_callback(message):
+            self.record(message)
+            return callback(message)
+        return recording_callback
+
+    def to_dict(self) -> dict:
+        return {
+            "version": FIXTURE_VERSION,
+            "claim_id": self.claim_id,
+            "policy_number": self.policy_number,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "task": self.task,
+            "members": self.members,
+        }
+
+    def save(self, path: str = None) -> str:
+        path = path or os.path.join(fixture_dir(), f"{self.claim_id}.json")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def load_fixture(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        fixture = json.load(f)
+    if fixture.get("version") != FIXTURE_VERSION:
+        raise ValueError(f"Unsupported replay fixture version {fixture.get('version')} in {path}")
+    return fixture
+
+
+class InjectedLatency:
+    """
+    Delay for each replayed step: a fixed number of seconds when given, otherwise the
+    recorded delay times scale (scale=0 replays as fast as the framework allows).
+    """
+
+    def __init__(self, model_s: float = None, tool_s: float = None, scale: float = 1.0):
+        self.model_s = model_s
+        self.tool_s = tool_s
+        self.scale = scale
+
+    def model(self, recorded_s: float) -> float:
+        return self.model_s if self.model_s is not None else max(recorded_s, 0.0) * self.scale
+
+    def tool(self, recorded_s: float) -> float:
+        return self.tool_s if self.tool_s is not None else max(recorded_s, 0.0) * self.scale
+
+
+class ReplayToolStub:
+    """Stands in for the Cosmos DB plugin: returns recorded results for recorded calls."""
+
+    def __init__(self, events: list, latency: InjectedLatency):
+        self.latency = latency
+        self.calls = 0
+        self._results = {}
+        for event in events:
+            for item in event["items"]:
+                if item["type"] == "function_result":
+                    self._results[item["id"]] = item["result"]
+
+    async def call(self, call: dict, recorded_s: float) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency.tool(recorded_s))
+        return self._results.get(call["id"], f"❌ No recorded result for {call['function']}")
+
+
+class ReplayAgent(Agent):
+    """
+    Local stand-in for an orchestration member that replays a recorded run: it waits the
+    injected model latency, emits the recorded tool calls, takes their results from a
+    ReplayToolStub after the injected tool latency, and finally streams the recorded answer.
+    Nothing leaves the process, so a replayed orchestration measures framework overhead.
+    """
+
+    events: list = []
+    latency: InjectedLatency
+    tools: ReplayToolStub
+    scripted_s: float = 0.0
+
+    def _message(self, event: dict, results: dict = None) -> ChatMessageContent:
+        items = []
+        for item in event["items"]:
+            if item["type"] == "function_call":
+                items.append(FunctionCallContent(id=item["id"], plugin_name=item["plugin"], function_name=item["function"], arguments=item["arguments"]))
+            elif item["type"] == "function_result":
+                result = results.get(item["id"], item["result"]) if results else item["result"]
+                items.append(FunctionResultContent(id=item["id"], plugin_name=item["plugin"], function_name=item["function"], result=result))
+        return ChatMessageContent(role=AuthorRole(event["role"]), name=self.name, items=items, content=None if items else event["content"])
+
+    async def _replay(self, on_intermediate_message=None) -> dict:
+        """Play the intermediate events; return the final answer event."""
+        self.scripted_s = 0.0
+        previous_s = 0.0
+        calls = {}
+        for event in self.events:
+            recorded_s, previous_s = event["at_s"] - previous_s, event["at_s"]
+            if event["kind"] == "answer":
+                delay = self.latency.model(recorded_s)
+                self.scripted_s += delay
+                await asyncio.sleep(delay)
+                return event
+
+            results = None
+            if event["kind"] == "function_result":
+                # Parallel tool calls run concurrently, as the kernel runs them
+                pending = [item for item in event["items"] if item["type"] == "function_result"]
+                started = time.perf_counter()
+                outputs = await asyncio.gather(*(self.tools.call(calls.get(item["id"], item), recorded_s) for item in pending))
+                self.scripted_s += time.perf_counter() - started
+                results = {item["id"]: output for item, output in zip(pending, outputs)}
+            else:
+                delay = self.latency.model(recorded_s)
+                self.scripted_s += delay
+                await asyncio.sleep(delay)
+                calls.update({item["id"]: item for item in event["items"] if item["type"] == "function_call"})
+
+            if on_intermediate_message:
+                await on_intermediate_message(self._message(event, results))
+        raise RuntimeError(f"Replay fixture for {self.name} has no final answer")
+
+    async def _thread(self, messages, thread):
+        return await self._ensure_thread_exists_with_messages(
+            messages=messages, thread=thread, construct_thread=ChatHistoryAgentThread, expected_type=ChatHistoryAgentThread
+        )
+
+    async def get_response(self, messages=None, *, thread=None, **kwargs):
+        response = None
+        async for response in self.invoke(messages, thread=thread, **kwargs):
+            pass
+        return response
+
+    async def invoke(self, messages=None, *, thread=None, on_intermediate_message=None, **kwargs):
+        thread = await self._thread(messages, thread)
+        answer = await self._replay(on_intermediate_message)
+        message = ChatMessageContent(role=AuthorRole.ASSISTANT, name=self.name, content=answer["content"], metadata={"usage": answer["usage"]})
+        await thread.on_new_message(message)
+        yield AgentResponseItem(message=message, thread=thread)
+
+    async def invoke_stream(self, messages=None, *, thread=None, on_intermediate_message=None, **kwargs):
+        thread = await self._thread(messages, thread)
+        answer = await self._replay(on_intermediate_message)
+        message = StreamingChatMessageContent(role=AuthorRole.ASSISTANT, choice_index=0, name=self.name, content=answer["content"], metadata={"usage": answer["usage"]})
+        yield AgentResponseItem(message=message, thread=thread)
+
+
+def replay_agents(fixture: dict, latency: InjectedLatency = None) -> dict:
+    """Build the agents dict run_insurance_claim_orchestration expects, from a recorded fixture."""
+    latency = latency or InjectedLatency()
+    agents = {}
+    for name, events in fixture["members"].items():
+        if name not in MEMBER_KEYS:
+            continue
+        agents[MEMBER_KEYS[name]] = ReplayAgent(
+            name=name,
+            description=f"Replay of {name}",
+            events=events,
+            latency=latency,
+            tools=ReplayToolStub(events, latency),
+        )
+    missing = set(MEMBER_KEYS.values()) - set(agents)
+    if missing:
+        raise ValueError(f"Replay fixture has no events for {', '.join(sorted(missing))}")
+    return agents
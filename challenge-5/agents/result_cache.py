@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from .agent_registry import definition_hash
+from .async_tools import AsyncCosmosDBPlugin
+from .claim_cache import ClaimDocumentCache
+
+
+def result_cache_enabled(use_cache: bool = None) -> bool:
+    """
+    Explicit argument first, then RESULT_CACHE_ENABLED (off by default: a cached run replays
+    earlier model output instead of asking the agents again).
+    """
+    if use_cache is not None:
+        return use_cache
+    return os.environ.get("RESULT_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def agent_fingerprint(agent) -> str:
+    """Definition hash of an orchestration member (same hash the agent registry uses)."""
+    definition = agent.definition
+    return definition_hash(
+        definition.model,
+        definition.instructions,
+        getattr(definition, "tools", None),
+        getattr(definition, "tool_resources", None),
+        getattr(definition, "description", None),
+    )
+
+
+class OrchestrationResultCache:
+    """
+    SQLite-backed cache of finished orchestration results. The key covers everything the
+    answer depends on: the claim document version (_etag), the policy number, every member
+    agent's definition hash and the model deployment, so editing the claim, a prompt or the
+    model naturally misses. Only complete results (every member answered) are stored.
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: float = None):
+        self.path = path or os.environ.get("RESULT_CACHE_PATH", os.path.join(".cache", "orchestration_results.sqlite"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "86400"))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, claim_id TEXT, policy_number TEXT, report TEXT, results TEXT, created_at REAL)"
+        )
+        self._db.commit()
+        self._stats = {"hits": 0, "misses": 0, "uncacheable": 0, "stores": 0}
+
+    @staticmethod
+    def make_key(claim_id: str, etag: str, policy_number: str, agent_hashes: dict, model: str) -> str:
+        parts = {
+            "claim_id": claim_id,
+            "etag": etag,
+            "policy_number": policy_number,
+            "agents": dict(sorted(agent_hashes.items())),
+            "model": model,
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    async def key_for(self, claim_id: str, policy_number: str, members: list, model: str, plugin: AsyncCosmosDBPlugin = None, claim_cache: ClaimDocumentCache = None):
+        """
+        Build the cache key for a run, or None when the claim's current _etag cannot be read
+        (the claim does not exist, or Cosmos DB failed). The claim is always checked against
+        Cosmos DB - a cached copy is revalidated even within the claim cache TTL - so an
+        edited claim never keys to an old answer; the read leaves the claim warm for the agents.
+        """
+        plugin = plugin or AsyncCosmosDBPlugin(agent_name="Orchestrator", cache=claim_cache)
+        try:
+            document = await plugin.current_claim(claim_id)
+        except Exception as e:
+            print(f"⚠️ Could not read the current version of claim {claim_id}: {str(e)}")
+            document = None
+        etag = (document or {}).get("_etag")
+        if etag is None:
+            self._stats["uncacheable"] += 1
+            return None
+        return self.make_key(claim_id, etag, policy_number, {agent.name: agent_fingerprint(agent) for agent in members}, model)
+
+    def get(self, key: str):
+        """Return {"report", "results", "created_at"} for a key, or None on a miss or expired entry."""
+        with self._lock:
+            row = self._db.execute("SELECT report, results, created_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds and time.time() - row[2] > self.ttl_seconds):
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+        return {"report": row[0], "results": json.loads(row[1]), "created_at": row[2]}
+
+    def put(self, key: str, claim_id: str, policy_number: str, report: str, results: list):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, claim_id, policy_number, report, results, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, claim_id, policy_number, report, json.dumps(results, ensure_ascii=False), time.time()),
+            )
+            self._db.commit()
+            self._stats["stores"] += 1
+
+    def cached_report(self, cached: dict) -> str:
+        """A stored report, headed with when it was produced so it is never mistaken for a fresh run."""
+        produced = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(cached["created_at"]))
+        return f"> ♻️ Cached result from {produced}: claim, policy number, agents and model are unchanged since.\n\n{cached['report']}"
+
+    def invalidate_claim(self, claim_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM results WHERE claim_id = ?", (claim_id,))
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> OrchestrationResultCache:
+    """Return the process-wide orchestration result cache."""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = OrchestrationResultCache()
+        return _result_cache
@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+import threading
+from datetime import timedelta
+
+from semantic_kernel.agents.open_ai.run_polling_options import RunPollingOptions
+
+# Terminal state is detected on the first poll at or after the run finishes, so a fixed
+# interval adds up to one full interval to every run. Polling fast at first catches short
+# runs early; backing off exponentially keeps long runs from hammering runs.get.
+DEFAULT_INITIAL_MS = float(os.environ.get("RUN_POLLING_INITIAL_MS", "100"))
+DEFAULT_MAX_MS = float(os.environ.get("RUN_POLLING_MAX_MS", "1000"))
+DEFAULT_BACKOFF = float(os.environ.get("RUN_POLLING_BACKOFF", "1.5"))
+
+
+class RunPollingStats:
+    """Per-agent run and poll counts, plus time spent sleeping between polls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents = {}
+
+    def record(self, agent: str, iteration: int, wait_s: float):
+        with self._lock:
+            stats = self._agents.setdefault(agent, {"runs": 0, "polls": 0, "wait_s": 0.0})
+            # Every run's poll loop starts again at iteration 0
+            if iteration == 0:
+                stats["runs"] += 1
+            stats["polls"] += 1
+            stats["wait_s"] += wait_s
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                agent: {
+                    **stats,
+                    "wait_s": round(stats["wait_s"], 2),
+                    "polls_per_run": round(stats["polls"] / stats["runs"], 1) if stats["runs"] else 0.0,
+                }
+                for agent, stats in self._agents.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._agents.clear()
+
+
+_stats = RunPollingStats()
+
+
+def get_run_polling_stats() -> RunPollingStats:
+    """Return the process-wide polling counters shared by all agents."""
+    return _stats
+
+
+class AdaptiveRunPollingOptions(RunPollingOptions):
+    """
+    RunPollingOptions with an exponential schedule: initial_interval, then each wait
+    multiplied by backoff_factor up to max_interval. Semantic Kernel's agent poll loop asks
+    get_polling_interval() before every runs.get, which is also where polls are counted.
+    """
+
+    agent_name: str = "unassigned"
+    initial_interval: timedelta = timedelta(milliseconds=DEFAULT_INITIAL_MS)
+    max_interval: timedelta = timedelta(milliseconds=DEFAULT_MAX_MS)
+    backoff_factor: float = DEFAULT_BACKOFF
+
+    def interval_seconds(self, iteration_count: int) -> float:
+        initial = self.initial_interval.total_seconds()
+        # Cap the exponent too, so very long runs cannot overflow the float
+        return min(initial * self.backoff_factor ** min(iteration_count, 64), self.max_interval.total_seconds())
+
+    def get_polling_interval(self, iteration_count: int) -> timedelta:
+        seconds = self.interval_seconds(iteration_count)
+        _stats.record(self.agent_name, iteration_count, seconds)
+        return timedelta(seconds=seconds)
+
+    def wait_until_done(self, poll, is_pending, timeout: float = None):
+        """
+        Blocking poll loop with the same schedule, for callers of the synchronous agents
+        client (used instead of runs.create_and_process, which polls at a fixed interval).
+        """
+        from .tracing import set_span_attributes, traced
+
+        timeout = timeout if timeout is not None else self.run_polling_timeout.total_seconds()
+        deadline = time.monotonic() + timeout
+        iteration = 0
+        with traced("agent_run.poll", {"gen_ai.agent.name": self.agent_name}) as span:
+            while True:
+                time.sleep(self.get_polling_interval(iteration).total_seconds())
+                iteration += 1
+                result = poll()
+                set_span_attributes(span, {"run.polls": iteration, "run.status": getattr(result, "status", None)})
+                if not is_pending(result):
+                    return result
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Run still {getattr(result, 'status', 'pending')} after {timeout:g}s")
+
+    async def wait_until_done_async(self, poll, is_pending, timeout: float = None):
+        """wait_until_done() for the aio agents client: poll is a coroutine function."""
+        from .tracing import set_span_attributes, traced
+
+        timeout = timeout if timeout is not None else self.run_polling_timeout.total_seconds()
+        deadline = time.monotonic() + timeout
+        iteration = 0
+        with traced("agent_run.poll", {"gen_ai.agent.name": self.agent_name}) as span:
+            while True:
+                await asyncio.sleep(self.get_polling_interval(iteration).total_seconds())
+                iteration += 1
+                result = await poll()
+                set_span_attributes(span, {"run.polls": iteration, "run.status": getattr(result, "status", None)})
+                if not is_pending(result):
+                    return result
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Run still {getattr(result, 'status', 'pending')} after {timeout:g}s")
+
+
+def run_polling_options(agent_name: str, overrides: dict = None) -> AdaptiveRunPollingOptions:
+    """
+    Polling options for one agent: RUN_POLLING_INITIAL_MS / RUN_POLLING_MAX_MS /
+    RUN_POLLING_BACKOFF for everyone, refined by RUN_POLLING
+    ("PolicyChecker=250/4000/2,ClaimReviewer=100/1500", i.e. initial_ms/max_ms[/factor])
+    and then by overrides ({"PolicyChecker": {"initial_ms": 250, ...}}).
+    RUN_POLLING_TIMEOUT_SECONDS replaces Semantic Kernel's one-minute run timeout.
+    """
+    settings = {"initial_ms": DEFAULT_INITIAL_MS, "max_ms": DEFAULT_MAX_MS, "factor": DEFAULT_BACKOFF}
+    for item in os.environ.get("RUN_POLLING", "").split(","):
+        name, _, spec = item.partition("=")
+        if name.strip() == agent_name and spec.strip():
+            values = spec.strip().split("/")
+            for key, value in zip(("initial_ms", "max_ms", "factor"), values):
+                if value.strip():
+                    settings[key] = float(value)
+    settings.update((overrides or {}).get(agent_name, {}))
+
+    options = {
+        "agent_name": agent_name,
+        "initial_interval": timedelta(milliseconds=settings["initial_ms"]),
+        "max_interval": timedelta(milliseconds=settings["max_ms"]),
+        "backoff_factor": settings["factor"],
+    }
+    if os.environ.get("RUN_POLLING_TIMEOUT_SECONDS"):
+        options["run_polling_timeout"] = timedelta(seconds=float(os.environ["RUN_POLLING_TIMEOUT_SECONDS"]))
+    return AdaptiveRunPollingOptions(**options)
+
+
+def simulate_polling(interval_seconds, run_seconds: float, max_polls: int = 10000) -> dict:
+    """
+    Replay a poll schedule (iteration -> seconds) against a run that finishes after
+    run_seconds: the loop sleeps, then polls, as Semantic Kernel's does. Returns the
+    number of polls and the detection delay the schedule adds on top of the run.
+    """
+    elapsed = 0.0
+    for polls in range(1, max_polls + 1):
+        elapsed += interval_seconds(polls - 1)
+        if elapsed >= run_seconds:
+            return {"polls": polls, "added_latency_s": elapsed - run_seconds}
+    return {"polls": max_polls, "added_latency_s": None}
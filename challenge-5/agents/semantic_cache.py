@@ -0,0 +1,313 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .policy_definition import POLICY_INDEX_NAME, policy_search_mode
+
+# Terms that change the answer while barely moving the embedding: the policy type asked
+# about, amounts, and negation. Two questions only share an answer when these agree.
+POLICY_TYPE_TERMS = ("commercial", "comprehensive", "high value", "liability", "motorcycle")
+NEGATION_TERMS = frozenset({"not", "no", "never", "without", "except", "excluding"})
+# Policy codes such as LIAB-AUTO-001 or MOTO-001. They all end in -001, so they are kept
+# whole (as liab_auto_001) through normalization instead of splitting into a bare number.
+POLICY_NUMBER = re.compile(r"\b[a-z]{2,}(?:-[a-z]{2,})*-\d+\b", re.IGNORECASE)
+POLICY_NUMBER_TOKEN = re.compile(r"[a-z]{2,}(?:_[a-z]{2,})*_\d+")
+
+
+def semantic_cache_enabled(use_cache: bool = None) -> bool:
+    """Explicit argument first, then SEMANTIC_CACHE_ENABLED (on by default)."""
+    if use_cache is not None:
+        return use_cache
+    return os.environ.get("SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, spell out "n't", drop punctuation other than in amounts and policy numbers and collapse whitespace."""
+    query = POLICY_NUMBER.sub(lambda m: m.group(0).replace("-", "_"), query.lower())
+    query = query.replace("n't", " not").replace("-", " ")
+    return " ".join(re.sub(r"[^\w\s$.,%]", " ", query).split()).strip(" .,")
+
+
+def discriminators(query: str) -> frozenset:
+    """Policy numbers, policy types, numbers and negations mentioned in a (normalized) query."""
+    words = [word.strip(".,") for word in query.split()]
+    terms = {f"policy:{word.upper().replace('_', '-')}" for word in words if POLICY_NUMBER_TOKEN.fullmatch(word)}
+    terms.update(term for term in POLICY_TYPE_TERMS if term in query)
+    terms.update(word for word in words if any(c.isdigit() for c in word))
+    if NEGATION_TERMS.intersection(words):
+        terms.add("<negated>")
+    return frozenset(terms)
+
+
+class AzureOpenAIEmbedder:
+    """Query embeddings from the Azure OpenAI embedding deployment the search index uses."""
+
+    def __init__(self, deployment: str = None):
+        self.deployment = deployment or os.environ.get("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-ada-002")
+        self._client = None
+        self._async_client = None
+
+    def _settings(self) -> dict:
+        return {
+            "azure_endpoint": os.environ.get("AZURE_OPENAI_ENDPOINT"),
+            "api_key": os.environ.get("AZURE_OPENAI_KEY"),
+            "api_version": os.environ.get("AZURE_OPENAI_API_VERSION", "2024-10-21"),
+        }
+
+    def embed(self, text: str) -> np.ndarray:
+        if self._client is None:
+            from openai import AzureOpenAI
+            self._client = AzureOpenAI(**self._settings())
+        response = self._client.embeddings.create(input=text, model=self.deployment)
+        return np.asarray(response.data[0].embedding, dtype=np.float32)
+
+    async def embed_async(self, text: str) -> np.ndarray:
+        if self._async_client is None:
+            from openai import AsyncAzureOpenAI
+            self._async_client = AsyncAzureOpenAI(**self._settings())
+        response = await self._async_client.embeddings.create(input=text, model=self.deployment)
+        return np.asarray(response.data[0].embedding, dtype=np.float32)
+
+
+class PolicyIndexVersion:
+    """
+    Content version of the policy search index, from its ETag, document count and storage
+    size (any re-upload or re-index changes at least one). Refreshed at most every
+    POLICY_INDEX_VERSION_REFRESH_SECONDS; POLICY_INDEX_VERSION pins it explicitly. In local
+    search mode it is the corpus hash of the in-process index instead.
+    """
+
+    def __init__(self, index_name: str = POLICY_INDEX_NAME, refresh_seconds: float = None):
+        self.index_name = index_name
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else float(os.environ.get("POLICY_INDEX_VERSION_REFRESH_SECONDS", "300"))
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._client = None
+
+    def _fetch(self) -> str:
+        if self._client is None:
+            from azure.core.credentials import AzureKeyCredential
+            from azure.search.documents.indexes import SearchIndexClient
+            key = os.environ.get("SEARCH_ADMIN_KEY")
+            if key:
+                credential = AzureKeyCredential(key)
+            else:
+                from azure.identity import DefaultAzureCredential
+                credential = DefaultAzureCredential()
+            self._client = SearchIndexClient(endpoint=os.environ.get("SEARCH_SERVICE_ENDPOINT"), credential=credential)
+        index = self._client.get_index(self.index_name)
+        stats = self._client.get_index_statistics(self.index_name)
+        fingerprint = f"{index.e_tag}:{stats.get('document_count')}:{stats.get('storage_size')}"
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+
+    def current(self) -> str:
+        pinned = os.environ.get("POLICY_INDEX_VERSION")
+        if pinned:
+            return pinned
+        if policy_search_mode() == "local":
+            from .policy_search import get_policy_search_index
+            return f"local-{get_policy_search_index().version}"
+        with self._lock:
+            if self._version is not None and time.monotonic() - self._checked_at < self.refresh_seconds:
+                return self._version
+            try:
+                self._version = self._fetch()
+            except Exception as e:
+                # Keep serving under the last known version; retry after the next interval
+                print(f"⚠️ Could not read {self.index_name} version: {str(e)}")
+                self._version = self._version or "unknown"
+            self._checked_at = time.monotonic()
+            return self._version
+
+
+class CacheProbe:
+    """A looked-up query: its answer on a hit, otherwise what store() needs to add it."""
+
+    def __init__(self, query: str, key: str, version: str, embedding: np.ndarray = None):
+        self.query = query
+        self.key = key
+        self.version = version
+        self.embedding = embedding
+        self.answer = None
+        self.similarity = None
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of policy checker answers, looked up by meaning rather than exact text:
+    a query whose embedding has cosine similarity >= SEMANTIC_CACHE_THRESHOLD with a cached
+    question (and the same policy numbers, policy types, amounts and negation) gets that
+    question's answer.
+    Bounded to SEMANTIC_CACHE_MAX_ENTRIES with LRU eviction, and emptied whenever the policy
+    index content version changes.
+    """
+
+    def __init__(self, embedder=None, index_version: PolicyIndexVersion = None, max_entries: int = None, threshold: float = None, ttl_seconds: float = None):
+        self.embedder = embedder or AzureOpenAIEmbedder()
+        self.index_version = index_version or PolicyIndexVersion()
+        self.max_entries = max_entries or int(os.environ.get("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+        self.threshold = threshold if threshold is not None else float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        # Stacked unit embeddings of all entries, rebuilt lazily after inserts and evictions
+        self._matrix = None
+        self._matrix_keys = []
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0, "embed_failures": 0, "embed_ms_total": 0.0, "embeds": 0}
+
+    def _check_version(self, version: str):
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+                print(f"🧹 Policy index changed ({self._version} -> {version}); dropped {len(self._entries)} cached answers")
+            self._entries.clear()
+            self._matrix = None
+            self._version = version
+
+    def _fresh(self, entry: dict) -> bool:
+        return not self.ttl_seconds or time.time() - entry["created_at"] <= self.ttl_seconds
+
+    def _exact(self, probe: CacheProbe) -> bool:
+        with self._lock:
+            self._check_version(probe.version)
+            entry = self._entries.get(probe.key)
+            if entry is None or not self._fresh(entry):
+                return False
+            self._entries.move_to_end(probe.key)
+            self._stats["exact_hits"] += 1
+            probe.answer, probe.similarity = entry["answer"], 1.0
+            return True
+
+    def _nearest(self, probe: CacheProbe):
+        with self._lock:
+            self._check_version(probe.version)
+            if probe.embedding is None or not self._entries:
+                self._stats["misses"] += 1
+                return
+            if self._matrix is None:
+                self._matrix_keys = [k for k, e in self._entries.items() if e["embedding"] is not None]
+                self._matrix = np.stack([self._entries[k]["embedding"] for k in self._matrix_keys]) if self._matrix_keys else None
+            if self._matrix is not None:
+                similarities = self._matrix @ probe.embedding
+                terms = discriminators(probe.key)
+                for i in np.argsort(similarities)[::-1]:
+                    if similarities[i] < self.threshold:
+                        break
+                    key = self._matrix_keys[i]
+                    entry = self._entries.get(key)
+                    if entry is not None and entry["terms"] == terms and self._fresh(entry):
+                        self._entries.move_to_end(key)
+                        self._stats["semantic_hits"] += 1
+                        probe.answer, probe.similarity = entry["answer"], float(similarities[i])
+                        return
+            self._stats["misses"] += 1
+
+    def _unit(self, embedding: np.ndarray, started: float) -> np.ndarray:
+        with self._lock:
+            self._stats["embeds"] += 1
+            self._stats["embed_ms_total"] += (time.perf_counter() - started) * 1000
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else None
+
+    def _embed_failed(self, e: Exception):
+        with self._lock:
+            self._stats["embed_failures"] += 1
+            first = self._stats["embed_failures"] == 1
+        if first:
+            print(f"⚠️ Semantic cache cannot embed queries, falling back to exact matches: {str(e)}")
+
+    def _can_embed(self) -> bool:
+        # Embedding that has never worked (e.g. no embedding deployment) is not retried per query
+        with self._lock:
+            return self._stats["embeds"] > 0 or self._stats["embed_failures"] < 3
+
+    def lookup(self, query: str) -> CacheProbe:
+        """Exact (normalized) match first, then nearest neighbour by embedding."""
+        probe = CacheProbe(query, normalize_query(query), self.index_version.current())
+        if self._exact(probe):
+            return probe
+        started = time.perf_counter()
+        try:
+            if self._can_embed():
+                probe.embedding = self._unit(self.embedder.embed(probe.key), started)
+        except Exception as e:
+            self._embed_failed(e)
+        self._nearest(probe)
+        return probe
+
+    async def lookup_async(self, query: str) -> CacheProbe:
+        # The version check only calls Azure AI Search every few minutes
+        probe = CacheProbe(query, normalize_query(query), await asyncio.to_thread(self.index_version.current))
+        if self._exact(probe):
+            return probe
+        started = time.perf_counter()
+        try:
+            if self._can_embed():
+                probe.embedding = self._unit(await self.embedder.embed_async(probe.key), started)
+        except Exception as e:
+            self._embed_failed(e)
+        self._nearest(probe)
+        return probe
+
+    def store(self, probe: CacheProbe, answer: str):
+        with self._lock:
+            if probe.version != self._version:
+                # The index changed while this answer was being generated
+                return
+            self._entries[probe.key] = {
+                "answer": answer,
+                "embedding": probe.embedding,
+                "terms": discriminators(probe.key),
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(probe.key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def metrics(self) -> dict:
+        with self._lock:
+            hits = self._stats["exact_hits"] + self._stats["semantic_hits"]
+            lookups = hits + self._stats["misses"]
+            embeds = self._stats["embeds"]
+            return {
+                **{k: v for k, v in self._stats.items() if k not in ("embed_ms_total", "embeds")},
+                "lookups": lookups,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "embed_ms_avg": round(self._stats["embed_ms_total"] / embeds, 1) if embeds else 0.0,
+                "index_version": self._version,
+            }
+
+
+def cacheable_answer(answer: str) -> bool:
+    """Only real answers are cached; failures and empty replies are retried next time."""
+    return bool(answer) and not answer.startswith("Policy check failed") and answer != "No response received from policy checker"
+
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticAnswerCache:
+    """Return the process-wide policy answer cache, shared by the sync and async checkers."""
+    global _semantic_cache
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticAnswerCache()
+        return _semantic_cache
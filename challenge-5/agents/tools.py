@@ -1,304 +1,713 @@
 import os
-import json
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import Annotated
 from semantic_kernel.functions import kernel_function
 
-class CosmosDBPlugin:
+from .claim_cache import ClaimDocumentCache, get_claim_cache
+from .container_stats import ContainerStatistics, get_container_stats
+from .cosmos_metrics import CosmosMetrics, get_cosmos_metrics, instrumented, measure_requests
+from .cosmos_pool import CosmosClientPool, get_cosmos_pool
+from .tracing import set_span_attributes, traced
+from .output_profile import OutputProfile
+from .paging import DEFAULT_PAGE_SIZE, QueryCursorStore, clamp_page_size, fitting_items, get_cursor_store, page_result
+
+def partition_key_value(document: dict, paths: list):
+    """Extract a document's partition key value for the container's partition key paths."""
+    values = []
+    for path in paths:
+        value = document
+        for part in path.strip("/").split("/"):
+            value = value.get(part) if isinstance(value, dict) else None
+        values.append(value)
+    # Single-path containers take a scalar, hierarchical ones a list
+    return values[0] if len(values) == 1 else values
+
+# Limits for bulk claim retrieval
+MAX_BULK_CLAIMS = 50
+IN_QUERY_BATCH_SIZE = 25
+MAX_CONCURRENT_READS = 16
+
+def normalize_claim_ids(claim_ids) -> list:
+    """Accept a list or a comma-separated string of claim IDs; dedupe while keeping order."""
+    if isinstance(claim_ids, str):
+        claim_ids = claim_ids.split(",")
+    seen = []
+    for claim_id in claim_ids or []:
+        claim_id = str(claim_id).strip()
+        if claim_id and claim_id not in seen:
+            seen.append(claim_id)
+    return seen[:MAX_BULK_CLAIMS]
+
+def bulk_claims_result(claim_ids: list, documents: dict, output: OutputProfile, suggestions: dict = None) -> dict:
+    """Combine bulk lookup results into one payload, in the order the claims were requested."""
+    result = {
+        "requested": len(claim_ids),
+        "found": len(documents),
+        "missing": [claim_id for claim_id in claim_ids if claim_id not in documents],
+        "documents": [output.project(documents[claim_id]) for claim_id in claim_ids if claim_id in documents]
+    }
+    if suggestions:
+        result["did_you_mean"] = suggestions
+    return result
+
+def claim_not_found_message(claim_id: str, container_name: str, suggestions: list) -> str:
+    """Not-found reply for get_document_by_claim_id, pointing the agent at the closest existing IDs."""
+    hint = f"Closest existing claim IDs: {suggestions}" if suggestions else "No similar claim IDs exist."
+    return f"❌ No document found with claim_id '{claim_id}' in container '{container_name}'.\n\n{hint}\n\nPlease verify the claim ID exists in the database."
+
+def query_span(database_name: str, container_name: str, query: str, **kwargs):
+    """A cosmos.query span around one query (the plugin.* span covers the whole tool call)."""
+    return traced("cosmos.query", {
+        "db.system": "cosmosdb",
+        "db.name": database_name,
+        "db.cosmosdb.container": container_name,
+        "db.statement": query,
+        "db.cosmosdb.cross_partition": "partition_key" not in kwargs,
+        "db.cosmosdb.page_size": kwargs.get("max_item_count"),
+    })
+
+def claim_lookup_mode(paths: list) -> str:
     """
-    A production-ready Cosmos DB plugin that connects to real Azure Cosmos DB.
-    This plugin retrieves actual JSON documents from your database.
+    Pick how claims are looked up for a partition key layout. Containers written by
+    save_simplified_cosmos_db use /claim_id as partition key (and id == claim_id),
+    so a claim can be fetched with a 1-RU point read instead of a fan-out query.
     """
-    
-    def __init__(self, endpoint: str = None, key: str = None, database_name: str = "MyDatabase", container_name: str = "MyContainer"):
+    return "point_read" if paths == ["/claim_id"] else "cross_partition_query"
+
+CLAIM_QUERY = "SELECT * FROM c WHERE c.claim_id = @claim_id"
+CLAIMS_QUERY = "SELECT * FROM c WHERE ARRAY_CONTAINS(@claim_ids, c.claim_id)"
+DOCUMENT_QUERY = "SELECT * FROM c WHERE c.id = @document_id"
+
+
+class CosmosPluginBase:
+    """
+    State, query building, result shaping and error formatting shared by CosmosDBPlugin
+    and AsyncCosmosDBPlugin. Subclasses only add the Cosmos DB I/O and the kernel functions.
+    """
+
+    # Extra query_items options for a query that spans partitions
+    CROSS_PARTITION = {}
+    # Install hint when the Cosmos DB SDK is missing
+    DEPENDENCIES = "azure-cosmos"
+
+    def __init__(self, endpoint: str = None, key: str = None, database_name: str = "MyDatabase", container_name: str = "MyContainer", pool=None, cache: ClaimDocumentCache = None, cursors: QueryCursorStore = None, output_profile: OutputProfile = None, container_stats: ContainerStatistics = None, agent_name: str = None, metrics: CosmosMetrics = None):
         """
         Initialize the Cosmos DB plugin with connection details.
         For production, use environment variables or Azure Key Vault for credentials.
         """
         self.endpoint = endpoint or os.environ.get("COSMOS_ENDPOINT")
-        self.key = key or os.environ.get("COSMOS_KEY") 
+        self.key = key or os.environ.get("COSMOS_KEY")
         self.database_name = "insurance_claims"
         self.container_name = "crash_reports"
-    
+        # All plugin instances share one client and container proxy per account
+        self.pool = pool
+        # ...and one claim document cache, so agents re-reading the same claim hit memory
+        self.cache = cache or get_claim_cache()
+        # Continuation tokens for paginated queries, handed to agents as short page tokens
+        self.cursors = cursors or get_cursor_store()
+        # How results are serialized for the model (verbose by default, see OutputProfile)
+        self.output = output_profile or OutputProfile.from_env()
+        # Document counts and the claim-ID directory, kept current from the change feed
+        self.container_stats = container_stats or get_container_stats(self.endpoint, self.database_name, self.container_name)
+        # RU charge and latency per call, attributed to the agent this plugin is registered with
+        self.agent_name = agent_name
+        self.metrics = metrics or get_cosmos_metrics()
+        self._partition_key_paths = None
+        self._container_properties = None
+        # Which lookup path get_document_by_claim_id took, per call
+        self.lookup_stats = {"cache": 0, "point_read": 0, "partition_query": 0, "cross_partition_query": 0}
+        self.last_lookup_path = None
+
+    def get_pool_stats(self) -> dict:
+        """Return client/container reuse statistics for the shared pool."""
+        return self.pool.stats()
+
+    def get_cache_stats(self) -> dict:
+        """Return claim document cache hit/miss counters and estimated savings."""
+        return self.cache.stats()
+
+    def get_lookup_stats(self) -> dict:
+        """Return how many claim lookups took each path (cache, point read, queries)."""
+        return {
+            "layout": claim_lookup_mode(self._partition_key_paths) if self._partition_key_paths is not None else "unknown",
+            "last_lookup_path": self.last_lookup_path,
+            **self.lookup_stats,
+        }
+
+    def _record_lookup(self, path: str):
+        self.lookup_stats[path] += 1
+        self.last_lookup_path = path
+
+    def _remember_properties(self, properties: dict) -> dict:
+        """Keep the container's properties and partition key paths for the plugin's lifetime."""
+        self._container_properties = properties
+        self._partition_key_paths = properties.get("partitionKey", {}).get("paths", [])
+        return properties
+
+    # Query building
+
+    def _query(self, query: str, parameters: list = None, partition_key=None, **kwargs) -> dict:
+        """query_items arguments for a query scoped to one partition, or spanning all of them."""
+        options = {"query": query, **kwargs}
+        if parameters is not None:
+            options["parameters"] = parameters
+        if partition_key is not None:
+            options["partition_key"] = partition_key
+        else:
+            options.update(self.CROSS_PARTITION)
+        return options
+
+    def _claim_query(self, claim_id: str, partition_key=None) -> dict:
+        # We expect only one document with this claim_id
+        return self._query(CLAIM_QUERY, [{"name": "@claim_id", "value": claim_id}], partition_key, max_item_count=1)
+
+    def _claim_batch_queries(self, claim_ids: list) -> list:
+        """One IN query per IN_QUERY_BATCH_SIZE claims, for layouts where claims can't be point-read."""
+        return [
+            self._query(CLAIMS_QUERY, [{"name": "@claim_ids", "value": claim_ids[i:i + IN_QUERY_BATCH_SIZE]}])
+            for i in range(0, len(claim_ids), IN_QUERY_BATCH_SIZE)
+        ]
+
+    def _document_query(self, document_id: str) -> dict:
+        return self._query(DOCUMENT_QUERY, [{"name": "@document_id", "value": document_id}], max_item_count=1)
+
+    def _recent_query(self, limit: int) -> dict:
+        # Ensure limit is within bounds; order by _ts so the newest come first
+        limit = max(1, min(limit, 100))
+        return self._query(f"{self.output.select_clause(top=limit)} FROM c ORDER BY c._ts DESC")
+
+    def _search_query(self, field_name: str, field_value: str):
+        """
+        Parameterized query for better security and performance; the output profile's
+        field projection is pushed down as the SELECT list. Returns (query, parameters, context).
+        """
+        query = f"{self.output.select_clause()} FROM c WHERE c.{field_name} = @field_value"
+        parameters = [{"name": "@field_value", "value": field_value}]
+        return query, parameters, {"search_criteria": f"{field_name} = '{field_value}'"}
+
+    def _page_query(self, query: str, parameters: list, page_size: int) -> dict:
+        return self._query(query, parameters, max_item_count=page_size)
+
+    # Claim cache bookkeeping
+
+    def _cached_entry(self, claim_id: str, revalidate: bool = False):
+        """
+        (document, entry) for a claim: a cached document that can be served as is, or a
+        stale entry to revalidate with a conditional read on its _etag. With revalidate,
+        fresh entries are revalidated too.
+        """
+        entry, is_fresh = self.cache.lookup(claim_id)
+        if entry is None:
+            return None, None
+        if is_fresh and not revalidate:
+            return entry["document"], None
+        if not entry["etag"] or entry["partition_key"] is None:
+            return None, None
+        return None, entry
+
+    @staticmethod
+    def _conditional_read(entry: dict) -> dict:
+        """read_item arguments that only return the document if it changed since it was cached."""
+        from azure.core import MatchConditions
+        return {
+            "item": entry["document"]["id"],
+            "partition_key": entry["partition_key"],
+            "etag": entry["etag"],
+            "match_condition": MatchConditions.IfModified,
+        }
+
+    def _not_modified(self, claim_id: str, error) -> bool:
+        """A failed conditional read: 304 keeps the cached copy, 404 drops it, anything else is raised."""
+        if error.status_code == 304:
+            return True
+        if error.status_code == 404:
+            self.cache.invalidate(claim_id)
+            return False
+        raise error
+
+    def _revalidated(self, claim_id: str, entry: dict, item, request_charge: float, start: float):
+        """Record a conditional read and return the current document."""
+        # 304 Not Modified comes back without a body: the cached copy is still current
+        if not item:
+            self.cache.mark_revalidated(claim_id, request_charge)
+            return entry["document"]
+
+        self.cache.store(claim_id, item, request_charge, (time.perf_counter() - start) * 1000, entry["partition_key"])
+        return item
+
+    def _store_claim(self, claim_id: str, document: dict, request_charge: float, start: float):
+        self.cache.store(
+            claim_id,
+            document,
+            request_charge,
+            (time.perf_counter() - start) * 1000,
+            partition_key_value(document, self._partition_key_paths)
+        )
+
+    def _fresh_claims(self, claim_ids: list) -> dict:
+        """The claims the cache can serve without a read."""
+        documents = {}
+        for claim_id in claim_ids:
+            entry, is_fresh = self.cache.lookup(claim_id)
+            if is_fresh:
+                documents[claim_id] = entry["document"]
+                self._record_lookup("cache")
+        return documents
+
+    def _store_claims(self, documents: dict) -> dict:
+        for claim_id, document in documents.items():
+            self.cache.store(claim_id, document, partition_key=partition_key_value(document, self._partition_key_paths))
+        return documents
+
+    def _found_claims(self, claim_ids: list, results) -> dict:
+        """Collect (document, lookup_path) results of per-claim reads into claim_id -> document."""
+        documents = {}
+        for claim_id, (document, lookup_path) in zip(claim_ids, results):
+            self._record_lookup(lookup_path)
+            if document is not None:
+                documents[claim_id] = document
+        return documents
+
+    def _batch_claims(self, documents: dict, items: list):
+        self._record_lookup("cross_partition_query")
+        for item in items:
+            documents.setdefault(item.get("claim_id"), item)
+
+    # Result shaping
+
+    def _cut_page(self, items: list, skip: int, page_start: str, continuation: str, query: str, parameters: list, page_size: int, context: dict, items_key: str):
+        """
+        Cut one fetched page to the output budget and return (items, next_page_token). skip
+        drops items an earlier, budget-cut response already returned; items that do not fit
+        the budget now are left for the next page.
+        """
+        items = items[skip:]
+        kept = fitting_items(self.output, context, items_key, items, page_size)
+        if kept < len(items):
+            # Resume inside this page, at the first item that did not fit
+            return items[:kept], self.cursors.save(page_start, query, parameters, page_size, context, items_key, skip=skip + kept)
+        next_page_token = self.cursors.save(continuation, query, parameters, page_size, context, items_key) if continuation else None
+        return items, next_page_token
+
+    def _render_document(self, document: dict) -> str:
+        return self.output.render(self.output.project(document))
+
+    def _render_page(self, context: dict, items_key: str, items: list, page_size: int, next_page_token: str, empty_message: str = None) -> str:
+        if empty_message and not items and not next_page_token:
+            return empty_message
+        return self.output.render(page_result(context, items_key, items, page_size, next_page_token), items_key)
+
+    def _connection_result(self, stats: ContainerStatistics) -> str:
+        # Claim IDs come from the change-feed-maintained directory instead of a listing query
+        claim_ids = stats.claim_ids(limit=10)
+        if not claim_ids:
+            return f"✅ Connection successful but no documents found in container '{self.container_name}'"
+
+        result = {
+            "connection_status": "SUCCESS",
+            "database": self.database_name,
+            "container": self.container_name,
+            "documents_found": stats.snapshot()["document_count"],
+            "available_claim_ids": claim_ids
+        }
+        return self.output.render(result)
+
+    def _container_info(self, container_props: dict, stats: dict) -> str:
+        info = {
+            "database": self.database_name,
+            "container": self.container_name,
+            "partition_key": container_props.get("partitionKey", {}).get("paths", ["Unknown"]),
+            "approximate_document_count": stats["document_count"],
+            "claim_count": stats["claim_count"],
+            "partition_count": stats["partition_count"],
+            "total_bytes": stats["total_bytes"],
+            "largest_partitions": stats["largest_partitions"],
+            "statistics_as_of": stats["as_of"],
+            "indexing_policy": container_props.get("indexingPolicy", {}).get("indexingMode", "Unknown")
+        }
+        return self.output.render(info)
+
+    def _recent_documents(self, items: list) -> str:
+        if not items:
+            return "📭 No documents found in the container"
+
+        result = {
+            "container": self.container_name,
+            "count": len(items),
+            "documents": items
+        }
+        return self.output.render(result, "documents")
+
+    # Error formatting
+
+    def _document_not_found(self, document_id: str) -> str:
+        return f"❌ Document with ID '{document_id}' not found in container '{self.container_name}'"
+
+    def _claim_error(self, claim_id: str, e: Exception) -> str:
+        error_msg = str(e)
+        if "endpoint and key must be configured" in error_msg:
+            return f"❌ Cosmos DB not configured. Please set COSMOS_ENDPOINT and COSMOS_KEY environment variables. Error: {error_msg}"
+        elif "Unauthorized" in error_msg or "401" in error_msg:
+            return f"❌ Authentication failed. Please check your Cosmos DB credentials. Error: {error_msg}"
+        elif "Forbidden" in error_msg or "403" in error_msg:
+            return f"❌ Access denied. Please check your Cosmos DB permissions. Error: {error_msg}"
+        elif "azure-cosmos package not installed" in error_msg:
+            return f"❌ Missing dependency. Please run: pip install {self.DEPENDENCIES}"
+        else:
+            return f"❌ Error retrieving document by claim_id '{claim_id}': {error_msg}"
+
+    def _document_error(self, document_id: str, e: Exception) -> str:
+        error_msg = str(e)
+        if "NotFound" in error_msg or "404" in error_msg:
+            return self._document_not_found(document_id)
+        elif "Unauthorized" in error_msg or "401" in error_msg:
+            return f"❌ Authentication failed. Please check your Cosmos DB credentials."
+        elif "Forbidden" in error_msg or "403" in error_msg:
+            return f"❌ Access denied. Please check your Cosmos DB permissions."
+        else:
+            return f"❌ Error retrieving document: {error_msg}"
+
+    @staticmethod
+    def _query_error(sql_query: str, e: Exception) -> str:
+        error_msg = str(e)
+        if "Syntax error" in error_msg:
+            return f"❌ SQL syntax error in query: {sql_query}\nError: {error_msg}"
+        else:
+            return f"❌ Error executing query: {error_msg}"
+
+    def _page_token_expired(self, page_token: str) -> str:
+        return f"❌ Page token '{page_token}' is unknown or has expired. Please run the original query again."
+
+
+class CosmosDBPlugin(CosmosPluginBase):
+    """
+    A production-ready Cosmos DB plugin that connects to real Azure Cosmos DB.
+    This plugin retrieves actual JSON documents from your database.
+    """
+
+    CROSS_PARTITION = {"enable_cross_partition_query": True}
+
+    def __init__(self, endpoint: str = None, key: str = None, database_name: str = "MyDatabase", container_name: str = "MyContainer", pool: CosmosClientPool = None, cache: ClaimDocumentCache = None, cursors: QueryCursorStore = None, output_profile: OutputProfile = None, container_stats: ContainerStatistics = None, agent_name: str = None, metrics: CosmosMetrics = None):
+        super().__init__(endpoint, key, database_name, container_name, pool or get_cosmos_pool(), cache, cursors, output_profile, container_stats, agent_name, metrics)
+
     def _get_cosmos_client(self):
-        """Create and return a Cosmos DB client."""
-        if not self.endpoint or not self.key:
-            raise Exception("Cosmos DB endpoint and key must be configured. Please set COSMOS_ENDPOINT and COSMOS_KEY environment variables.")
-        
+        """Return the shared Cosmos DB client from the process-wide pool."""
+        return self.pool.get_client(self.endpoint, self.key)
+
+    def _get_container(self):
+        """Return the shared container proxy from the process-wide pool."""
+        return self.pool.get_container(self.endpoint, self.key, self.database_name, self.container_name)
+
+    def _get_container_properties(self, container) -> dict:
+        """Read the container's properties (partition key, indexing policy) once and remember them."""
+        if self._container_properties is None:
+            self._remember_properties(container.read())
+        return self._container_properties
+
+    def _get_partition_key_paths(self, container) -> list:
+        """Read the container's partition key paths once and remember them."""
+        self._get_container_properties(container)
+        return self._partition_key_paths
+
+    def _get_container_stats(self, container) -> ContainerStatistics:
+        """Start tailing the change feed on first use and return the in-memory statistics."""
+        self.container_stats.start(container, self._get_partition_key_paths(container))
+        return self.container_stats
+
+    def _suggest_claim_ids(self, container, claim_id: str, limit: int = 5) -> list:
+        """
+        Closest existing claim IDs for a claim whose read found nothing, from the change-feed
+        claim directory. The directory is only started on the first such miss.
+        """
         try:
-            from azure.cosmos import CosmosClient
-            return CosmosClient(self.endpoint, self.key)
-        except ImportError:
-            raise ImportError("azure-cosmos package not installed. Run: pip install azure-cosmos")
+            return self._get_container_stats(container).suggest_claim_ids(claim_id, limit=limit)
         except Exception as e:
-            raise Exception(f"Failed to create Cosmos DB client: {str(e)}")
-    
+            print(f"⚠️ Claim directory unavailable: {str(e)}")
+            return []
+
+    def _get_cached_claim(self, container, claim_id: str, revalidate: bool = False):
+        """Serve a claim from the cache, revalidating stale entries with a conditional read on _etag."""
+        document, entry = self._cached_entry(claim_id, revalidate)
+        if entry is None:
+            return document
+
+        from azure.cosmos.exceptions import CosmosHttpResponseError
+
+        start = time.perf_counter()
+        with measure_requests() as meter:
+            try:
+                item = container.read_item(**self._conditional_read(entry))
+            except CosmosHttpResponseError as e:
+                if not self._not_modified(claim_id, e):
+                    return None
+                item = None
+        return self._revalidated(claim_id, entry, item, meter.request_charge, start)
+
+    def _fetch_claim(self, container, claim_id: str, revalidate: bool = False):
+        """A claim from the cache, else from Cosmos DB (and then cached); None if there is none."""
+        # Repeated lookups of the same claim (every agent fetches it) are served from the cache
+        cached = self._get_cached_claim(container, claim_id, revalidate)
+        if cached is not None:
+            self._record_lookup("cache")
+            return cached
+
+        # The partition key layout is detected once, on the first lookup
+        self._get_partition_key_paths(container)
+        start = time.perf_counter()
+        with measure_requests() as meter:
+            document, lookup_path = self._read_claim(container, claim_id)
+        self._record_lookup(lookup_path)
+        if document is not None:
+            self._store_claim(claim_id, document, meter.request_charge, start)
+        return document
+
+    def current_claim(self, claim_id: str):
+        """
+        The claim document as stored in Cosmos DB right now, or None if there is none: a
+        cached copy is revalidated on its _etag even within the cache TTL (a 304 costs ~1 RU).
+        """
+        return self._fetch_claim(self._get_container(), claim_id, revalidate=True)
+
+    def _query_items(self, container, query: str, **kwargs) -> list:
+        """Run a query to completion, traced."""
+        with query_span(self.database_name, self.container_name, query, **kwargs) as span, measure_requests() as meter:
+            items = list(container.query_items(query=query, **kwargs))
+            set_span_attributes(span, {"db.cosmosdb.item_count": len(items), "db.cosmosdb.request_charge": meter.request_charge})
+            return items
+
+    def _read_claim(self, container, claim_id: str):
+        """Fetch a claim document using the cheapest path the partition key layout allows."""
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+
+        if claim_lookup_mode(self._get_partition_key_paths(container)) == "point_read":
+            try:
+                return container.read_item(item=claim_id, partition_key=claim_id), "point_read"
+            except CosmosResourceNotFoundError:
+                # The claim's partition may hold a document with a different id:
+                # a single-partition query still avoids the fan-out
+                items = self._query_items(container, **self._claim_query(claim_id, partition_key=claim_id))
+                return (items[0] if items else None), "partition_query"
+
+        # Use SQL query to find document by claim_id across all partitions
+        items = self._query_items(container, **self._claim_query(claim_id))
+        return (items[0] if items else None), "cross_partition_query"
+
+    def _read_claims(self, container, claim_ids: list) -> dict:
+        """Fetch several claims at once: concurrent point reads, or batched IN queries for other layouts."""
+        if claim_lookup_mode(self._get_partition_key_paths(container)) == "point_read":
+            # Each claim is its own partition, so fan out point reads over the pooled client;
+            # every read runs in a copy of this context so its RU charge lands on the current call
+            contexts = [contextvars.copy_context() for _ in claim_ids]
+            with ThreadPoolExecutor(max_workers=min(len(claim_ids), MAX_CONCURRENT_READS)) as executor:
+                results = executor.map(lambda ctx, claim_id: ctx.run(self._read_claim, container, claim_id), contexts, claim_ids)
+                return self._found_claims(claim_ids, results)
+
+        documents = {}
+        for query in self._claim_batch_queries(claim_ids):
+            self._batch_claims(documents, self._query_items(container, **query))
+        return documents
+
+    def _query_page(self, container, query: str, parameters: list, page_size: int, continuation: str, context: dict, items_key: str, skip: int = 0):
+        """Run one page of a query and return (items, next_page_token), cut to the output budget."""
+        with query_span(self.database_name, self.container_name, query, max_item_count=page_size) as span, measure_requests() as meter:
+            pager = container.query_items(**self._page_query(query, parameters, page_size)).by_page(continuation)
+
+            items = []
+            page_start = continuation
+            for page in pager:
+                items.extend(page)
+                # Cross-partition queries can return empty pages; keep going until something arrives
+                if items:
+                    break
+                page_start = pager.continuation_token
+            set_span_attributes(span, {"db.cosmosdb.item_count": len(items), "db.cosmosdb.request_charge": meter.request_charge})
+
+        return self._cut_page(items, skip, page_start, pager.continuation_token, query, parameters, page_size, context, items_key)
+
     @kernel_function(description="Test Cosmos DB connection and list available claims")
+    @instrumented
     def test_connection(self) -> Annotated[str, "Connection test result and available claims"]:
         """Test the Cosmos DB connection and show what claims are available."""
         try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Test with a simple query to get all claim IDs
-            query = "SELECT c.claim_id, c.id FROM c"
-            items = list(container.query_items(
-                query=query,
-                enable_cross_partition_query=True,
-                max_item_count=10  # Limit to first 10 for testing
-            ))
-            
-            if not items:
-                return f"✅ Connection successful but no documents found in container '{self.container_name}'"
-            
-            claim_ids = [item.get('claim_id', 'N/A') for item in items]
-            result = {
-                "connection_status": "SUCCESS",
-                "database": self.database_name,
-                "container": self.container_name,
-                "documents_found": len(items),
-                "available_claim_ids": claim_ids
-            }
-            
-            return json.dumps(result, indent=2)
-            
+            container = self._get_container()
+
+            # A container metadata read proves connectivity without scanning documents
+            container.read()
+
+            return self._connection_result(self._get_container_stats(container))
+
         except Exception as e:
             return f"❌ Connection test failed: {str(e)}"
-    
-    @kernel_function(description="Retrieve a document by claim_id from Cosmos DB using cross-partition query")
+
+    @kernel_function(description="Retrieve a document by claim_id from Cosmos DB")
+    @instrumented
     def get_document_by_claim_id(
-        self, 
-        claim_id: Annotated[str, "The claim_id to retrieve (not the partition key)"]
+        self,
+        claim_id: Annotated[str, "The claim_id to retrieve"]
     ) -> Annotated[str, "JSON document from Cosmos DB"]:
-        """Retrieve a document by its claim_id using a cross-partition query."""
+        """Retrieve a document by its claim_id, with a point read when claim_id is the partition key."""
         try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Use SQL query to find document by claim_id across all partitions
-            query = "SELECT * FROM c WHERE c.claim_id = @claim_id"
-            parameters = [{"name": "@claim_id", "value": claim_id}]
-            
-            items = list(container.query_items(
-                query=query,
-                parameters=parameters,
-                enable_cross_partition_query=True,
-                max_item_count=1  # We expect only one document with this claim_id
-            ))
-            
-            if not items:
-                # Try to find what claim IDs actually exist
-                all_claims_query = "SELECT c.claim_id FROM c"
-                all_items = list(container.query_items(
-                    query=all_claims_query,
-                    enable_cross_partition_query=True,
-                    max_item_count=10
-                ))
-                available_ids = [item.get('claim_id', 'N/A') for item in all_items]
-                
-                return f"❌ No document found with claim_id '{claim_id}' in container '{self.container_name}'.\n\nAvailable claim IDs: {available_ids}\n\nPlease verify the claim ID exists in the database."
-            
-            # Return the first (and should be only) matching document
-            document = items[0]
-            return json.dumps(document, indent=2, ensure_ascii=False)
-            
+            container = self._get_container()
+            document = self._fetch_claim(container, claim_id)
+
+            if document is None:
+                # Only a miss consults the claim-ID directory, for the closest existing IDs
+                return claim_not_found_message(claim_id, self.container_name, self._suggest_claim_ids(container, claim_id))
+
+            return self._render_document(document)
+
         except Exception as e:
-            error_msg = str(e)
-            if "endpoint and key must be configured" in error_msg:
-                return f"❌ Cosmos DB not configured. Please set COSMOS_ENDPOINT and COSMOS_KEY environment variables. Error: {error_msg}"
-            elif "Unauthorized" in error_msg or "401" in error_msg:
-                return f"❌ Authentication failed. Please check your Cosmos DB credentials. Error: {error_msg}"
-            elif "Forbidden" in error_msg or "403" in error_msg:
-                return f"❌ Access denied. Please check your Cosmos DB permissions. Error: {error_msg}"
-            elif "azure-cosmos package not installed" in error_msg:
-                return f"❌ Missing dependency. Please run: pip install azure-cosmos"
-            else:
-                return f"❌ Error retrieving document by claim_id '{claim_id}': {error_msg}"
-    
+            return self._claim_error(claim_id, e)
+
+    @kernel_function(description="Retrieve several documents by claim_id in one call, e.g. to compare related or recent claims")
+    @instrumented
+    def get_documents_by_claim_ids(
+        self,
+        claim_ids: Annotated[list[str], "The claim_ids to retrieve (up to 50)"]
+    ) -> Annotated[str, "JSON with the documents found and the claim_ids that are missing"]:
+        """Retrieve several claim documents in one tool call instead of one call per claim."""
+        try:
+            claim_ids = normalize_claim_ids(claim_ids)
+            if not claim_ids:
+                return "❌ No claim IDs provided. Please pass one or more claim IDs."
+
+            container = self._get_container()
+
+            documents = self._fresh_claims(claim_ids)
+            missing = [claim_id for claim_id in claim_ids if claim_id not in documents]
+            if missing:
+                documents.update(self._store_claims(self._read_claims(container, missing)))
+
+            suggestions = {claim_id: self._suggest_claim_ids(container, claim_id, limit=3) for claim_id in claim_ids if claim_id not in documents}
+            return self.output.render(bulk_claims_result(claim_ids, documents, self.output, suggestions), "documents")
+
+        except Exception as e:
+            return f"❌ Error retrieving documents for claim_ids {claim_ids}: {str(e)}"
+
     @kernel_function(description="Retrieve a JSON document by partition key and document ID from Cosmos DB")
+    @instrumented
     def get_document_by_id(
-        self, 
+        self,
         document_id: Annotated[str, "The document ID to retrieve"],
         partition_key: Annotated[str, "The partition key value (optional, will use cross-partition query if not provided)"] = None
     ) -> Annotated[str, "JSON document from Cosmos DB"]:
         """Retrieve a specific document by its ID and optionally partition key from Cosmos DB."""
         try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
+            container = self._get_container()
+
             if partition_key:
                 # Direct read using partition key - most efficient
-                item = container.read_item(item=document_id, partition_key=partition_key)
-                return json.dumps(item, indent=2, ensure_ascii=False)
-            else:
-                # Cross-partition query when partition key is unknown
-                query = "SELECT * FROM c WHERE c.id = @document_id"
-                parameters = [{"name": "@document_id", "value": document_id}]
-                
-                items = list(container.query_items(
-                    query=query,
-                    parameters=parameters,
-                    enable_cross_partition_query=True,
-                    max_item_count=1
-                ))
-                
-                if not items:
-                    return f"❌ Document with ID '{document_id}' not found in container '{self.container_name}'"
-                
-                return json.dumps(items[0], indent=2, ensure_ascii=False)
-            
+                return self._render_document(container.read_item(item=document_id, partition_key=partition_key))
+
+            # Cross-partition query when partition key is unknown
+            items = self._query_items(container, **self._document_query(document_id))
+            if not items:
+                return self._document_not_found(document_id)
+            return self._render_document(items[0])
+
         except Exception as e:
-            error_msg = str(e)
-            if "NotFound" in error_msg or "404" in error_msg:
-                return f"❌ Document with ID '{document_id}' not found in container '{self.container_name}'"
-            elif "Unauthorized" in error_msg or "401" in error_msg:
-                return f"❌ Authentication failed. Please check your Cosmos DB credentials."
-            elif "Forbidden" in error_msg or "403" in error_msg:
-                return f"❌ Access denied. Please check your Cosmos DB permissions."
-            else:
-                return f"❌ Error retrieving document: {error_msg}"
-    
-    @kernel_function(description="Query documents with a custom SQL query in Cosmos DB")
+            return self._document_error(document_id, e)
+
+    @kernel_function(description="Query documents with a custom SQL query in Cosmos DB. Results are paginated; pass next_page_token to next_page for more.")
+    @instrumented
     def query_documents(
-        self, 
-        sql_query: Annotated[str, "SQL query to execute (e.g., 'SELECT * FROM c WHERE c.category = \"electronics\"')"]
-    ) -> Annotated[str, "Query results as JSON"]:
-        """Execute a custom SQL query against the Cosmos DB container."""
+        self,
+        sql_query: Annotated[str, "SQL query to execute (e.g., 'SELECT * FROM c WHERE c.category = \"electronics\"')"],
+        page_size: Annotated[int, "Maximum number of documents per page (default: 20, max: 100)"] = DEFAULT_PAGE_SIZE
+    ) -> Annotated[str, "One page of query results as JSON, with next_page_token if more results exist"]:
+        """Execute a custom SQL query against the Cosmos DB container, one page at a time."""
         try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Execute the query
-            items = list(container.query_items(
-                query=sql_query,
-                enable_cross_partition_query=True  # Enable if your query spans partitions
-            ))
-            
-            if not items:
-                return f"🔍 No documents found matching query: {sql_query}"
-            
-            # Return results as formatted JSON
-            result = {
-                "query": sql_query,
-                "count": len(items),
-                "results": items
-            }
-            
-            return json.dumps(result, indent=2, ensure_ascii=False)
-            
+            container = self._get_container()
+            page_size = clamp_page_size(page_size)
+            context = {"query": sql_query}
+
+            items, next_page_token = self._query_page(container, sql_query, None, page_size, None, context, "results")
+            return self._render_page(context, "results", items, page_size, next_page_token, f"🔍 No documents found matching query: {sql_query}")
+
         except Exception as e:
-            error_msg = str(e)
-            if "Syntax error" in error_msg:
-                return f"❌ SQL syntax error in query: {sql_query}\nError: {error_msg}"
-            else:
-                return f"❌ Error executing query: {error_msg}"
-    
+            return self._query_error(sql_query, e)
+
+    @kernel_function(description="Fetch the next page of results using a next_page_token returned by query_documents or search_by_field")
+    @instrumented
+    def next_page(
+        self,
+        page_token: Annotated[str, "The next_page_token from a previous paginated result"]
+    ) -> Annotated[str, "The next page of results as JSON"]:
+        """Continue a paginated query from its stored Cosmos DB continuation token."""
+        cursor = self.cursors.get(page_token)
+        if cursor is None:
+            return self._page_token_expired(page_token)
+
+        try:
+            container = self._get_container()
+
+            items, next_page_token = self._query_page(
+                container,
+                cursor["query"],
+                cursor["parameters"],
+                cursor["page_size"],
+                cursor["continuation"],
+                cursor["context"],
+                cursor["items_key"],
+                cursor["skip"]
+            )
+            return self._render_page(cursor["context"], cursor["items_key"], items, cursor["page_size"], next_page_token)
+
+        except Exception as e:
+            return f"❌ Error fetching next page: {str(e)}"
+
     @kernel_function(description="Get container information and statistics")
+    @instrumented
     def get_container_info(self) -> Annotated[str, "Container information and statistics"]:
         """Get information about the Cosmos DB container."""
         try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Get container properties
-            container_props = container.read()
-            
-            # Get approximate document count (this is an estimate)
-            count_query = "SELECT VALUE COUNT(1) FROM c"
-            count_items = list(container.query_items(
-                query=count_query,
-                enable_cross_partition_query=True
-            ))
-            document_count = count_items[0] if count_items else "Unknown"
-            
-            info = {
-                "database": self.database_name,
-                "container": self.container_name,
-                "partition_key": container_props.get("partitionKey", {}).get("paths", ["Unknown"]),
-                "approximate_document_count": document_count,
-                "indexing_policy": container_props.get("indexingPolicy", {}).get("indexingMode", "Unknown")
-            }
-            
-            return json.dumps(info, indent=2)
-            
+            container = self._get_container()
+
+            # Get container properties (read once per plugin)
+            container_props = self._get_container_properties(container)
+
+            # Counts and sizes are served from memory, kept current by tailing the change feed,
+            # instead of a cross-partition COUNT(1) scan on every call
+            return self._container_info(container_props, self._get_container_stats(container).snapshot())
+
         except Exception as e:
             return f"❌ Error getting container info: {str(e)}"
-    
+
     @kernel_function(description="List recent documents (up to 100) from Cosmos DB")
+    @instrumented
     def list_recent_documents(
-        self, 
+        self,
         limit: Annotated[int, "Maximum number of documents to return (default: 10, max: 100)"] = 10
     ) -> Annotated[str, "List of recent documents"]:
         """List recent documents from the container."""
         try:
-            # Ensure limit is within bounds
-            limit = max(1, min(limit, 100))
-            
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Query for documents (ordered by _ts if available)
-            query = f"SELECT TOP {limit} * FROM c ORDER BY c._ts DESC"
-            
-            items = list(container.query_items(
-                query=query,
-                enable_cross_partition_query=True
-            ))
-            
-            if not items:
-                return "📭 No documents found in the container"
-            
-            result = {
-                "container": self.container_name,
-                "count": len(items),
-                "documents": items
-            }
-            
-            return json.dumps(result, indent=2, ensure_ascii=False)
-            
+            container = self._get_container()
+            return self._recent_documents(self._query_items(container, **self._recent_query(limit)))
+
         except Exception as e:
             return f"❌ Error listing documents: {str(e)}"
-    
-    @kernel_function(description="Search documents by field value")
+
+    @kernel_function(description="Search documents by field value. Results are paginated; pass next_page_token to next_page for more.")
+    @instrumented
     def search_by_field(
-        self, 
+        self,
         field_name: Annotated[str, "The field name to search in (e.g., 'name', 'category', 'status')"],
-        field_value: Annotated[str, "The value to search for"]
-    ) -> Annotated[str, "Documents matching the search criteria"]:
-        """Search for documents where a specific field matches a value."""
+        field_value: Annotated[str, "The value to search for"],
+        page_size: Annotated[int, "Maximum number of documents per page (default: 20, max: 100)"] = DEFAULT_PAGE_SIZE
+    ) -> Annotated[str, "One page of documents matching the search criteria, with next_page_token if more exist"]:
+        """Search for documents where a specific field matches a value, one page at a time."""
         try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Use parameterized query for better security and performance
-            query = f"SELECT * FROM c WHERE c.{field_name} = @field_value"
-            parameters = [{"name": "@field_value", "value": field_value}]
-            
-            items = list(container.query_items(
-                query=query,
-                parameters=parameters,
-                enable_cross_partition_query=True
-            ))
-            
-            if not items:
-                return f"🔍 No documents found where {field_name} = '{field_value}'"
-            
-            result = {
-                "search_criteria": f"{field_name} = '{field_value}'",
-                "count": len(items),
-                "documents": items
-            }
-            
-            return json.dumps(result, indent=2, ensure_ascii=False)
-            
+            container = self._get_container()
+            page_size = clamp_page_size(page_size)
+            query, parameters, context = self._search_query(field_name, field_value)
+
+            items, next_page_token = self._query_page(container, query, parameters, page_size, None, context, "documents")
+            return self._render_page(context, "documents", items, page_size, next_page_token, f"🔍 No documents found where {field_name} = '{field_value}'")
+
         except Exception as e:
             return f"❌ Error searching documents: {str(e)}"
 
 # Create an instance of the real Cosmos DB plugin
-cosmos_plugin = CosmosDBPlugin()
\ No newline at end of file
+cosmos_plugin = CosmosDBPlugin()
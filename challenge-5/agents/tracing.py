@@ -0,0 +1,298 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import context as otel_context, trace
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+except ImportError:
+    otel_context = None
+    trace = None
+    SpanExporter = object
+    SpanExportResult = None
+
+TRACER_NAME = "insurance.orchestration"
+
+
+def get_tracer():
+    """Return the tracer for this package, or None when OpenTelemetry is not installed."""
+    if trace is None:
+        return None
+    return trace.get_tracer(TRACER_NAME)
+
+
+def start_span(name: str, attributes: dict = None, parent=None, start_time: int = None):
+    """Start (but do not activate) a span; returns None without OpenTelemetry."""
+    tracer = get_tracer()
+    if tracer is None:
+        return None
+    context = trace.set_span_in_context(parent) if parent is not None else None
+    return tracer.start_span(name, context=context, attributes=_clean(attributes), start_time=start_time)
+
+
+def end_span(span, attributes: dict = None, error: str = None, end_time: int = None):
+    if span is None:
+        return
+    if attributes:
+        span.set_attributes(_clean(attributes))
+    if error:
+        span.set_status(trace.Status(trace.StatusCode.ERROR, error))
+    span.end(end_time=end_time)
+
+
+def activate(span):
+    """Make span current for code (and tasks) started until deactivate(token)."""
+    if span is None:
+        return None
+    return otel_context.attach(trace.set_span_in_context(span))
+
+
+def deactivate(token):
+    if token is not None:
+        otel_context.detach(token)
+
+
+@contextmanager
+def use_span(span):
+    """
+    activate()/deactivate() as a context manager. Async generators must not keep a span
+    current across a yield (the consumer's context would leak into it), so they use this
+    around the awaits between yields instead.
+    """
+    token = activate(span)
+    try:
+        yield span
+    finally:
+        deactivate(token)
+
+
+def set_span_attributes(span, attributes: dict):
+    if span is not None and attributes:
+        span.set_attributes(_clean(attributes))
+
+
+@contextmanager
+def traced(name: str, attributes: dict = None):
+    """
+    A child span of the current one, current for the block and ended when it exits; an
+    exception marks it as an error. Yields the span (None without OpenTelemetry).
+    """
+    span = start_span(name, attributes)
+    token = activate(span)
+    error = None
+    try:
+        yield span
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        deactivate(token)
+        end_span(span, error=error)
+
+
+class ClientOverlay:
+    """Forwards attribute access to target, except for the attributes given as overrides."""
+
+    def __init__(self, target, **overrides):
+        self._target = target
+        self.__dict__.update(overrides)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+TERMINAL_RUN_STATUSES = ("completed", "failed", "cancelled", "expired", "incomplete")
+
+
+def run_usage_attributes(run) -> dict:
+    usage = getattr(run, "usage", None)
+    return {
+        "gen_ai.usage.input_tokens": getattr(usage, "prompt_tokens", None),
+        "gen_ai.usage.output_tokens": getattr(usage, "completion_tokens", None),
+        "gen_ai.usage.total_tokens": getattr(usage, "total_tokens", None),
+    }
+
+
+def trace_agents_client(client, agent_name: str):
+    """
+    Overlay of an aio AIProjectClient tracing one agent's Agent Service calls, for agents
+    whose run loop belongs to Semantic Kernel: a span per thread creation, an agent_run span
+    per run (the model call) from runs.create until a poll sees it finish, with a run.poll
+    event per runs.get, and a span per tool output submission. Without OpenTelemetry the
+    client is returned as is.
+    """
+    if get_tracer() is None:
+        return client
+    threads, runs = client.agents.threads, client.agents.runs
+    open_runs = {}
+
+    def finish(run, error: str = None):
+        span = open_runs.pop(run.id, None)
+        end_span(span, {"run.status": run.status, **run_usage_attributes(run)}, error=error)
+
+    async def create_thread(*args, **kwargs):
+        with traced("agent_thread.create", {"gen_ai.agent.name": agent_name}) as span:
+            thread = await threads.create(*args, **kwargs)
+            set_span_attributes(span, {"thread.id": thread.id})
+            return thread
+
+    async def create_run(*args, **kwargs):
+        span = start_span("agent_run", {"gen_ai.agent.name": agent_name, "thread.id": kwargs.get("thread_id")})
+        try:
+            run = await runs.create(*args, **kwargs)
+        except Exception as e:
+            end_span(span, error=str(e))
+            raise
+        set_span_attributes(span, {"run.id": run.id, "gen_ai.request.model": getattr(run, "model", None)})
+        open_runs[run.id] = span
+        return run
+
+    async def get_run(*args, **kwargs):
+        run = await runs.get(*args, **kwargs)
+        span = open_runs.get(run.id)
+        if span is not None:
+            span.add_event("run.poll", {"run.status": run.status})
+            if run.status in TERMINAL_RUN_STATUSES:
+                finish(run, None if run.status == "completed" else str(getattr(run, "last_error", None) or run.status))
+        return run
+
+    async def submit_tool_outputs(*args, **kwargs):
+        with traced("agent_run.submit_tool_outputs", {"gen_ai.agent.name": agent_name, "run.id": kwargs.get("run_id")}):
+            return await runs.submit_tool_outputs(*args, **kwargs)
+
+    async def cancel_run(*args, **kwargs):
+        run = await runs.cancel(*args, **kwargs)
+        if kwargs.get("run_id") in open_runs:
+            end_span(open_runs.pop(kwargs["run_id"]), {"run.status": "cancelled"}, error="cancelled")
+        return run
+
+    return ClientOverlay(client, agents=ClientOverlay(
+        client.agents,
+        threads=ClientOverlay(threads, create=create_thread),
+        runs=ClientOverlay(runs, create=create_run, get=get_run, submit_tool_outputs=submit_tool_outputs, cancel=cancel_run),
+    ))
+
+
+def trace_agent(agent):
+    """A copy of a Semantic Kernel AzureAIAgent whose client calls are traced (see trace_agents_client)."""
+    client = getattr(agent, "client", None)
+    if client is None or get_tracer() is None:
+        return agent
+    return agent.model_copy(update={"client": trace_agents_client(client, agent.name)})
+
+
+def _clean(attributes: dict) -> dict:
+    """OpenTelemetry attributes cannot be None; drop those."""
+    return {key: value for key, value in (attributes or {}).items() if value is not None}
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes) -> list:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in (attributes or {}).items()]
+
+
+class OtlpJsonFileExporter(SpanExporter):
+    """
+    Span exporter writing OTLP/JSON (one ExportTraceServiceRequest per line), the same
+    format as the OpenTelemetry Collector's file exporter, so traces can be inspected
+    offline or replayed into any OTLP backend without running a collector.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _encode(self, spans) -> dict:
+        by_resource = {}
+        for span in spans:
+            resource = span.resource
+            scope = span.instrumentation_scope
+            scopes = by_resource.setdefault(id(resource), (resource, {}))[1]
+            scope_key = (scope.name, scope.version) if scope else ("", None)
+            scopes.setdefault(scope_key, []).append(self._encode_span(span))
+
+        return {"resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes(resource.attributes)},
+                "scopeSpans": [
+                    {"scope": {"name": name, **({"version": version} if version else {})}, "spans": encoded}
+                    for (name, version), encoded in scopes.items()
+                ],
+            }
+            for resource, scopes in by_resource.values()
+        ]}
+
+    @staticmethod
+    def _encode_span(span) -> dict:
+        context = span.get_span_context()
+        encoded = {
+            "traceId": format(context.trace_id, "032x"),
+            "spanId": format(context.span_id, "016x"),
+            "name": span.name,
+            # OTLP SpanKind is the SDK enum value + 1 (0 is SPAN_KIND_UNSPECIFIED)
+            "kind": span.kind.value + 1,
+            "startTimeUnixNano": str(span.start_time),
+            "endTimeUnixNano": str(span.end_time),
+            "attributes": _otlp_attributes(span.attributes),
+            "events": [
+                {"timeUnixNano": str(event.timestamp), "name": event.name, "attributes": _otlp_attributes(event.attributes)}
+                for event in span.events
+            ],
+            "status": {"code": span.status.status_code.value, **({"message": span.status.description} if span.status.description else {})},
+        }
+        if span.parent is not None:
+            encoded["parentSpanId"] = format(span.parent.span_id, "016x")
+        return encoded
+
+    def export(self, spans) -> "SpanExportResult":
+        line = json.dumps(self._encode(spans), ensure_ascii=False)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def configure_tracing(service_name: str = "insurance-orchestrator"):
+    """
+    Install a TracerProvider writing OTLP/JSON to OTLP_JSON_TRACES_FILE when that is set.
+    Processes that already configure OpenTelemetry keep their own provider.
+    """
+    path = os.environ.get("OTLP_JSON_TRACES_FILE")
+    if not path:
+        return None
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        print("⚠️ opentelemetry-sdk not installed; trace export disabled")
+        return None
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OtlpJsonFileExporter(path)))
+    trace.set_tracer_provider(provider)
+    print(f"🔭 Writing OTLP/JSON traces to {path}")
+    return provider
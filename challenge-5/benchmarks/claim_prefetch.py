@@ -0,0 +1,94 @@
+"""
+Benchmark: full orchestration with and without orchestrator-side claim prefetch.
+
+Without prefetch, ClaimReviewer and RiskAnalyzer each spend a tool-call round trip
+(model turn + get_document_by_claim_id + model turn) fetching the same claim. With
+prefetch the orchestrator fetches it once and injects it into the task. Both modes
+share the same agents; each mode gets its own runtime so Cosmos DB plugin calls can
+be counted per mode.
+
+Usage (from challenge-5/, with the orchestration's .env configured):
+    python benchmarks/claim_prefetch.py --claim-id CL001 --runs 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent / "deployment"))
+
+from azure.identity.aio import DefaultAzureCredential
+from semantic_kernel.agents.runtime import InProcessRuntime
+
+from orchestration import create_specialized_agents, run_insurance_claim_orchestration
+from agents.container_stats import stop_container_stats
+from agents.cosmos_metrics import get_cosmos_metrics
+from agents.cosmos_pool import close_async_cosmos_pool
+
+load_dotenv(override=True)
+
+
+async def run_mode(agents: dict, claim_id: str, policy_number: str, runs: int, prefetch: bool) -> dict:
+    """Run the orchestration `runs` times in one mode; return latency and tool-call figures."""
+    metrics = get_cosmos_metrics()
+    mode = "prefetch" if prefetch else "tools"
+    token = metrics.begin_run(f"bench-{mode}")
+    runtime = InProcessRuntime()
+    runtime.start()
+    latencies = []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            await run_insurance_claim_orchestration(claim_id, policy_number, agents=agents, runtime=runtime, prefetch=prefetch)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await runtime.stop_when_idle()
+        metrics.end_run(token)
+
+    summary = metrics.pop_run(f"bench-{mode}")
+    agent_calls = sum(s["calls"] for agent, functions in summary.items() if agent != "Orchestrator" for s in functions.values())
+    request_charge = sum(s["request_charge"] for functions in summary.values() for s in functions.values())
+    return {
+        "mode": mode,
+        "mean_s": statistics.mean(latencies),
+        "median_s": statistics.median(latencies),
+        "agent_tool_calls": agent_calls / runs,
+        "request_charge": request_charge / runs,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claim-id", default=os.environ.get("CLAIM_ID", "CL001"))
+    parser.add_argument("--policy-number", default=os.environ.get("POLICY_NUMBER", "LIAB-AUTO-001"))
+    parser.add_argument("--runs", type=int, default=3, help="Orchestrations per mode")
+    args = parser.parse_args()
+
+    results = []
+    try:
+        async with DefaultAzureCredential() as credential:
+            agents, _ = await create_specialized_agents(credential=credential)
+            # One warm-up run so both modes start with warm agents, connections and claim cache
+            await run_insurance_claim_orchestration(args.claim_id, args.policy_number, agents=agents, runtime=None, prefetch=False)
+            for prefetch in (False, True):
+                results.append(await run_mode(agents, args.claim_id, args.policy_number, args.runs, prefetch))
+    finally:
+        stop_container_stats()
+        await close_async_cosmos_pool()
+
+    print(f"\n🏁 {args.runs} orchestrations per mode, claim {args.claim_id}")
+    print(f"{'mode':<10} {'mean (s)':>9} {'median (s)':>11} {'agent Cosmos calls/run':>23} {'RU/run':>8}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['mean_s']:>9.2f} {r['median_s']:>11.2f} {r['agent_tool_calls']:>23.1f} {r['request_charge']:>8.2f}")
+    baseline, prefetched = results
+    print(f"⚡ Prefetch saves {baseline['mean_s'] - prefetched['mean_s']:.2f}s per orchestration ({baseline['mean_s'] / prefetched['mean_s']:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Benchmark: three agents hitting Cosmos DB at the same time, sync vs async plugin.
+
+Each simulated agent runs on the same asyncio loop, exactly like the members of a
+ConcurrentOrchestration, and issues the same sequence of tool calls the
+ClaimReviewer / RiskAnalyzer prompts ask for. The sync plugin blocks the loop
+on every call, so the agents end up serialized; the async plugin lets them overlap.
+
+Usage (from challenge-5/, with COSMOS_ENDPOINT and COSMOS_KEY set):
+    python benchmarks/cosmos_sync_vs_async.py --claim-id CL001 --calls 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from agents.tools import CosmosDBPlugin
+from agents.async_tools import AsyncCosmosDBPlugin
+from agents.cosmos_pool import close_async_cosmos_pool, close_cosmos_pool
+
+load_dotenv(override=True)
+
+AGENT_NAMES = ["ClaimReviewer", "RiskAnalyzer", "PolicyChecker"]
+
+
+async def run_sync_agents(claim_id: str, calls: int) -> float:
+    """Run three agents concurrently against the blocking plugin; return wall-clock seconds."""
+    plugin = CosmosDBPlugin()
+    plugin.get_document_by_claim_id(claim_id)  # warm up the shared client
+
+    async def agent(name: str):
+        for _ in range(calls):
+            # Semantic Kernel invokes sync kernel functions directly on the loop
+            plugin.get_document_by_claim_id(claim_id)
+            plugin.search_by_field("claim_id", claim_id)
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(agent(name) for name in AGENT_NAMES))
+    return time.perf_counter() - start
+
+
+async def run_async_agents(claim_id: str, calls: int) -> float:
+    """Run three agents concurrently against the aio plugin; return wall-clock seconds."""
+    plugin = AsyncCosmosDBPlugin()
+    await plugin.get_document_by_claim_id(claim_id)  # warm up the shared client
+
+    async def agent(name: str):
+        for _ in range(calls):
+            await plugin.get_document_by_claim_id(claim_id)
+            await plugin.search_by_field("claim_id", claim_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(agent(name) for name in AGENT_NAMES))
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claim-id", default=os.environ.get("CLAIM_ID", "CL001"))
+    parser.add_argument("--calls", type=int, default=5, help="Tool-call pairs issued by each agent")
+    args = parser.parse_args()
+
+    print(f"🏁 {len(AGENT_NAMES)} agents x {args.calls} x (get_document_by_claim_id + search_by_field)")
+
+    try:
+        sync_seconds = await run_sync_agents(args.claim_id, args.calls)
+        async_seconds = await run_async_agents(args.claim_id, args.calls)
+    finally:
+        close_cosmos_pool()
+        await close_async_cosmos_pool()
+
+    total_calls = len(AGENT_NAMES) * args.calls * 2
+    print(f"{'plugin':<8} {'wall-clock (s)':>15} {'calls/s':>10}")
+    print(f"{'sync':<8} {sync_seconds:>15.3f} {total_calls / sync_seconds:>10.1f}")
+    print(f"{'async':<8} {async_seconds:>15.3f} {total_calls / async_seconds:>10.1f}")
+    print(f"⚡ Speed-up: {sync_seconds / async_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+Benchmark: orchestration overhead, offline, from a recorded run.
+
+record  runs one live orchestration and saves every member message (model answers,
+        tool calls and the Cosmos DB results they returned) to a fixture file.
+replay  drives the same ConcurrentOrchestration with ReplayAgent stand-ins that
+        replay the fixture with injected latency; no Azure endpoint is contacted.
+        Overhead = wall clock minus the slowest member's scripted (slept) time, i.e.
+        what the runtime, callbacks, deadline collector and report building cost.
+
+Usage (from challenge-5/):
+    python benchmarks/orchestration_replay.py record --claim-id CL001
+    python benchmarks/orchestration_replay.py replay fixtures/replay/CL001.json --runs 20 --scale 0
+    python benchmarks/orchestration_replay.py replay fixtures/replay/CL001.json --model-latency 0.5 --tool-latency 0.02
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent / "deployment"))
+
+from orchestration import create_specialized_agents, run_insurance_claim_orchestration
+from agents.container_stats import stop_container_stats
+from agents.cosmos_pool import close_async_cosmos_pool
+from agents.replay import InjectedLatency, OrchestrationRecorder, load_fixture, replay_agents
+
+load_dotenv(override=True)
+
+
+async def record(args):
+    from azure.identity.aio import DefaultAzureCredential
+
+    recorder = OrchestrationRecorder(args.claim_id, args.policy_number)
+    try:
+        async with DefaultAzureCredential() as credential:
+            agents, _ = await create_specialized_agents(credential=credential)
+            # Prefetch and the result cache would hide tool calls from the recording
+            await run_insurance_claim_orchestration(args.claim_id, args.policy_number, agents=agents, prefetch=False, use_cache=False, recorder=recorder)
+    finally:
+        stop_container_stats()
+        await close_async_cosmos_pool()
+    path = recorder.save(args.output)
+    events = sum(len(events) for events in recorder.members.values())
+    print(f"\n📼 Recorded {events} messages from {len(recorder.members)} agents to {path}")
+
+
+async def replay(args):
+    fixture = load_fixture(args.fixture)
+    latency = InjectedLatency(model_s=args.model_latency, tool_s=args.tool_latency, scale=args.scale)
+    agents = replay_agents(fixture, latency)
+
+    walls, overheads = [], []
+    for run in range(args.runs + 1):
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            await run_insurance_claim_orchestration(fixture["claim_id"], fixture["policy_number"], agents=agents, prefetch=False, use_cache=False)
+        wall = time.perf_counter() - start
+        # The first run warms imports and the runtime; it is not counted
+        if run == 0:
+            continue
+        walls.append(wall)
+        overheads.append(wall - max(agent.scripted_s for agent in agents.values()))
+
+    tool_calls = sum(agent.tools.calls for agent in agents.values())
+    print(f"\n🔁 Replayed {fixture['claim_id']} {args.runs} times (recorded {fixture['recorded_at']})")
+    print(f"   injected latency: model {args.model_latency if args.model_latency is not None else f'recorded x{args.scale:g}'}, "
+          f"tool {args.tool_latency if args.tool_latency is not None else f'recorded x{args.scale:g}'}; {tool_calls} stubbed tool calls")
+    print(f"{'':<14} {'mean (ms)':>10} {'median (ms)':>12} {'p95 (ms)':>10}")
+    for label, values in (("wall clock", walls), ("overhead", overheads)):
+        ordered = sorted(values)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        print(f"{label:<14} {statistics.mean(values) * 1000:>10.1f} {statistics.median(values) * 1000:>12.1f} {p95 * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Record a live orchestration run")
+    record_parser.add_argument("--claim-id", default=os.environ.get("CLAIM_ID", "CL001"))
+    record_parser.add_argument("--policy-number", default=os.environ.get("POLICY_NUMBER", "LIAB-AUTO-001"))
+    record_parser.add_argument("--output", help="Fixture path (default REPLAY_FIXTURE_DIR/<claim id>.json)")
+
+    replay_parser = commands.add_parser("replay", help="Replay a fixture against local stubs")
+    replay_parser.add_argument("fixture")
+    replay_parser.add_argument("--runs", type=int, default=10)
+    replay_parser.add_argument("--scale", type=float, default=1.0, help="Multiply recorded delays (0 = no injected latency)")
+    replay_parser.add_argument("--model-latency", type=float, help="Fixed seconds per model turn instead of the recorded delay")
+    replay_parser.add_argument("--tool-latency", type=float, help="Fixed seconds per tool call instead of the recorded delay")
+    replay_parser.add_argument("--verbose", action="store_true", help="Show the orchestration's own output")
+    args = parser.parse_args()
+
+    asyncio.run(record(args) if args.command == "record" else replay(args))
+
+
+if __name__ == "__main__":
+    main()
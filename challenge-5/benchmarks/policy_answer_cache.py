@@ -0,0 +1,84 @@
+"""
+Benchmark: semantic answer cache in front of the policy checker.
+
+Each group below is one question asked several ways. The first wording of a group is
+a miss (a full agent run with Azure AI Search retrieval); the paraphrases should be
+semantic hits, and questions that differ only in policy type or negation must miss.
+Reports per-query outcome, hit rate, and hit vs miss latency.
+
+Usage (from challenge-5/, with AI_FOUNDRY_PROJECT_ENDPOINT, AZURE_AI_CONNECTION_ID,
+AZURE_OPENAI_ENDPOINT / AZURE_OPENAI_KEY and SEARCH_SERVICE_ENDPOINT / SEARCH_ADMIN_KEY set):
+    python benchmarks/policy_answer_cache.py
+    python benchmarks/policy_answer_cache.py --threshold 0.93
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from agents.async_policy_checker import AsyncPolicyCheckerWrapper
+from agents.semantic_cache import SemanticAnswerCache
+
+load_dotenv(override=True)
+
+QUERY_GROUPS = [
+    [
+        "Is theft covered under a comprehensive auto policy?",
+        "is theft covered under comprehensive?",
+        "Does my comprehensive policy pay out if my car is stolen?",
+        "Comprehensive auto policy: is vehicle theft covered?",
+    ],
+    [
+        "Is theft covered under a liability only policy?",
+        "Does a liability-only policy cover a stolen car?",
+    ],
+    [
+        "Does a motorcycle policy cover passenger medical payments?",
+        "Are a passenger's medical bills covered on a motorcycle policy?",
+        "Are a passenger's medical bills not covered on a motorcycle policy?",
+    ],
+]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=None, help="Similarity threshold (default SEMANTIC_CACHE_THRESHOLD)")
+    args = parser.parse_args()
+
+    cache = SemanticAnswerCache(threshold=args.threshold)
+    checker = AsyncPolicyCheckerWrapper(answer_cache=cache)
+    rows = []
+    try:
+        await checker.setup_agent()
+        for group in QUERY_GROUPS:
+            for query in group:
+                hits = checker.stats["cache_hits"]
+                start = time.perf_counter()
+                await checker.check_policy_coverage(query)
+                elapsed = time.perf_counter() - start
+                rows.append((query, checker.stats["cache_hits"] > hits, elapsed))
+    finally:
+        await checker.close()
+
+    print(f"\n🏁 Semantic answer cache (threshold {cache.threshold})")
+    print(f"{'outcome':<8} {'latency (s)':>11}  query")
+    for query, hit, elapsed in rows:
+        print(f"{'hit' if hit else 'miss':<8} {elapsed:>11.2f}  {query}")
+
+    hit_latencies = [elapsed for _, hit, elapsed in rows if hit]
+    miss_latencies = [elapsed for _, hit, elapsed in rows if not hit]
+    metrics = cache.metrics()
+    print(f"\n📊 hit rate {metrics['hit_rate']:.0%} ({metrics['exact_hits']} exact, {metrics['semantic_hits']} semantic, {metrics['misses']} misses); "
+          f"embedding avg {metrics['embed_ms_avg']:.0f} ms; index version {metrics['index_version']}")
+    if hit_latencies and miss_latencies:
+        print(f"⏱️ median latency: hit {statistics.median(hit_latencies):.2f}s vs miss {statistics.median(miss_latencies):.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Benchmark: cold import and startup cost of the sync policy checker plugin.
+
+import   wall time of `import agents.policy_checker` in a fresh interpreter, split into
+         semantic_kernel (paid by any importer of a kernel plugin) and the plugin module
+         itself. The module only builds an unconnected PolicyCheckerWrapper.
+startup  first setup_agent() call: credential, client, and the registry lookup that
+         reuses an existing policy-checker-wrapper agent (or creates one). The second
+         call shows that setup is idempotent.
+
+Usage (from challenge-5/, with AI_FOUNDRY_PROJECT_ENDPOINT and AZURE_AI_CONNECTION_ID set):
+    python benchmarks/policy_checker_startup.py --imports 5
+    python benchmarks/policy_checker_startup.py --imports 5 --no-startup
+    python benchmarks/policy_checker_startup.py --fresh-registry
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+load_dotenv(override=True)
+
+IMPORT_PROBE = (
+    "import time; t = time.perf_counter(); import semantic_kernel.functions; sk = time.perf_counter() - t; "
+    "import agents.policy_checker; print(sk, time.perf_counter() - t)"
+)
+
+
+def measure_import() -> tuple:
+    """(semantic_kernel, total) seconds, in a new interpreter so nothing is already imported."""
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    sk, total = output.stdout.strip().splitlines()[-1].split()
+    return float(sk), float(total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imports", type=int, default=5, help="Cold imports to time")
+    parser.add_argument("--no-startup", action="store_true", help="Only time the import (no Azure calls)")
+    parser.add_argument("--fresh-registry", action="store_true", help="Start from an empty local agent registry, "
+                        "so the agent has to be found in the project by name and definition hash")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.imports)]
+    rows = [
+        ("import", statistics.median(total for _, total in imports), f"median of {len(imports)}"),
+        ("  of which sk", statistics.median(sk for sk, _ in imports), "semantic_kernel.functions"),
+        ("  plugin", statistics.median(total - sk for sk, total in imports), "agents.policy_checker on top of it"),
+    ]
+
+    if not args.no_startup:
+        if args.fresh_registry:
+            os.environ["AGENT_REGISTRY_PATH"] = os.path.join(tempfile.mkdtemp(), "agent_registry.json")
+        from agents.agent_registry import get_agent_registry
+        from agents.policy_checker import PolicyCheckerWrapper
+
+        start = time.perf_counter()
+        checker = PolicyCheckerWrapper()
+        rows.append(("construct", time.perf_counter() - start, "no Azure calls"))
+
+        checker.setup_agent()
+        outcome = ", ".join(f"{k} {v}" for k, v in get_agent_registry().stats().items() if v)
+        rows.append(("first setup", checker.startup_s, f"agent {checker.agent.id}; registry: {outcome}"))
+
+        start = time.perf_counter()
+        checker.setup_agent()
+        rows.append(("second setup", time.perf_counter() - start, "already initialized"))
+
+    print("\n🏁 Policy checker cold start")
+    print(f"{'step':<13} {'time (s)':>9}  notes")
+    for step, seconds, notes in rows:
+        print(f"{step:<13} {seconds:>9.3f}  {notes}")
+
+
+if __name__ == "__main__":
+    main()
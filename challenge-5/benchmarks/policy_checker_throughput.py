@@ -0,0 +1,134 @@
+"""
+Benchmark: N policy coverage checks, sync wrapper vs async wrapper.
+
+The sync PolicyCheckerWrapper blocks inside the event loop for a whole Agent Service
+run, so checks issued from async code run one after another and nothing else on the
+loop makes progress. AsyncPolicyCheckerWrapper awaits every call, so N checks overlap
+(up to --concurrency runs in flight). A heartbeat task ticking every 50 ms records the
+longest event-loop stall in each mode.
+
+Usage (from challenge-5/, with AI_FOUNDRY_PROJECT_ENDPOINT and AZURE_AI_CONNECTION_ID set):
+    python benchmarks/policy_checker_throughput.py --checks 12 --concurrency 1,4,12
+    python benchmarks/policy_checker_throughput.py --checks 6 --sync
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from agents.async_policy_checker import AsyncPolicyCheckerWrapper
+
+load_dotenv(override=True)
+
+QUERIES = [
+    "Is theft covered under a comprehensive auto policy?",
+    "What is the deductible for collision damage on a commercial auto policy?",
+    "Does a liability only policy cover damage to my own vehicle?",
+    "Are aftermarket parts covered on a high value vehicle policy?",
+    "Is a passenger covered for medical payments under a motorcycle policy?",
+    "What exclusions apply to rental vehicles under a comprehensive policy?",
+]
+
+
+async def heartbeat(stalls: list, interval: float = 0.05):
+    """Record how late each tick fires; a blocked loop shows up as a long stall."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+
+
+async def timed(check, query: str) -> float:
+    start = time.perf_counter()
+    await check(query)
+    return time.perf_counter() - start
+
+
+async def run_mode(label: str, checks: list, run_all) -> dict:
+    stalls = []
+    ticker = asyncio.create_task(heartbeat(stalls))
+    start = time.perf_counter()
+    try:
+        latencies = await run_all(checks)
+    finally:
+        ticker.cancel()
+    wall = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "mode": label,
+        "wall_s": wall,
+        "checks_per_min": len(checks) / wall * 60,
+        "p50_s": statistics.median(ordered),
+        "p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max_stall_ms": max(stalls, default=0.0) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=12, help="Coverage checks per mode")
+    parser.add_argument("--concurrency", default="1,4,12", help="Comma-separated async concurrency levels")
+    parser.add_argument("--sync", action="store_true", help="Also run the sync wrapper")
+    parser.add_argument("--search-mode", choices=("remote", "local"), default=None,
+                        help="Policy retrieval: Azure AI Search or the in-process index (default POLICY_SEARCH_MODE)")
+    args = parser.parse_args()
+
+    checks = [QUERIES[i % len(QUERIES)] for i in range(args.checks)]
+    results = []
+
+    if args.sync:
+        from agents.policy_checker import PolicyCheckerWrapper
+        # The queries repeat, so the answer cache is off: every check is a real agent run
+        sync_checker = PolicyCheckerWrapper(use_cache=False, search_mode=args.search_mode)
+        # Connect up front so the first timed check does not include startup
+        sync_checker.setup_agent()
+
+        async def run_sync(queries):
+            async def check(query):
+                # Called from a coroutine, exactly as an orchestration plugin call would be
+                sync_checker.check_policy_coverage(query)
+            return [await timed(check, query) for query in queries]
+
+        results.append(await run_mode("sync", checks, run_sync))
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    checker = AsyncPolicyCheckerWrapper(concurrency=max(levels), use_cache=False, search_mode=args.search_mode)
+    try:
+        await checker.setup_agent()
+        for level in levels:
+            slots = asyncio.Semaphore(level)
+
+            async def check(query):
+                async with slots:
+                    return await checker.check_policy_coverage(query)
+
+            async def run_async(queries):
+                return await asyncio.gather(*(timed(check, query) for query in queries))
+
+            failures = checker.stats["failures"]
+            results.append(await run_mode(f"async x{level}", checks, run_async))
+            if checker.stats["failures"] > failures:
+                print(f"⚠️ async x{level}: {checker.stats['failures'] - failures} of {len(checks)} checks failed")
+        thread_metrics = checker.metrics()["threads"]
+    finally:
+        await checker.close()
+
+    print(f"\n🏁 {args.checks} policy coverage checks per mode")
+    print(f"{'mode':<10} {'wall (s)':>9} {'checks/min':>11} {'p50 (s)':>8} {'p95 (s)':>8} {'max loop stall (ms)':>20}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['wall_s']:>9.1f} {r['checks_per_min']:>11.1f} {r['p50_s']:>8.1f} {r['p95_s']:>8.1f} {r['max_stall_ms']:>20.0f}")
+    print(
+        f"\n🧵 Agent threads: {thread_metrics['created']} created, {thread_metrics['reused']} reused "
+        f"(reuse rate {thread_metrics['reuse_rate']:.0%}), creation avg {thread_metrics['creation_ms_avg']:.0f} ms / "
+        f"max {thread_metrics['creation_ms_max']:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
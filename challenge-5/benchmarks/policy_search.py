@@ -0,0 +1,131 @@
+"""
+Benchmark: in-process hybrid policy retrieval vs the remote insurance-documents-index.
+
+Every query below is labelled with the policy file and a phrase from the passage that
+answers it. For each retrieval mode (bm25, vector, hybrid RRF) the benchmark reports:
+file recall@1 / @3 (the right policy is among the top chunks), passage recall@3 (the
+answering phrase is in one of the top 3 chunks, the top_k the policy checker agent
+uses), and per-query latency. Unless the index was built with Azure OpenAI embeddings,
+"vector" is hashed lexical features, not semantic similarity. --remote runs the same queries against Azure AI Search
+(simple query type, top 3, like the agent's AzureAISearchTool) for comparison.
+
+Usage (from challenge-5/):
+    python benchmarks/policy_search.py
+    python benchmarks/policy_search.py --rebuild --repeat 2000
+    python benchmarks/policy_search.py --remote          # needs SEARCH_SERVICE_ENDPOINT / SEARCH_ADMIN_KEY
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from agents.policy_definition import POLICY_INDEX_NAME
+from agents.policy_search import PolicySearchIndex, get_policy_search_index, policy_corpus_dir, policy_search_index_path
+
+load_dotenv(override=True)
+
+# (query, policy file, phrase from the answering passage)
+LABELLED_QUERIES = [
+    ("Is theft covered under a comprehensive auto policy?", "comprehensive_auto_policy.md", "Theft of the entire vehicle or parts"),
+    ("What is the deductible for comprehensive claims on the comprehensive auto policy?", "comprehensive_auto_policy.md", "Comprehensive: $250"),
+    ("How much rental car reimbursement do I get while my car is repaired?", "comprehensive_auto_policy.md", "Up to $30 per day"),
+    ("Does a liability only policy cover damage to my own vehicle?", "liability_only_policy.md", "Collision damage to your vehicle"),
+    ("What are the state minimum bodily injury limits for liability only coverage?", "liability_only_policy.md", "$25,000 per person"),
+    ("Is a passenger covered for medical payments under a motorcycle policy?", "motorcycle_policy.md", "Medical expenses for rider and passenger"),
+    ("Are helmets and riding jackets covered on my motorcycle?", "motorcycle_policy.md", "Helmets and protective headgear"),
+    ("What do I need to file a claim for a stolen motorcycle?", "motorcycle_policy.md", "Police report required immediately"),
+    ("Are aftermarket parts covered on a high value vehicle policy?", "high_value_vehicle_policy.md", "Aftermarket performance parts"),
+    ("Is my classic car insured for an agreed value without depreciation?", "high_value_vehicle_policy.md", "Pre-agreed vehicle value with no depreciation"),
+    ("Am I covered for track days and driving schools in my supercar?", "high_value_vehicle_policy.md", "Organized track events and driving schools"),
+    ("Are employees' personal cars covered when used for business errands?", "commercial_auto_policy.md", "Employee personal vehicles used for business purposes"),
+    ("What is the collision deductible on a commercial auto policy?", "commercial_auto_policy.md", "Collision: $1,000 per incident"),
+    ("Does the commercial policy cover pollution liability?", "commercial_auto_policy.md", "Pollution liability (requires separate coverage)"),
+]
+
+MODES = ("bm25", "vector", "hybrid")
+
+
+def score(hits: list, file_name: str, phrase: str) -> dict:
+    stems = [Path(hit.get("file_name") or "").stem for hit in hits]
+    expected = Path(file_name).stem
+    return {
+        "file@1": bool(stems) and stems[0] == expected,
+        "file@3": expected in stems[:3],
+        "passage@3": any(phrase.lower() in (hit.get("content") or "").lower() for hit in hits[:3]),
+    }
+
+
+def evaluate(search, repeat: int) -> dict:
+    """Run every labelled query through search(query) -> hits; returns recall and latency."""
+    outcomes, latencies = [], []
+    for query, file_name, phrase in LABELLED_QUERIES:
+        hits = search(query)
+        outcomes.append(score(hits, file_name, phrase))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            search(query)
+        latencies.append((time.perf_counter() - start) / max(repeat, 1))
+    ordered = sorted(latencies)
+    return {
+        **{key: sum(o[key] for o in outcomes) / len(outcomes) for key in ("file@1", "file@3", "passage@3")},
+        "p50_us": statistics.median(ordered) * 1e6,
+        "max_us": ordered[-1] * 1e6,
+    }
+
+
+def remote_search():
+    from azure.core.credentials import AzureKeyCredential
+    from azure.search.documents import SearchClient
+
+    client = SearchClient(
+        endpoint=os.environ["SEARCH_SERVICE_ENDPOINT"],
+        index_name=POLICY_INDEX_NAME,
+        credential=AzureKeyCredential(os.environ["SEARCH_ADMIN_KEY"]),
+    )
+
+    def search(query):
+        return [dict(result) for result in client.search(search_text=query, top=3, query_type="simple")]
+
+    return search
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index file from the policy markdown first")
+    parser.add_argument("--repeat", type=int, default=1000, help="Timed repetitions per query (local modes)")
+    parser.add_argument("--remote", action="store_true", help="Also query the remote Azure AI Search index")
+    parser.add_argument("--remote-repeat", type=int, default=3, help="Timed repetitions per query (remote)")
+    args = parser.parse_args()
+
+    path = policy_search_index_path()
+    if args.rebuild:
+        start = time.perf_counter()
+        PolicySearchIndex.build(path, policy_corpus_dir())
+        print(f"📚 Built {path} in {time.perf_counter() - start:.2f}s")
+
+    # Builds the file if it is missing or stale; then time a fresh memory-mapped load
+    index = get_policy_search_index()
+    start = time.perf_counter()
+    PolicySearchIndex.load(path)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"📇 {len(index.chunks)} chunks, {len(index.vocab)} terms, {index.header['embedder']} vectors "
+          f"(dim {index.header['dim']}), {os.path.getsize(path) / 1024:.0f} KiB, load (mmap) {load_ms:.1f} ms")
+
+    rows = [(mode, evaluate(lambda q, mode=mode: index.search(q, top_k=3, mode=mode), args.repeat)) for mode in MODES]
+    if args.remote:
+        rows.append(("remote", evaluate(remote_search(), args.remote_repeat)))
+
+    print(f"\n🏁 {len(LABELLED_QUERIES)} labelled policy queries, top 3")
+    print(f"{'mode':<8} {'file@1':>7} {'file@3':>7} {'passage@3':>10} {'p50 (µs)':>10} {'max (µs)':>10}")
+    for mode, r in rows:
+        print(f"{mode:<8} {r['file@1']:>7.0%} {r['file@3']:>7.0%} {r['passage@3']:>10.0%} {r['p50_us']:>10.0f} {r['max_us']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
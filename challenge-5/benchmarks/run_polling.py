@@ -0,0 +1,109 @@
+"""
+Benchmark: detection latency and runs.get calls per agent run, per polling schedule.
+
+A run is only seen as finished on the first poll at or after it completes, so every
+schedule adds some latency on top of the run itself and costs one runs.get per poll.
+The offline mode replays each schedule against a range of run durations (each one
+averaged over a one-second window, so round numbers don't flatter fixed intervals):
+  fixed-1s    runs.create_and_process (the policy checker's previous loop)
+  sk-default  Semantic Kernel's RunPollingOptions (250 ms x3, then 1 s)
+  adaptive    AdaptiveRunPollingOptions as configured by RUN_POLLING_* for --agent
+With --live N it also runs the orchestration N times and reports the polls each
+agent actually made.
+
+Usage (from challenge-5/):
+    python benchmarks/run_polling.py --durations 0.5,1,2,4,8,15,30
+    python benchmarks/run_polling.py --live 3 --claim-id CL001
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent / "deployment"))
+
+from semantic_kernel.agents.open_ai.run_polling_options import RunPollingOptions
+
+from agents.run_polling import get_run_polling_stats, run_polling_options, simulate_polling
+
+load_dotenv(override=True)
+
+
+def schedules(agent: str) -> dict:
+    sk_default = RunPollingOptions()
+    adaptive = run_polling_options(agent)
+    return {
+        "fixed-1s": lambda iteration: 1.0,
+        "sk-default": lambda iteration: sk_default.get_polling_interval(iteration).total_seconds(),
+        # interval_seconds() rather than get_polling_interval(), which would count simulated polls
+        "adaptive": adaptive.interval_seconds,
+    }
+
+
+def averaged(schedule, duration: float, samples: int = 50) -> dict:
+    runs = [simulate_polling(schedule, duration + k / samples) for k in range(samples)]
+    return {
+        "polls": statistics.mean(r["polls"] for r in runs),
+        "added_latency_s": statistics.mean(r["added_latency_s"] for r in runs),
+    }
+
+
+def run_offline(durations: list, agent: str):
+    results = {name: [averaged(schedule, duration) for duration in durations] for name, schedule in schedules(agent).items()}
+
+    header = f"{'run (s)':>8} " + " ".join(f"{name + ' +ms/polls':>22}" for name in results)
+    print(f"\n⏱️ Added latency (ms) and runs.get calls per run, agent {agent}")
+    print(header)
+    for i, duration in enumerate(durations):
+        cells = " ".join(f"{r[i]['added_latency_s'] * 1000:>14.0f} / {r[i]['polls']:>5.1f}" for r in results.values())
+        print(f"{duration:>8g} {cells}")
+    print(f"{'mean':>8} " + " ".join(
+        f"{statistics.mean(x['added_latency_s'] for x in r) * 1000:>14.0f} / {statistics.mean(x['polls'] for x in r):>5.1f}"
+        for r in results.values()
+    ))
+
+
+async def run_live(runs: int, claim_id: str, policy_number: str):
+    from azure.identity.aio import DefaultAzureCredential
+
+    from orchestration import create_specialized_agents, run_insurance_claim_orchestration
+    from agents.container_stats import stop_container_stats
+    from agents.cosmos_pool import close_async_cosmos_pool
+
+    try:
+        async with DefaultAzureCredential() as credential:
+            agents, _ = await create_specialized_agents(credential=credential)
+            get_run_polling_stats().reset()
+            for _ in range(runs):
+                await run_insurance_claim_orchestration(claim_id, policy_number, agents=agents, use_cache=False)
+    finally:
+        stop_container_stats()
+        await close_async_cosmos_pool()
+
+    print(f"\n📡 Live polling over {runs} orchestrations (a run per agent turn, including tool-call turns)")
+    print(f"{'agent':<16} {'runs':>5} {'polls':>6} {'polls/run':>10} {'sleep (s)':>10}")
+    for agent, stats in get_run_polling_stats().snapshot().items():
+        print(f"{agent:<16} {stats['runs']:>5} {stats['polls']:>6} {stats['polls_per_run']:>10} {stats['wait_s']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", default="0.5,1,2,3,5,8,13,21,34", help="Comma-separated run durations in seconds")
+    parser.add_argument("--agent", default="PolicyChecker", help="Agent whose RUN_POLLING settings are simulated")
+    parser.add_argument("--live", type=int, default=0, help="Also run N live orchestrations")
+    parser.add_argument("--claim-id", default=os.environ.get("CLAIM_ID", "CL001"))
+    parser.add_argument("--policy-number", default=os.environ.get("POLICY_NUMBER", "LIAB-AUTO-001"))
+    args = parser.parse_args()
+
+    run_offline([float(d) for d in args.durations.split(",") if d.strip()], args.agent)
+    if args.live:
+        asyncio.run(run_live(args.live, args.claim_id, args.policy_number))
+
+
+if __name__ == "__main__":
+    main()
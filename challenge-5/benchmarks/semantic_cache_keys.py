@@ -0,0 +1,89 @@
+"""
+Regression check: semantic answer cache keys and discriminators (offline, no Azure calls).
+
+Every question below differs from the others in its group only by a term the embedding
+barely sees: the policy number, policy type or a negation. The check uses an embedder
+that maps every question to the same vector (similarity 1.0, the worst case), stores an
+answer for each question in turn, and fails if any question is answered with another
+question's cached answer. Exits non-zero on failure.
+
+Usage (from challenge-5/):
+    python benchmarks/semantic_cache_keys.py
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from agents.semantic_cache import SemanticAnswerCache, discriminators, normalize_query
+
+DISTINCT_GROUPS = [
+    [
+        "Is theft covered under policy LIAB-AUTO-001?",
+        "Is theft covered under policy COMP-AUTO-001?",
+        "Is theft covered under policy HV-AUTO-001?",
+        "Is theft covered under policy COMM-AUTO-001?",
+        "Is theft covered under policy MOTO-001?",
+        "Is theft covered under policy comp-auto-002?",
+    ],
+    [
+        "Is theft covered under a comprehensive auto policy?",
+        "Is theft covered under a liability only policy?",
+        "Is theft not covered under a comprehensive auto policy?",
+    ],
+]
+
+# Wordings that must still share one entry
+SAME_GROUPS = [
+    ["Is theft covered under policy LIAB-AUTO-001?", "is theft covered under policy liab-auto-001"],
+]
+
+
+class ConstantEmbedder:
+    """Every text gets the same embedding, so only keys and discriminators keep answers apart."""
+
+    def embed(self, text: str) -> np.ndarray:
+        return np.ones(8, dtype=np.float32)
+
+
+def check() -> list:
+    failures = []
+    for group in DISTINCT_GROUPS:
+        cache = SemanticAnswerCache(embedder=ConstantEmbedder(), max_entries=64, threshold=0.95, ttl_seconds=0)
+        for query in group:
+            probe = cache.lookup(query)
+            if probe.answer is not None:
+                failures.append(f"{query!r} was answered with {probe.answer!r}")
+            cache.store(probe, f"answer for {query}")
+        keys = [normalize_query(query) for query in group]
+        if len(set(keys)) != len(keys) or len({discriminators(key) for key in keys}) != len(keys):
+            failures.append(f"keys or discriminators collide: {keys}")
+    for group in SAME_GROUPS:
+        cache = SemanticAnswerCache(embedder=ConstantEmbedder(), max_entries=64, threshold=0.95, ttl_seconds=0)
+        first = cache.lookup(group[0])
+        cache.store(first, "shared answer")
+        for query in group[1:]:
+            if cache.lookup(query).answer != "shared answer":
+                failures.append(f"{query!r} missed the entry for {group[0]!r}")
+    return failures
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    # Pin the index version so the check never reaches Azure AI Search
+    os.environ["POLICY_INDEX_VERSION"] = "semantic-cache-keys"
+
+    failures = check()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"✅ {sum(len(g) for g in DISTINCT_GROUPS)} distinct and {sum(len(g) for g in SAME_GROUPS)} equivalent questions keyed correctly")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Batch claim processing: run the insurance orchestration over many (claim_id, policy_number)
+rows with bounded concurrency, sharing one credential, one set of agents and one runtime.
+
+Input is JSONL or CSV (with a claim_id,policy_number header), from a file or stdin ("-").
+Results are appended to a JSONL file as each claim finishes; that file doubles as the
+checkpoint, so re-running the same command skips claims that already succeeded.
+
+    python batch.py claims.csv --output results.jsonl --concurrency 4
+    cat claims.jsonl | python batch.py - --output results.jsonl
+"""
+import os
+import sys
+import csv
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+from azure.identity.aio import DefaultAzureCredential
+from semantic_kernel.agents.runtime import InProcessRuntime
+
+# Same layout handling as orchestration.py: agents/ sits next to this file in the image
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from orchestration import create_specialized_agents, run_insurance_claim_orchestration
+from agents.container_stats import stop_container_stats
+from agents.cosmos_metrics import configure_metrics_export, get_cosmos_metrics
+from agents.tracing import configure_tracing
+from agents.cosmos_pool import close_async_cosmos_pool
+
+
+def detect_format(path: str, first_line: str) -> str:
+    """Pick jsonl or csv from the file extension, or from the first line for stdin."""
+    suffix = Path(path).suffix.lower() if path != "-" else ""
+    if suffix in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    return "jsonl" if first_line.lstrip().startswith("{") else "csv"
+
+
+def read_rows(path: str, input_format: str = "auto") -> list:
+    """Read (claim_id, policy_number) rows; rows without a claim_id are skipped."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            lines = f.read().splitlines()
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return []
+
+    if input_format == "auto":
+        input_format = detect_format(path, lines[0])
+    records = [json.loads(line) for line in lines] if input_format == "jsonl" else list(csv.DictReader(lines))
+
+    rows = []
+    for number, record in enumerate(records, 1):
+        claim_id = str(record.get("claim_id") or "").strip()
+        if not claim_id:
+            print(f"⚠️ Skipping row {number}: no claim_id")
+            continue
+        rows.append((claim_id, str(record.get("policy_number") or "").strip()))
+    return rows
+
+
+def completed_rows(output_path: str) -> set:
+    """Rows that already succeeded according to an existing output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            if record.get("status") == "ok":
+                done.add((record["claim_id"], record["policy_number"]))
+    return done
+
+
+async def run_batch(rows: list, output_path: str, concurrency: int) -> dict:
+    """Process rows with at most `concurrency` orchestrations in flight; return counters."""
+    queue = asyncio.Queue()
+    for row in rows:
+        queue.put_nowait(row)
+    counts = {"ok": 0, "error": 0}
+    metrics = get_cosmos_metrics()
+    batch_id = f"batch-{uuid.uuid4().hex[:8]}"
+    started = time.perf_counter()
+
+    async with DefaultAzureCredential() as credential:
+        agents, client = await create_specialized_agents(credential=credential)
+
+        # Every orchestration shares this runtime, so Cosmos DB costs roll up per batch
+        run_token = metrics.begin_run(batch_id)
+        runtime = InProcessRuntime()
+        runtime.start()
+
+        with open(output_path, "a", encoding="utf-8") as output:
+
+            async def worker():
+                while True:
+                    try:
+                        claim_id, policy_number = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    row_started = time.perf_counter()
+                    record = {"claim_id": claim_id, "policy_number": policy_number}
+                    try:
+                        analysis = await run_insurance_claim_orchestration(claim_id, policy_number, agents=agents, runtime=runtime)
+                        record.update(status="ok", analysis=analysis)
+                    except Exception as e:
+                        record.update(status="error", error=str(e))
+                    record["duration_s"] = round(time.perf_counter() - row_started, 2)
+                    record["finished_at"] = datetime.now(timezone.utc).isoformat()
+                    counts[record["status"]] += 1
+                    # One line per claim, flushed right away: this file is the resume checkpoint
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+                    print(f"📦 [{counts['ok'] + counts['error']}/{len(rows)}] {claim_id}: {record['status']} in {record['duration_s']}s")
+
+            try:
+                await asyncio.gather(*(worker() for _ in range(min(concurrency, len(rows)))))
+            finally:
+                await runtime.stop_when_idle()
+                metrics.end_run(run_token)
+
+    print(f"\n💰 Cosmos DB cost/latency for {batch_id} ({(time.perf_counter() - started):.1f}s wall clock):")
+    print(metrics.format_summary(metrics.pop_run(batch_id)))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the insurance claim orchestration over a batch of claims.")
+    parser.add_argument("input", help="JSONL or CSV file with claim_id and policy_number, or - for stdin")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL results file, also used to resume")
+    parser.add_argument("--format", choices=["auto", "jsonl", "csv"], default="auto", help="Input format (default: from extension)")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("BATCH_CONCURRENCY", "4")), help="Orchestrations in flight at once")
+    parser.add_argument("--no-resume", action="store_true", help="Process every row even if it already succeeded")
+    args = parser.parse_args()
+
+    rows = read_rows(args.input, args.format)
+    if not args.no_resume:
+        done = completed_rows(args.output)
+        if done:
+            print(f"⏭️ Resuming: {len([row for row in rows if row in done])} claims already processed")
+        rows = [row for row in rows if row not in done]
+    # Duplicate rows in the input are processed once
+    rows = list(dict.fromkeys(rows))
+
+    if not rows:
+        print("✅ Nothing to process.")
+        return
+
+    print(f"🚀 Processing {len(rows)} claims with concurrency {max(1, args.concurrency)}")
+    configure_metrics_export()
+    tracer_provider = configure_tracing("insurance-batch")
+
+    async def run():
+        try:
+            return await run_batch(rows, args.output, max(1, args.concurrency))
+        finally:
+            stop_container_stats()
+            await close_async_cosmos_pool()
+            if tracer_provider:
+                tracer_provider.shutdown()
+
+    counts = asyncio.run(run())
+    print(f"\n✅ Batch complete: {counts['ok']} succeeded, {counts['error']} failed. Results in {args.output}")
+    if counts["error"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,8 @@ LOCATION="swedencentral"
 ACR_NAME="" #FILL
 IMAGE_NAME="insurance-orchestrator:latest"
 CONTAINER_APP_NAME="" #FILL
-DOCKERFILE_PATH="."
+BUILD_CONTEXT=".."  # challenge-5/, so the image can include the shared agents/ package
+DOCKERFILE_PATH="deployment/Dockerfile"
 
 echo "🚀 Starting deployment to Azure Container Apps..."
 
@@ -17,7 +18,7 @@ az group create --name $RESOURCE_GROUP --location $LOCATION
 
 # Build Docker image and push to ACR
 echo "🔨 Building and pushing Docker image to ACR..."
-az acr build --registry $ACR_NAME --image $IMAGE_NAME $DOCKERFILE_PATH
+az acr build --registry $ACR_NAME --image $IMAGE_NAME --file $DOCKERFILE_PATH $BUILD_CONTEXT
 
 # Get ACR login server
 ACR_LOGIN_SERVER=$(az acr show --name $ACR_NAME --query loginServer --output tsv)
@@ -42,6 +43,7 @@ az containerapp create \
   --registry-password $(az acr credential show --name $ACR_NAME --query passwords[0].value --output tsv) \
   --cpu 1.0 --memory 2.0Gi \
   --min-replicas 0 --max-replicas 1 \
+  --ingress external --target-port 8000 \
   --env-vars \
     AI_FOUNDRY_PROJECT_ENDPOINT="YOUR_AI_FOUNDRY_PROJECT_ENDPOINT" \
     MODEL_DEPLOYMENT_NAME="YOUR_MODEL_DEPLOYMENT_NAME" \
@@ -81,5 +83,6 @@ az role assignment create \
 echo "✅ Container App '$CONTAINER_APP_NAME' created successfully!"
 echo "🔗 Image: $ACR_LOGIN_SERVER/$IMAGE_NAME"
 echo "🔑 Managed Identity: $PRINCIPAL_ID"
-echo "To update with different claim/policy parameters, use:"
-echo "az containerapp update --name $CONTAINER_APP_NAME --resource-group $RESOURCE_GROUP --set-env-vars CLAIM_ID=your-claim-id POLICY_NUMBER=your-policy-number"
\ No newline at end of file
+APP_FQDN=$(az containerapp show --name $CONTAINER_APP_NAME --resource-group $RESOURCE_GROUP --query properties.configuration.ingress.fqdn --output tsv)
+echo "To assess a claim, use:"
+echo "curl -X POST https://$APP_FQDN/claims/CL001/assess -H 'Content-Type: application/json' -d '{\"policy_number\": \"LIAB-AUTO-001\"}'"
\ No newline at end of file
@@ -56,7 +56,8 @@ fi
 
 echo ""
 echo "3️⃣ Building Docker image..."
-if docker build -t insurance-orchestrator . ; then
+# Build from challenge-5/ so the image can include the shared agents/ package
+if docker build -t insurance-orchestrator -f Dockerfile .. ; then
     echo "✅ Docker image built successfully"
 else
     echo "❌ Docker build failed"
@@ -86,4 +87,7 @@ echo "  insurance-orchestrator"
 echo ""
 echo "Replace all YOUR_* values with the actual values from your .env file"
 echo ""
+echo "Once http://localhost:8080/readyz returns 200, assess a claim with:"
+echo "curl -X POST http://localhost:8080/claims/CL001/assess -H 'Content-Type: application/json' -d '{\"policy_number\": \"LIAB-AUTO-001\"}'"
+echo ""
 echo "🎯 After successful local testing, update container-apps.sh with your credentials and deploy to Azure!"
@@ -1,346 +1,89 @@
 import asyncio
 import os
+import sys
 import time
 import asyncio
 import json
+import uuid
+from contextlib import aclosing, nullcontext
 from typing import Dict, Any
 from datetime import timedelta
+from pathlib import Path
 from azure.identity.aio import DefaultAzureCredential
 from semantic_kernel.agents import (
     AzureAIAgent, 
     ConcurrentOrchestration
 )
 from semantic_kernel.agents.runtime import InProcessRuntime
-from semantic_kernel.agents.open_ai.run_polling_options import RunPollingOptions
 from azure.ai.agents.models import AzureAISearchQueryType, AzureAISearchTool, ListSortOrder, MessageRole
 from semantic_kernel.agents import AzureAIAgent, AzureAIAgentSettings, AzureAIAgentThread
 from azure.identity import AzureCliCredential  # async credential
 from typing import Annotated
 from semantic_kernel.functions import kernel_function
 
-# Import the Cosmos DB plugin
 from dotenv import load_dotenv
 
+# The shared agents/ package is copied next to this file in the container image;
+# when running from the repository checkout it lives one level up
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# Import the Cosmos DB plugin (asyncio variant, so tool calls don't block the orchestration loop)
+from agents.async_tools import AsyncCosmosDBPlugin
+from agents.claim_cache import get_claim_cache
+from agents.agent_registry import get_agent_registry
+from agents.container_stats import stop_container_stats
+from agents.cosmos_metrics import configure_metrics_export, get_cosmos_metrics
+from agents.deadlines import MemberResultCollector, MemberRuns, agent_deadlines
+from agents.output_profile import OutputProfile
+from agents.prefetch import prefetch_claim, prefetch_enabled
+from agents.result_cache import get_result_cache, result_cache_enabled
+from agents.run_polling import get_run_polling_stats, run_polling_options
+from agents.cosmos_pool import close_async_cosmos_pool, get_async_cosmos_pool
+from agents.tracing import configure_tracing, end_span, start_span, trace_agent, use_span
+
 load_dotenv(override=True)  
 
-class CosmosDBPlugin:
+async def create_specialized_agents(credential=None):
     """
-    A production-ready Cosmos DB plugin that connects to real Azure Cosmos DB.
-    This plugin retrieves actual JSON documents from your database.
+    Create our specialized insurance processing agents using Semantic Kernel.
+    Pass a credential to share it across calls; otherwise one is created for this call.
     """
-    
-    def __init__(self, endpoint: str = None, key: str = None, database_name: str = "MyDatabase", container_name: str = "MyContainer"):
-        """
-        Initialize the Cosmos DB plugin with connection details.
-        For production, use environment variables or Azure Key Vault for credentials.
-        """
-        self.endpoint = endpoint or os.environ.get("COSMOS_ENDPOINT")
-        self.key = key or os.environ.get("COSMOS_KEY") 
-        self.database_name = "insurance_claims"
-        self.container_name = "crash_reports"
-    
-    def _get_cosmos_client(self):
-        """Create and return a Cosmos DB client."""
-        if not self.endpoint or not self.key:
-            raise Exception("Cosmos DB endpoint and key must be configured. Please set COSMOS_ENDPOINT and COSMOS_KEY environment variables.")
-        
-        try:
-            from azure.cosmos import CosmosClient
-            return CosmosClient(self.endpoint, self.key)
-        except ImportError:
-            raise ImportError("azure-cosmos package not installed. Run: pip install azure-cosmos")
-        except Exception as e:
-            raise Exception(f"Failed to create Cosmos DB client: {str(e)}")
-    
-    @kernel_function(description="Test Cosmos DB connection and list available claims")
-    def test_connection(self) -> Annotated[str, "Connection test result and available claims"]:
-        """Test the Cosmos DB connection and show what claims are available."""
-        try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Test with a simple query to get all claim IDs
-            query = "SELECT c.claim_id, c.id FROM c"
-            items = list(container.query_items(
-                query=query,
-                enable_cross_partition_query=True,
-                max_item_count=10  # Limit to first 10 for testing
-            ))
-            
-            if not items:
-                return f"✅ Connection successful but no documents found in container '{self.container_name}'"
-            
-            claim_ids = [item.get('claim_id', 'N/A') for item in items]
-            result = {
-                "connection_status": "SUCCESS",
-                "database": self.database_name,
-                "container": self.container_name,
-                "documents_found": len(items),
-                "available_claim_ids": claim_ids
-            }
-            
-            return json.dumps(result, indent=2)
-            
-        except Exception as e:
-            return f"❌ Connection test failed: {str(e)}"
-    
-    @kernel_function(description="Retrieve a document by claim_id from Cosmos DB using cross-partition query")
-    def get_document_by_claim_id(
-        self, 
-        claim_id: Annotated[str, "The claim_id to retrieve (not the partition key)"]
-    ) -> Annotated[str, "JSON document from Cosmos DB"]:
-        """Retrieve a document by its claim_id using a cross-partition query."""
-        try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Use SQL query to find document by claim_id across all partitions
-            query = "SELECT * FROM c WHERE c.claim_id = @claim_id"
-            parameters = [{"name": "@claim_id", "value": claim_id}]
-            
-            items = list(container.query_items(
-                query=query,
-                parameters=parameters,
-                enable_cross_partition_query=True,
-                max_item_count=1  # We expect only one document with this claim_id
-            ))
-            
-            if not items:
-                # Try to find what claim IDs actually exist
-                all_claims_query = "SELECT c.claim_id FROM c"
-                all_items = list(container.query_items(
-                    query=all_claims_query,
-                    enable_cross_partition_query=True,
-                    max_item_count=10
-                ))
-                available_ids = [item.get('claim_id', 'N/A') for item in all_items]
-                
-                return f"❌ No document found with claim_id '{claim_id}' in container '{self.container_name}'.\n\nAvailable claim IDs: {available_ids}\n\nPlease verify the claim ID exists in the database."
-            
-            # Return the first (and should be only) matching document
-            document = items[0]
-            return json.dumps(document, indent=2, ensure_ascii=False)
-            
-        except Exception as e:
-            error_msg = str(e)
-            if "endpoint and key must be configured" in error_msg:
-                return f"❌ Cosmos DB not configured. Please set COSMOS_ENDPOINT and COSMOS_KEY environment variables. Error: {error_msg}"
-            elif "Unauthorized" in error_msg or "401" in error_msg:
-                return f"❌ Authentication failed. Please check your Cosmos DB credentials. Error: {error_msg}"
-            elif "Forbidden" in error_msg or "403" in error_msg:
-                return f"❌ Access denied. Please check your Cosmos DB permissions. Error: {error_msg}"
-            elif "azure-cosmos package not installed" in error_msg:
-                return f"❌ Missing dependency. Please run: pip install azure-cosmos"
-            else:
-                return f"❌ Error retrieving document by claim_id '{claim_id}': {error_msg}"
-    
-    @kernel_function(description="Retrieve a JSON document by partition key and document ID from Cosmos DB")
-    def get_document_by_id(
-        self, 
-        document_id: Annotated[str, "The document ID to retrieve"],
-        partition_key: Annotated[str, "The partition key value (optional, will use cross-partition query if not provided)"] = None
-    ) -> Annotated[str, "JSON document from Cosmos DB"]:
-        """Retrieve a specific document by its ID and optionally partition key from Cosmos DB."""
-        try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            if partition_key:
-                # Direct read using partition key - most efficient
-                item = container.read_item(item=document_id, partition_key=partition_key)
-                return json.dumps(item, indent=2, ensure_ascii=False)
-            else:
-                # Cross-partition query when partition key is unknown
-                query = "SELECT * FROM c WHERE c.id = @document_id"
-                parameters = [{"name": "@document_id", "value": document_id}]
-                
-                items = list(container.query_items(
-                    query=query,
-                    parameters=parameters,
-                    enable_cross_partition_query=True,
-                    max_item_count=1
-                ))
-                
-                if not items:
-                    return f"❌ Document with ID '{document_id}' not found in container '{self.container_name}'"
-                
-                return json.dumps(items[0], indent=2, ensure_ascii=False)
-            
-        except Exception as e:
-            error_msg = str(e)
-            if "NotFound" in error_msg or "404" in error_msg:
-                return f"❌ Document with ID '{document_id}' not found in container '{self.container_name}'"
-            elif "Unauthorized" in error_msg or "401" in error_msg:
-                return f"❌ Authentication failed. Please check your Cosmos DB credentials."
-            elif "Forbidden" in error_msg or "403" in error_msg:
-                return f"❌ Access denied. Please check your Cosmos DB permissions."
-            else:
-                return f"❌ Error retrieving document: {error_msg}"
-    
-    @kernel_function(description="Query documents with a custom SQL query in Cosmos DB")
-    def query_documents(
-        self, 
-        sql_query: Annotated[str, "SQL query to execute (e.g., 'SELECT * FROM c WHERE c.category = \"electronics\"')"]
-    ) -> Annotated[str, "Query results as JSON"]:
-        """Execute a custom SQL query against the Cosmos DB container."""
-        try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Execute the query
-            items = list(container.query_items(
-                query=sql_query,
-                enable_cross_partition_query=True  # Enable if your query spans partitions
-            ))
-            
-            if not items:
-                return f"🔍 No documents found matching query: {sql_query}"
-            
-            # Return results as formatted JSON
-            result = {
-                "query": sql_query,
-                "count": len(items),
-                "results": items
-            }
-            
-            return json.dumps(result, indent=2, ensure_ascii=False)
-            
-        except Exception as e:
-            error_msg = str(e)
-            if "Syntax error" in error_msg:
-                return f"❌ SQL syntax error in query: {sql_query}\nError: {error_msg}"
-            else:
-                return f"❌ Error executing query: {error_msg}"
-    
-    @kernel_function(description="Get container information and statistics")
-    def get_container_info(self) -> Annotated[str, "Container information and statistics"]:
-        """Get information about the Cosmos DB container."""
-        try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Get container properties
-            container_props = container.read()
-            
-            # Get approximate document count (this is an estimate)
-            count_query = "SELECT VALUE COUNT(1) FROM c"
-            count_items = list(container.query_items(
-                query=count_query,
-                enable_cross_partition_query=True
-            ))
-            document_count = count_items[0] if count_items else "Unknown"
-            
-            info = {
-                "database": self.database_name,
-                "container": self.container_name,
-                "partition_key": container_props.get("partitionKey", {}).get("paths", ["Unknown"]),
-                "approximate_document_count": document_count,
-                "indexing_policy": container_props.get("indexingPolicy", {}).get("indexingMode", "Unknown")
-            }
-            
-            return json.dumps(info, indent=2)
-            
-        except Exception as e:
-            return f"❌ Error getting container info: {str(e)}"
-    
-    @kernel_function(description="List recent documents (up to 100) from Cosmos DB")
-    def list_recent_documents(
-        self, 
-        limit: Annotated[int, "Maximum number of documents to return (default: 10, max: 100)"] = 10
-    ) -> Annotated[str, "List of recent documents"]:
-        """List recent documents from the container."""
-        try:
-            # Ensure limit is within bounds
-            limit = max(1, min(limit, 100))
-            
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Query for documents (ordered by _ts if available)
-            query = f"SELECT TOP {limit} * FROM c ORDER BY c._ts DESC"
-            
-            items = list(container.query_items(
-                query=query,
-                enable_cross_partition_query=True
-            ))
-            
-            if not items:
-                return "📭 No documents found in the container"
-            
-            result = {
-                "container": self.container_name,
-                "count": len(items),
-                "documents": items
-            }
-            
-            return json.dumps(result, indent=2, ensure_ascii=False)
-            
-        except Exception as e:
-            return f"❌ Error listing documents: {str(e)}"
-    
-    @kernel_function(description="Search documents by field value")
-    def search_by_field(
-        self, 
-        field_name: Annotated[str, "The field name to search in (e.g., 'name', 'category', 'status')"],
-        field_value: Annotated[str, "The value to search for"]
-    ) -> Annotated[str, "Documents matching the search criteria"]:
-        """Search for documents where a specific field matches a value."""
-        try:
-            client = self._get_cosmos_client()
-            database = client.get_database_client(self.database_name)
-            container = database.get_container_client(self.container_name)
-            
-            # Use parameterized query for better security and performance
-            query = f"SELECT * FROM c WHERE c.{field_name} = @field_value"
-            parameters = [{"name": "@field_value", "value": field_value}]
-            
-            items = list(container.query_items(
-                query=query,
-                parameters=parameters,
-                enable_cross_partition_query=True
-            ))
-            
-            if not items:
-                return f"🔍 No documents found where {field_name} = '{field_value}'"
-            
-            result = {
-                "search_criteria": f"{field_name} = '{field_value}'",
-                "count": len(items),
-                "documents": items
-            }
-            
-            return json.dumps(result, indent=2, ensure_ascii=False)
-            
-        except Exception as e:
-            return f"❌ Error searching documents: {str(e)}"
+    span = start_span("create_specialized_agents")
+    error = None
+    try:
+        with use_span(span):
+            return await _create_specialized_agents(credential)
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        end_span(span, error=error)
 
-async def create_specialized_agents():
-    """Create our specialized insurance processing agents using Semantic Kernel."""
-    
+async def _create_specialized_agents(credential=None):
     print("🔧 Creating specialized insurance agents...")
     
-    # Create Cosmos DB plugin instances for different agents
-    cosmos_plugin_claims = CosmosDBPlugin()
-    cosmos_plugin_risk = CosmosDBPlugin()
+    # Create Cosmos DB plugin instances for different agents; both draw their
+    # client and container proxy from the same process-wide pool and return
+    # compact, token-budgeted JSON to keep prompt tokens down
+    cosmos_plugin_claims = AsyncCosmosDBPlugin(output_profile=OutputProfile.compact(), agent_name="ClaimReviewer")
+    cosmos_plugin_risk = AsyncCosmosDBPlugin(output_profile=OutputProfile.compact(), agent_name="RiskAnalyzer")
     
     # Get environment variables
     endpoint = os.environ.get("AI_FOUNDRY_PROJECT_ENDPOINT")
     model_deployment = os.environ.get("MODEL_DEPLOYMENT_NAME", "gpt-4.1-mini")
     
     agents = {}
+    # Agents whose definition (model, instructions, tools) is unchanged are reused across runs
+    registry = get_agent_registry()
     
-    async with DefaultAzureCredential() as creds:
+    async with (nullcontext(credential) if credential else DefaultAzureCredential()) as creds:
         client = AzureAIAgent.create_client(credential=creds, endpoint=endpoint)
         
         # Create Claim Reviewer Agent with Cosmos DB access
         print("🔍 Creating Claim Reviewer Agent...")
-        claim_reviewer_definition = await client.agents.create_agent(
+        claim_reviewer_definition = await registry.get_or_create(
+            client,
+            endpoint,
             model=model_deployment,
             name="ClaimReviewer",
             description="Expert Insurance Claim Reviewer Agent specialized in analyzing and validating insurance claims",
@@ -364,12 +107,15 @@ async def create_specialized_agents():
         claim_reviewer_agent = AzureAIAgent(
             client=client,
             definition=claim_reviewer_definition,
-            plugins=[cosmos_plugin_claims]
+            plugins=[cosmos_plugin_claims],
+            polling_options=run_polling_options("ClaimReviewer")
         )
         
         # Create Risk Analyzer Agent with Cosmos DB access
         print("⚠️ Creating Risk Analyzer Agent...")
-        risk_analyzer_definition = await client.agents.create_agent(
+        risk_analyzer_definition = await registry.get_or_create(
+            client,
+            endpoint,
             model=model_deployment,
             name="RiskAnalyzer",
             instructions="""You are the Risk Analysis Agent. Your role is to evaluate the authenticity of insurance claims and detect potential fraud using available claim data.
@@ -382,6 +128,7 @@ async def create_specialized_agents():
 
             Assessment Guidelines:
             - Use the Cosmos DB plugin to access claim records
+            - Use get_documents_by_claim_ids to pull several related claims in a single call instead of one call per claim
             - Look for unusual timing, inconsistent descriptions, irregular amounts, or clustering
             - Check for repeat claim behavior or geographic overlaps
             - Assess the overall risk profile of each claim
@@ -407,7 +154,8 @@ async def create_specialized_agents():
         risk_analyzer_agent = AzureAIAgent(
             client=client,
             definition=risk_analyzer_definition,
-            plugins=[cosmos_plugin_risk]
+            plugins=[cosmos_plugin_risk],
+            polling_options=run_polling_options("RiskAnalyzer")
         )
         
         ai_agent_settings = AzureAIAgentSettings(model_deployment_name= os.environ.get("MODEL_DEPLOYMENT_NAME"), azure_ai_search_connection_id=os.environ.get("AZURE_AI_AGENT_ENDPOINT"))        
@@ -417,7 +165,9 @@ async def create_specialized_agents():
         )
 
         # Create agent definition
-        policy_agent_definition = await client.agents.create_agent(
+        policy_agent_definition = await registry.get_or_create(
+            client,
+            endpoint,
             name="PolicyChecker", 
             model=os.environ.get("MODEL_DEPLOYMENT_NAME"),
             instructions=""""
@@ -446,7 +196,8 @@ async def create_specialized_agents():
 
         policy_checker_agent = AzureAIAgent(
             client=client, 
-            definition=policy_agent_definition
+            definition=policy_agent_definition,
+            polling_options=run_polling_options("PolicyChecker")
         )
 
         agents = {
@@ -455,28 +206,120 @@ async def create_specialized_agents():
             'policy_checker': policy_checker_agent
         }
         
-        print("✅ All specialized agents created/loaded successfully!")
+        print(f"✅ All specialized agents created/loaded successfully! Registry: {json.dumps(registry.stats())}")
         return agents, client
 
-async def run_insurance_claim_orchestration(claim_id: str, policy_number: str):
-    """Orchestrate multiple agents to process an insurance claim concurrently using only the claim ID."""
+def member_report(result: dict) -> str:
+    """A member's section of the report: its answer, or why it has none."""
+    if result["status"] == "completed":
+        return result["content"]
+    return f"⚠️ {result['status'].upper()}: {result['error']}"
+
+def trace_member_result(parent, result: dict, started_ns: int):
+    """Record a member's run, from orchestration.invoke to its final answer, as a child span."""
+    usage = result["usage"] or {}
+    span = start_span(f"agent.{result['name']}", {"gen_ai.agent.name": result["name"], "agent.deadline_s": result["deadline_s"]}, parent=parent, start_time=started_ns)
+    end_span(span, {
+        "agent.status": result["status"],
+        "gen_ai.usage.input_tokens": usage.get("prompt_tokens"),
+        "gen_ai.usage.output_tokens": usage.get("completion_tokens"),
+        "gen_ai.usage.total_tokens": usage.get("total_tokens"),
+    }, error=None if result["status"] == "completed" else (result["error"] or result["status"]),
+       end_time=started_ns + int(result["latency_s"] * 1e9) if result["latency_s"] is not None else None)
+
+async def stop_runtime_now(runtime: InProcessRuntime, member_runs: MemberRuns):
+    """Stop a runtime without waiting for the members that were given up on."""
+    # Their handler tasks are already cancelled; let them settle the message queue before it shuts down
+    await member_runs.settle()
+    await runtime.stop()
+
+def print_member_result(result: dict, cached: bool = False):
+    usage = f", {result['usage']['total_tokens']} tokens" if result["usage"] and result["usage"].get("total_tokens") else ""
+    latency = f", {result['latency_s']}s" if result["latency_s"] is not None else ""
+    source = ", cached" if cached else ""
+    print(f"\n🤖 {result['name']} Analysis ({result['status']}{latency}{usage}{source}):")
+    print(f"{'─'*40}")
+    print(member_report(result))
+
+async def stream_insurance_claim_orchestration(claim_id: str, policy_number: str, agents: dict = None, runtime: InProcessRuntime = None, deadlines: dict = None, prefetch: bool = None, use_cache: bool = None, recorder=None):
+    """
+    Orchestrate multiple agents to process an insurance claim concurrently using only the claim ID,
+    yielding each agent's result as soon as it is final:
+        {"type": "agent", "name", "status", "content", "latency_s", "usage", "error", ...}
+    followed by one {"type": "report", "report": <combined analysis>, "results": [...]}.
+    Pass agents and an already started runtime to share them across runs (see batch.py).
+    deadlines maps agent names to seconds (default AGENT_DEADLINE_SECONDS / AGENT_DEADLINES);
+    members that miss theirs are reported as timed out and the rest of the report is kept.
+    With prefetch (default ORCHESTRATION_PREFETCH_CLAIM), the claim is fetched once here and
+    injected into the task, and its structured_claim_info.policy_number fills a missing policy number.
+    With use_cache (default RESULT_CACHE_ENABLED, off), a complete result for the same claim version,
+    policy number, agent definitions and model is served from the SQLite result cache,
+    marked "cached" and with its report headed by when it was produced.
+    A recorder (agents.replay.OrchestrationRecorder) captures every member message for offline replay.
+    Closing the generator early cancels the members still running and stops an owned runtime
+    without waiting for them; wrap it in contextlib.aclosing() so that happens at the break
+    rather than whenever the generator is garbage collected.
+    """
     
     print(f"🚀 Starting Concurrent Insurance Claim Processing Orchestration")
     print(f"{'='*80}")
     
+    # One trace per orchestration. A generator must not keep its span current across
+    # yields, so it is only made current around the awaits that do the work.
+    orchestration_span = start_span("claim_orchestration", {"claim.id": claim_id, "policy.number": policy_number})
+    span_attributes = {"gen_ai.usage.input_tokens": 0, "gen_ai.usage.output_tokens": 0, "gen_ai.usage.total_tokens": 0}
+    span_error = None
+    
     # Create our specialized agents
-    agents, client = await create_specialized_agents()
+    if agents is None:
+        try:
+            with use_span(orchestration_span):
+                agents, client = await create_specialized_agents()
+        except Exception as e:
+            end_span(orchestration_span, error=str(e))
+            raise
     
-    # Create concurrent orchestration with all three agents
+    # Create concurrent orchestration with all three agents; answers are collected
+    # as each member finishes, so a slow member cannot hold back the others
+    # Members run on copies that trace their Azure calls and record their runs, so a member past its deadline can be cancelled
+    member_runs = MemberRuns()
+    members = [member_runs.track(trace_agent(agents[key])) for key in ('claim_reviewer', 'risk_analyzer', 'policy_checker')]
+    names = [member.name for member in members]
+    collector = MemberResultCollector(names, agent_deadlines(names, deadlines), runs=member_runs)
     orchestration = ConcurrentOrchestration(
-        members=[agents['claim_reviewer'], agents['risk_analyzer'], agents['policy_checker']]
+        members=members,
+        agent_response_callback=recorder.wrap(collector.on_response) if recorder else collector.on_response
     )
     
-    # Create and start runtime
-    runtime = InProcessRuntime()
-    runtime.start()
+    # A shared runtime belongs to the caller, which also owns the Cosmos DB metrics scope:
+    # the runtime's worker tasks inherit the run from the context that started it
+    owns_runtime = runtime is None
+    if owns_runtime:
+        # Attribute Cosmos DB request charges and latency to this run; must be set before start()
+        metrics = get_cosmos_metrics()
+        run_id = f"{claim_id}-{uuid.uuid4().hex[:8]}"
+        run_token = metrics.begin_run(run_id)
+        started = time.perf_counter()
+        
+        # Create and start runtime; its worker tasks (and plugin spans) inherit the orchestration span
+        runtime = InProcessRuntime()
+        with use_span(orchestration_span):
+            runtime.start()
     
     try:        
+        # Optionally fetch the claim once for everyone instead of once per agent
+        with use_span(orchestration_span):
+            prefetched = await prefetch_claim(claim_id) if prefetch_enabled(prefetch) else None
+        claim_instruction = f'MUST USE: get_document_by_claim_id("{claim_id}") to retrieve claim details'
+        claim_data = ""
+        if prefetched:
+            claim_instruction = "The claim document is provided under CLAIM DATA below - do NOT fetch this claim again (use your tools only for other claims)"
+            claim_data = f"\nCLAIM DATA (claim {claim_id}, as returned by get_document_by_claim_id):\n{prefetched['claim_json']}\n"
+            if prefetched["policy_number"] and not policy_number:
+                policy_number = prefetched["policy_number"]
+            elif prefetched["policy_number"] and prefetched["policy_number"] != policy_number:
+                print(f"⚠️ Policy number {policy_number} differs from the claim's {prefetched['policy_number']}; using {policy_number}")
+        
         # Create task that instructs agents to retrieve claim details first
         task = f"""Analyze the insurance claim with ID: {claim_id} or the policy number {policy_number} and come back with a critical solution for if the credit should be approved.
 
@@ -485,7 +328,7 @@ CRITICAL: ALL AGENTS MUST USE THEIR AVAILABLE TOOLS TO RETRIEVE INFORMATION
 AGENT-SPECIFIC INSTRUCTIONS:
 
 Claim Reviewer Agent: 
-- MUST USE: get_document_by_claim_id("{claim_id}") to retrieve claim details
+- {claim_instruction}
 - Review all claim documentation and assess completeness
 - Validate damage estimates and repair costs against retrieved data
 - Check for proper evidence and documentation in the claim data
@@ -493,7 +336,7 @@ Claim Reviewer Agent:
 - Provide VALID/QUESTIONABLE/INVALID determination with detailed reasoning
 
 Risk Analyzer Agent:
-- MUST USE: get_document_by_claim_id("{claim_id}") to retrieve claim data
+- {claim_instruction}
 - Analyze the retrieved data for fraud indicators and suspicious patterns
 - Assess claim authenticity and credibility based on actual claim details
 - Check for unusual timing, amounts, or circumstances in the data
@@ -510,45 +353,110 @@ Policy Checker Agent (policy_checker_agent):
 
 IMPORTANT: Each agent MUST actively use their tools to retrieve and analyze actual data. 
 Do not provide generic responses - base your analysis on the specific claim data and policy documents retrieved through your tools.
-"""
+{claim_data}"""
+        # Identical inputs (claim _etag, policy, agent definitions, model) reuse the stored result
+        # SQLite calls run in a worker thread so they never block the event loop
+        result_cache = await asyncio.to_thread(get_result_cache) if result_cache_enabled(use_cache) else None
+        cache_key = None
+        if result_cache is not None:
+            model_deployment = os.environ.get("MODEL_DEPLOYMENT_NAME", "gpt-4.1-mini")
+            with use_span(orchestration_span):
+                cache_key = await result_cache.key_for(claim_id, policy_number, members, model_deployment)
+            cached = await asyncio.to_thread(result_cache.get, cache_key) if cache_key else None
+            span_attributes["orchestration.cached"] = bool(cached)
+            if cached:
+                print(f"\n♻️ Serving cached result for claim {claim_id} (agents, claim and policy unchanged)")
+                for result in cached["results"]:
+                    print_member_result(result, cached=True)
+                    yield {"type": "agent", **result, "cached": True}
+                yield {"type": "report", "report": result_cache.cached_report(cached), "results": cached["results"], "cached": True}
+                return
+        
         # Invoke concurrent orchestration
-        orchestration_result = await orchestration.invoke(
-            task=task,
-            runtime=runtime
-        )
+        if recorder:
+            recorder.start(task)
+        invoked_ns = time.time_ns()
+        # Deadlines count from here, not from the prefetch and cache lookup above
+        collector.start()
+        with use_span(orchestration_span):
+            orchestration_result = await orchestration.invoke(
+                task=task,
+                runtime=runtime
+            )
         
-        # Get results from all agents
-        results = await orchestration_result.get(timeout=300)  # 5 minute timeout
+        # Stream results from all agents as they arrive, each within its own deadline; if our
+        # caller stops early, closing the member stream cancels whatever is still running
+        async with aclosing(collector.stream(orchestration_result)) as member_results:
+            async for result in member_results:
+                print_member_result(result)
+                trace_member_result(orchestration_span, result, invoked_ns)
+                for key, usage_key in (("gen_ai.usage.input_tokens", "prompt_tokens"), ("gen_ai.usage.output_tokens", "completion_tokens"), ("gen_ai.usage.total_tokens", "total_tokens")):
+                    span_attributes[key] += (result["usage"] or {}).get(usage_key) or 0
+                yield {"type": "agent", **result, "cached": False}
         
-        print(f"\n🎉 All agents completed their analysis!")
-        print(f"{'─'*60}")
+        results = [collector.results[name] for name in names]
+        completed = [result for result in results if result["status"] == "completed"]
+        span_attributes["orchestration.agents_completed"] = len(completed)
+        if not completed:
+            raise Exception("No agent completed: " + "; ".join(f"{r['name']} {r['status']} ({r['error']})" for r in results))
         
-        # Display individual results
-        for i, result in enumerate(results, 1):
-            agent_name = result.name if hasattr(result, 'name') else f"Agent {i}"
-            content = str(result.content)
-            print(f"\n🤖 {agent_name} Analysis:")
-            print(f"{'─'*40}")
-            print(content)
+        print(f"{'─'*60}")
+        if len(completed) == len(results):
+            print(f"\n🎉 All agents completed their analysis!")
+        else:
+            print(f"\n⚠️ Partial result: {len(completed)} of {len(results)} agents completed")
         
-        # Create comprehensive analysis report
+        # Create comprehensive analysis report; missing members are called out rather than dropped
         comprehensive_analysis = f"""
 
-{chr(10).join([f"### {result.name} Assessment:{chr(10)}{chr(10)}{result.content}{chr(10)}" for result in results])}
+{chr(10).join([f"### {result['name']} Assessment:{chr(10)}{chr(10)}{member_report(result)}{chr(10)}" for result in results])}
 
 """
         
+        # Partial results are not cached: the next run should get another chance at the missing members
+        if cache_key and len(completed) == len(results):
+            await asyncio.to_thread(result_cache.put, cache_key, claim_id, policy_number, comprehensive_analysis, results)
+        
         print(f"\n✅ Concurrent Insurance Claim Orchestration Complete!")
-        return comprehensive_analysis
+        yield {"type": "report", "report": comprehensive_analysis, "results": results, "cached": False}
+        
+    except GeneratorExit:
+        print(f"⏹️ Orchestration stream closed early; remaining agents cancelled")
+        span_attributes["orchestration.closed_early"] = True
+        raise
         
     except Exception as e:
         print(f"❌ Error during orchestration: {str(e)}")
+        span_error = str(e)
         raise
         
     finally:
-        await runtime.stop_when_idle()
+        if owns_runtime:
+            if collector.gave_up:
+                await stop_runtime_now(runtime, member_runs)
+            else:
+                await runtime.stop_when_idle()
+            metrics.end_run(run_token)
+            summary = metrics.pop_run(run_id)
+            span_attributes["db.cosmosdb.request_charge"] = sum(s["request_charge"] for functions in summary.values() for s in functions.values())
+            print(f"\n💰 Cosmos DB cost/latency for run {run_id} ({(time.perf_counter() - started):.1f}s wall clock):")
+            print(metrics.format_summary(summary))
+        print(f"\n📊 Cosmos DB pool stats: {json.dumps(get_async_cosmos_pool().stats())}")
+        print(f"📊 Claim cache stats: {json.dumps(get_claim_cache().stats())}")
+        print(f"📊 Run polling stats: {json.dumps(get_run_polling_stats().snapshot())}")
+        if result_cache_enabled(use_cache):
+            print(f"📊 Result cache stats: {json.dumps(await asyncio.to_thread(lambda: get_result_cache().stats()))}")
+        end_span(orchestration_span, span_attributes, error=span_error)
         print(f"\n🧹 Orchestration cleanup complete.")
 
+async def run_insurance_claim_orchestration(claim_id: str, policy_number: str, agents: dict = None, runtime: InProcessRuntime = None, deadlines: dict = None, prefetch: bool = None, use_cache: bool = None, recorder=None) -> str:
+    """Run the orchestration to completion and return the combined report (see stream_insurance_claim_orchestration)."""
+    report = None
+    async for event in stream_insurance_claim_orchestration(claim_id, policy_number, agents, runtime, deadlines, prefetch, use_cache, recorder):
+        if event["type"] == "report":
+            report = event["report"]
+    return report
+
 if __name__ == "__main__":
     import os
     # Get claim ID and policy number from environment variables or use defaults
@@ -556,4 +464,16 @@ if __name__ == "__main__":
     policy_number = os.environ.get("POLICY_NUMBER", "LIAB-AUTO-001")  # Use a real policy number
     
     print(f"Processing Claim ID: {claim_id}, Policy Number: {policy_number}")
-    asyncio.run(run_insurance_claim_orchestration(claim_id, policy_number))
\ No newline at end of file
+    configure_metrics_export()
+    tracer_provider = configure_tracing()
+
+    async def main():
+        try:
+            await run_insurance_claim_orchestration(claim_id, policy_number)
+        finally:
+            stop_container_stats()
+            await close_async_cosmos_pool()
+            if tracer_provider:
+                tracer_provider.shutdown()
+
+    asyncio.run(main())
\ No newline at end of file
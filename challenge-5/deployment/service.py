@@ -0,0 +1,244 @@
+"""
+Resident HTTP service for the insurance claim orchestration.
+
+The credential, agents, Semantic Kernel runtime and Cosmos DB pool are created once at
+startup and reused by every request. Requests wait in a bounded queue served by a fixed
+number of workers; when the queue is full the service answers 429 instead of piling up work.
+
+    POST /claims/{claim_id}/assess   {"policy_number": "LIAB-AUTO-001"}
+    GET  /healthz                    liveness: the process and event loop respond and warm-up has not given up
+    GET  /readyz                     readiness: warm-up finished and the queue has room
+"""
+import os
+import sys
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import uvicorn
+from azure.identity.aio import DefaultAzureCredential
+from semantic_kernel.agents.runtime import InProcessRuntime
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# Same layout handling as orchestration.py: agents/ sits next to this file in the image
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from orchestration import create_specialized_agents, run_insurance_claim_orchestration
+from agents.async_tools import AsyncCosmosDBPlugin
+from agents.container_stats import stop_container_stats
+from agents.cosmos_metrics import configure_metrics_export, get_cosmos_metrics
+from agents.tracing import configure_tracing
+from agents.cosmos_pool import close_async_cosmos_pool
+
+SERVICE_WORKERS = int(os.environ.get("SERVICE_WORKERS", "4"))
+SERVICE_QUEUE_SIZE = int(os.environ.get("SERVICE_QUEUE_SIZE", "32"))
+SERVICE_REQUEST_TIMEOUT = float(os.environ.get("SERVICE_REQUEST_TIMEOUT", "330"))
+DEFAULT_POLICY_NUMBER = os.environ.get("POLICY_NUMBER", "")
+SERVICE_WARMUP_ATTEMPTS = int(os.environ.get("SERVICE_WARMUP_ATTEMPTS", "5"))
+SERVICE_WARMUP_BACKOFF_SECONDS = float(os.environ.get("SERVICE_WARMUP_BACKOFF_SECONDS", "5"))
+
+
+class ClaimAssessmentService:
+    """Owns the warm resources and the worker pool behind the HTTP routes."""
+
+    def __init__(self, workers: int = SERVICE_WORKERS, queue_size: int = SERVICE_QUEUE_SIZE):
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.credential = None
+        self.agents = None
+        self.runtime = None
+        self.ready = False
+        self.warmup_error = None
+        self.warmup_attempts = 0
+        self.warmup_failed = False
+        self.in_flight = 0
+        self.stats = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self._tasks = []
+
+    async def warm_up(self, attempts: int = SERVICE_WARMUP_ATTEMPTS, backoff: float = SERVICE_WARMUP_BACKOFF_SECONDS):
+        """
+        Create the agents and runtime and open the Cosmos DB pool before taking traffic.
+        Failed attempts are retried with exponential backoff; once they are used up the
+        service reports itself unhealthy so the platform restarts it.
+        """
+        started = time.perf_counter()
+        # Plugin calls from the runtime's tasks are attributed to one long-lived "service" run
+        get_cosmos_metrics().begin_run("service")
+        for attempt in range(1, attempts + 1):
+            self.warmup_attempts = attempt
+            try:
+                await self._start()
+                break
+            except Exception as e:
+                self.warmup_error = str(e)
+                await self._release()
+                if attempt == attempts:
+                    self.warmup_failed = True
+                    print(f"❌ Service warm-up failed after {attempts} attempts: {str(e)}")
+                    return
+                delay = min(backoff * 2 ** (attempt - 1), 60)
+                print(f"⚠️ Service warm-up attempt {attempt} failed, retrying in {delay:g}s: {str(e)}")
+                await asyncio.sleep(delay)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.warmup_error = None
+        self.ready = True
+        print(f"✅ Service ready in {time.perf_counter() - started:.1f}s with {self.workers} workers")
+
+    async def _start(self):
+        self.credential = DefaultAzureCredential()
+        self.agents, _ = await create_specialized_agents(credential=self.credential)
+        self.runtime = InProcessRuntime()
+        self.runtime.start()
+        # Opens the pooled Cosmos DB client and starts tailing the change feed
+        await AsyncCosmosDBPlugin(agent_name="warmup").test_connection()
+
+    async def _release(self):
+        """Drop what a failed warm-up attempt had set up, so the next one starts clean."""
+        if self.runtime is not None:
+            await self.runtime.stop()
+            self.runtime = None
+        if self.credential is not None:
+            await self.credential.close()
+            self.credential = None
+        self.agents = None
+
+    async def _worker(self):
+        while True:
+            claim_id, policy_number, future = await self.queue.get()
+            if future.cancelled():
+                self.queue.task_done()
+                continue
+            self.in_flight += 1
+            try:
+                analysis = await run_insurance_claim_orchestration(claim_id, policy_number, agents=self.agents, runtime=self.runtime)
+                self.stats["completed"] += 1
+                if not future.done():
+                    future.set_result(analysis)
+            except Exception as e:
+                self.stats["failed"] += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
+
+    def submit(self, claim_id: str, policy_number: str) -> asyncio.Future:
+        """Queue an assessment; raises asyncio.QueueFull when the service is saturated."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((claim_id, policy_number, future))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise
+        self.stats["accepted"] += 1
+        return future
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup_error": self.warmup_error,
+            "warmup_attempts": self.warmup_attempts,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queued": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            **self.stats,
+        }
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.runtime is not None:
+            await self.runtime.stop_when_idle()
+        stop_container_stats()
+        await close_async_cosmos_pool()
+        if self.credential is not None:
+            await self.credential.close()
+
+
+async def assess_claim(request: Request) -> JSONResponse:
+    service = request.app.state.service
+    if not service.ready:
+        return JSONResponse({"error": "Service is warming up", **service.status()}, status_code=503, headers={"Retry-After": "5"})
+
+    claim_id = request.path_params["claim_id"]
+    body = {}
+    if await request.body():
+        try:
+            body = await request.json()
+        except ValueError:
+            return JSONResponse({"error": "Request body must be JSON"}, status_code=400)
+        if not isinstance(body, dict):
+            return JSONResponse({"error": "Request body must be a JSON object"}, status_code=400)
+    policy_number = body.get("policy_number") or request.query_params.get("policy_number") or DEFAULT_POLICY_NUMBER
+
+    try:
+        future = service.submit(claim_id, policy_number)
+    except asyncio.QueueFull:
+        return JSONResponse({"error": "Too many claims queued, retry later", **service.status()}, status_code=429, headers={"Retry-After": "10"})
+
+    started = time.perf_counter()
+    try:
+        # shield: a slow request times out for the caller, but the queued run is not torn down mid-flight
+        analysis = await asyncio.wait_for(asyncio.shield(future), timeout=SERVICE_REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        return JSONResponse({"error": f"Assessment of claim {claim_id} timed out", "claim_id": claim_id}, status_code=504)
+    except Exception as e:
+        return JSONResponse({"error": str(e), "claim_id": claim_id}, status_code=502)
+
+    return JSONResponse({
+        "claim_id": claim_id,
+        "policy_number": policy_number,
+        "analysis": analysis,
+        "duration_s": round(time.perf_counter() - started, 2),
+    })
+
+
+async def healthz(request: Request) -> JSONResponse:
+    service = request.app.state.service
+    if service.warmup_failed:
+        return JSONResponse({"status": "failed", "warmup_error": service.warmup_error}, status_code=503)
+    return JSONResponse({"status": "ok"})
+
+
+async def readyz(request: Request) -> JSONResponse:
+    service = request.app.state.service
+    status = service.status()
+    ready = service.ready and service.queue.qsize() < service.queue.maxsize
+    return JSONResponse(status, status_code=200 if ready else 503)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    configure_metrics_export()
+    tracer_provider = configure_tracing("insurance-claim-service")
+    service = ClaimAssessmentService()
+    app.state.service = service
+    # Warm up in the background so /healthz answers while agents are being created
+    warmup = asyncio.create_task(service.warm_up())
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        await service.close()
+        if tracer_provider:
+            tracer_provider.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route("/claims/{claim_id}/assess", assess_claim, methods=["POST"]),
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/readyz", readyz, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", "8000")))